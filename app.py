@@ -1,13 +1,23 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import random
+import functools
 import uuid # 위젯 키를 위한 고유 ID 생성
+import re
+import weakref
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # --- core 폴더의 함수들 임포트 ---
 from core.data_loader import load_data_from_github
-from core.tts import autoplay_audio
+from core.tts import autoplay_audio, get_prefetcher
 from core.stt import process_audio_for_stt
-from core.checker import compare_answers, get_highlighted_diff_html
+from core.checker import check_answer, render_diff_html
+from core.picker import SentencePicker
+from core.scheduler import get_scheduler
+from core.search import get_search_index, prebuild_search_index
+from core.tracing import tracer
+
+# ?user= 로 받을 수 있는 사용자 토큰 (uuid.uuid4().hex와 같은 32자리 소문자 16진수)
+USER_TOKEN_PATTERN = re.compile(r"[0-9a-f]{32}")
 
 # --- 1. 설정 및 세션 상태 초기화 ---
 
@@ -17,6 +27,21 @@ st.set_page_config(
     layout="centered"
 )
 
+if 'session_id' not in st.session_state:
+    # 이 세션이 예약한 음성 미리 합성을 구분/취소하고, 추적에서 세션을 구분하기 위한 ID
+    st.session_state.session_id = str(uuid.uuid4())
+if 'user_id' not in st.session_state:
+    # 복습 기록을 이어 가기 위한 사용자 ID. 주소(?user=...)에 남겨 새로고침이나 북마크 후에도 유지.
+    # 추측할 수 없는 무작위 토큰(uuid4 hex)만 받고, 그 밖의 값은 버리고 새 토큰을 만듦
+    user_token = st.query_params.get("user", "")
+    if USER_TOKEN_PATTERN.fullmatch(user_token):
+        st.session_state.user_id = user_token
+    else:
+        st.session_state.user_id = uuid.uuid4().hex
+        st.query_params["user"] = st.session_state.user_id
+# 스크립트 실행(rerun) 한 번을 추적 단위로 시작 (추적이 꺼져 있으면 아무 일도 하지 않음)
+tracer.start_interaction(st.session_state.session_id)
+
 def reset_state_for_new_sentence():
     """새로운 문장이 선택될 때마다 관련 세션 상태를 초기화하는 함수"""
     st.session_state.user_answer = ""
@@ -29,36 +54,242 @@ def reset_state_for_new_sentence():
     st.session_state.audio_key = str(uuid.uuid4())
 
 
-def set_new_random_sentence():
-    """현재 선택된 카테고리에서 랜덤한 새 문장을 설정하는 함수"""
+def next_sentence_index(peek=False):
+    """
+    다음 문장의 위치를 고르는 함수. 복습 모드면 간격 반복 스케줄러가, 아니면 셔플 가방이 고름.
+    peek=True면 미리 보기만 하고 선택을 확정하지 않음 (음성 미리 합성용)
+    """
     category = st.session_state.selected_category
-    sentences = st.session_state.sentences
-    possible_indices = [i for i, s in enumerate(sentences) if s.get('category') == category]
-    if not possible_indices:
+    picker = st.session_state.picker
+    if st.session_state.review_mode:
+        return get_scheduler().next_index(st.session_state.user_id, corpus, category, picker,
+                                          exclude=st.session_state.get('current_index', -1), peek=peek)
+    return picker.peek_index(corpus, category) if peek else picker.next_index(corpus, category)
+
+def set_new_random_sentence():
+    """현재 선택된 카테고리에서 새 문장을 설정하는 함수 (랜덤 모드는 카테고리를 한 바퀴 돌 때까지 중복 없음)"""
+    new_idx = next_sentence_index()
+    if new_idx == -1:
         st.session_state.current_index = -1; return
-    
-    current_idx = st.session_state.get('current_index', -1)
-    new_idx = random.choice(possible_indices)
-    if len(possible_indices) > 1 and current_idx in possible_indices:
-        while new_idx == current_idx: new_idx = random.choice(possible_indices)
-    
-    st.session_state.current_index = new_idx
+
+    show_sentence(new_idx)
+
+def show_sentence(index):
+    """index 위치의 문장으로 바꾸고, 그 음성을 자동 재생하고 다음 문장의 음성을 미리 합성하는 함수"""
+    st.session_state.current_index = index
     reset_state_for_new_sentence()
 
-    if st.session_state.current_index != -1:
-        korean_text_to_play = st.session_state.sentences[st.session_state.current_index]["korean"]
-        audio_html = autoplay_audio(korean_text_to_play)
-        if audio_html:
-            st.session_state.auto_play_audio_html = audio_html
+    korean_text_to_play = corpus.korean_of(index)
+    get_prefetcher().record_switch(korean_text_to_play) # 미리 합성해 둔 음성이 있었는지 기록
+    audio_html = autoplay_audio(korean_text_to_play)
+    if audio_html:
+        st.session_state.auto_play_audio_html = audio_html
+    prefetch_next_sentence_audio()
+
+def render_debug_panel():
+    """최근 스크립트 실행들의 단계별 시간과 캐시 적중률을 보여 주는 패널 (추적이 켜져 있고 ?debug=1일 때만)"""
+    with st.expander("🛠️ Debug: 실행 시간 & 캐시"):
+        st.markdown("**최근 실행**")
+        st.dataframe([
+            {
+                "run": interaction.id,
+                "session": interaction.session[:8],
+                "total (ms)": None if interaction.duration_ms is None else round(interaction.duration_ms, 1),
+                "spans (ms)": ", ".join(f"{name} {ms:.1f}" for name, ms in interaction.spans),
+            }
+            for interaction in tracer.recent_interactions()
+        ], use_container_width=True)
+
+        st.markdown("**단계별 평균**")
+        st.dataframe([
+            {"span": name, "count": count, "mean (ms)": round(mean_ms, 2), "errors": errors}
+            for name, (count, mean_ms, errors) in sorted(tracer.span_summary().items())
+        ], use_container_width=True)
+
+        st.markdown("**캐시 적중률**")
+        st.dataframe([
+            {"cache": name, "hits": hits, "misses": misses,
+             "hit rate": f"{hits / (hits + misses):.0%}" if hits + misses else "-"}
+            for name, (hits, misses) in sorted(tracer.cache_stats().items())
+        ], use_container_width=True)
+
+        st.download_button("Prometheus 지표 내려받기", tracer.prometheus_text(),
+                           file_name="learn_speaking_metrics.prom", mime="text/plain")
+
+def prefetch_next_sentence_audio():
+    """사용자가 지금 문장에 답하는 동안, 다음에 나올 문장을 미리 골라 그 음성을 백그라운드에서 합성해 두는 함수"""
+    next_idx = next_sentence_index(peek=True)
+    if next_idx != -1:
+        get_prefetcher().prefetch(corpus.korean_of(next_idx), owner=st.session_state.session_id)
+
+# --- 위젯 콜백 ---
+# 콜백은 스크립트가 다시 실행되기 전에 호출되므로, 세션 상태를 바꾼 뒤 st.rerun()을 한 번 더 할 필요가 없음
+
+def select_category(category):
+    """카테고리 버튼을 눌렀을 때 호출되는 콜백"""
+    if st.session_state.selected_category != category:
+        # 이전 카테고리의 다음 문장을 위해 예약해 둔 미리 합성은 필요 없어짐
+        get_prefetcher().cancel(st.session_state.session_id)
+        st.session_state.selected_category = category
+        set_new_random_sentence()
+
+def replay_audio():
+    """'다시 듣기' 버튼 콜백. 같은 오디오 HTML이라도 다시 재생되도록 재생 횟수를 함께 바꿈"""
+    st.session_state.manual_audio_html = autoplay_audio(corpus.korean_of(st.session_state.current_index))
+    st.session_state.audio_play_count += 1
+
+def practice_sentence(index):
+    """자유 말하기 결과에서 고른 문장으로 이동 (그 문장의 카테고리로 함께 바꿈)"""
+    get_prefetcher().cancel(st.session_state.session_id)
+    st.session_state.selected_category = corpus.category_of(index)
+    show_sentence(index)
+
+def toggle_all_answers():
+    """'모든 답안 보기/숨기기' 버튼 콜백"""
+    st.session_state.show_all_correct_options = not st.session_state.show_all_correct_options
+
+def traced_fragment(func):
+    """
+    st.fragment로 감싸되, fragment만 다시 실행될 때도 추적 단위(실행 한 번)를 나눠 기록하는 데코레이터.
+    스크립트 전체 실행 중에 그려질 때는 그 실행의 일부로 기록됩니다.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        ctx = get_script_run_ctx()
+        partial = bool(ctx and ctx.fragment_ids_this_run)
+        if partial:
+            tracer.start_interaction(st.session_state.session_id)
+            tracer.count("fragment_runs")
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if partial:
+                tracer.end_interaction()
+    return st.fragment(wrapper)
+
+# --- 부분 실행 영역 (fragment) ---
+
+@traced_fragment
+def sentence_audio_player():
+    """문장 음성 자동 재생과 '다시 듣기' 버튼"""
+    audio_to_play = st.session_state.auto_play_audio_html or st.session_state.manual_audio_html
+    if audio_to_play:
+        components.html(f"{audio_to_play}<!-- {st.session_state.audio_play_count} -->", height=0, scrolling=False)
+        st.session_state.auto_play_audio_html = None
+        st.session_state.manual_audio_html = None
+
+    st.button("🔂 다시 듣기", use_container_width=True, on_click=replay_audio)
+
+@traced_fragment
+def answer_area(sentence_id, correct_answers, cleaned_answers):
+    """녹음 → 음성 인식 → 채점 결과와 답안 보기. 녹음이나 답안 토글은 이 영역만 다시 그림"""
+    st.markdown("##### 🎤 말하기")
+    
+    audio_uploader = st.audio_input(
+        "마이크 아이콘을 누르고 말한 뒤, 정지 버튼을 누르세요:", 
+        key=st.session_state.audio_key
+    )
+
+    if audio_uploader and audio_uploader.file_id != st.session_state.processed_audio_id:
+        st.session_state.processed_audio_id = audio_uploader.file_id
+
+        with st.spinner("음성 분석 중..."):
+            audio_bytes_data = audio_uploader.getvalue()
+            stt_result = process_audio_for_stt(audio_bytes_data)
+
+        if stt_result.ok:
+            recognized_text = stt_result.text
+            st.session_state.user_answer = recognized_text
+            # 점수와 단어 단위 정렬을 한 번에 계산 (교정 표시는 이 결과로만 그림)
+            st.session_state.check_result = check_answer(
+                recognized_text, correct_answers, cleaned_answers, sentence_id=sentence_id)
+            # 복습 모드를 켠 사용자의 점수만 기록함 (켜지 않은 사용자는 저장소와 스케줄을 만들지 않음)
+            if st.session_state.review_mode:
+                get_scheduler().record(st.session_state.user_id, corpus, st.session_state.current_index,
+                                       st.session_state.check_result.score)
+        else:
+            st.warning("음성을 인식하지 못했거나 처리 중 오류가 발생했습니다.")
+            st.session_state.user_answer = "" 
+            st.session_state.check_result = None
+
+    if st.session_state.user_answer:
+        st.markdown("---")
+        st.markdown("##### 💬 Your Answer")
+        st.write(f"##### **“{st.session_state.user_answer}”**")
+
+        if st.session_state.check_result:
+            check_result = st.session_state.check_result
+            similarity_percentage = check_result.similarity_percentage
+            st.markdown(f"> **유사도: {similarity_percentage:.1f}%**")
+
+            if similarity_percentage >= 90:
+                st.success("🎉 거의 완벽해요!")
+                # 이 아래에 Corrected Answer를 추가
+                st.markdown("##### ✏️ Corrected Answer")
+            elif similarity_percentage >= 70: # 70% 이상 90% 미만일 때
+                st.info("👍 아쉽네요! 그래도 계속 도전해보세요.")
+                st.markdown("##### ✏️ Corrected Answer")
+                highlighted_answer = render_diff_html(check_result)
+                st.markdown(f"<div class='highlighted-diff'>{highlighted_answer}</div>", unsafe_allow_html=True)
+            else: # 70% 미만일 때
+                st.warning("🤔 조금 아쉬워요. 다시 한번 도전해보세요!")
+
+    # '모든 답안 보기/숨기기' 버튼은 사용자 답변 평가 후에 위치
+    button_text = "🙈 답안 숨기기" if st.session_state.show_all_correct_options else "📝 모든 답안 보기"
+    st.button(button_text, key="toggle_all_answers", use_container_width=True, on_click=toggle_all_answers)
+
+    if st.session_state.show_all_correct_options:
+        st.markdown("##### 📝 Correct Answer(s) ")
+        answer_html = "".join([f"<li>🇬🇧 {ans}</li>" for ans in correct_answers])
+        st.markdown(f"<div class='info-list-container'><ul>{answer_html}</ul></div>", unsafe_allow_html=True)
+
+@traced_fragment
+def free_speech_area():
+    """아무 문장이나 말하면 전체 문장 모음에서 가장 가까운 문장들을 찾아 주는 영역"""
+    audio_uploader = st.audio_input("떠오르는 영어 문장을 자유롭게 말해 보세요:", key="free_speech_audio")
+
+    if audio_uploader and audio_uploader.file_id != st.session_state.free_speech_audio_id:
+        st.session_state.free_speech_audio_id = audio_uploader.file_id
+        with st.spinner("비슷한 문장을 찾는 중..."):
+            stt_result = process_audio_for_stt(audio_uploader.getvalue())
+            if stt_result.ok:
+                # 색인은 문장 모음마다 처음 검색할 때 한 번만 만들어 모든 세션이 공유함
+                st.session_state.free_speech_text = stt_result.text
+                st.session_state.free_speech_hits = get_search_index(corpus).search(stt_result.text)
+            else:
+                st.session_state.free_speech_text = ""
+                st.session_state.free_speech_hits = None
+        if not stt_result.ok:
+            st.warning("음성을 인식하지 못했거나 처리 중 오류가 발생했습니다.")
+
+    if st.session_state.free_speech_text:
+        st.write(f"##### **“{st.session_state.free_speech_text}”**")
+        if not st.session_state.free_speech_hits:
+            st.info("비슷한 문장을 찾지 못했어요.")
+        for hit in st.session_state.free_speech_hits or []:
+            sentence = corpus[hit.index]
+            st.markdown(f"**{hit.score * 100:.0f}%** · 문장 ID {sentence.id} ({sentence.category})  \n"
+                        f"🇰🇷 {sentence.korean}  \n🇬🇧 {hit.best_match}")
+            # fragment 안의 버튼은 fragment만 다시 실행하므로, 문장을 바꾼 뒤 앱 전체를 다시 그림
+            if st.button("이 문장 연습하기", key=f"practice_{hit.index}"):
+                practice_sentence(hit.index)
+                st.rerun()
+
+# --- 문장 데이터 (모든 세션이 공유하는 읽기 전용 모음) ---
+# 세션 상태에는 문장 자체가 아니라 현재 문장의 위치(current_index)만 저장함
+corpus = load_data_from_github()
+# 자유 말하기 검색 색인은 첫 검색을 기다리지 않고 백그라운드에서 미리 만듦 (모음마다 한 번)
+prebuild_search_index(corpus)
+# 백그라운드 갱신으로 문장 모음이 바뀌었는지 (크기가 같거나 커져도 같은 위치에 다른 문장이 있을 수 있음)
+corpus_changed = 'corpus_ref' in st.session_state and st.session_state.corpus_ref() is not corpus
+st.session_state.corpus_ref = weakref.ref(corpus)
 
 # --- 세션 상태 변수들 초기화 ---
-if 'sentences' not in st.session_state:
-    st.session_state.sentences = load_data_from_github()
 if 'selected_category' not in st.session_state:
     # load_data_from_private_github()가 빈 리스트를 반환할 경우를 대비하여 조건부로 설정
-    if st.session_state.sentences and len(st.session_state.sentences) > 0:
+    if corpus and len(corpus) > 0:
         # JSON 데이터에서 사용 가능한 모든 카테고리 중 첫 번째 카테고리을 기본값으로 설정
-        all_categorys_in_data = sorted(list(set(s['category'] for s in st.session_state.sentences if 'category' in s)))
+        all_categorys_in_data = corpus.categories
         if all_categorys_in_data:
             st.session_state.selected_category = all_categorys_in_data[0]
         else: # 데이터는 있지만 카테고리 키가 없는 경우
@@ -68,12 +299,19 @@ if 'selected_category' not in st.session_state:
         st.session_state.selected_category = None # 문장 데이터 자체가 없는 경우
         st.warning("경고: sentences.json 파일에서 문장 데이터를 로드하지 못했습니다.")
         
+if 'review_mode' not in st.session_state:
+    st.session_state.review_mode = False
+if 'picker' not in st.session_state:
+    st.session_state.picker = SentencePicker()
 if 'current_index' not in st.session_state:
     # selected_category이 설정된 후에 set_new_random_sentence 호출
     if st.session_state.selected_category is not None:
         set_new_random_sentence()
     else:
         st.session_state.current_index = -1 # 카테고리이 없으면 -1로 초기화
+elif corpus_changed:
+    # 예전 모음의 위치는 새 모음에서 다른 문장을 가리킬 수 있으므로 새 문장을 고름
+    set_new_random_sentence()
 if 'user_answer' not in st.session_state:
     st.session_state.user_answer = ""
 if 'check_result' not in st.session_state:
@@ -86,14 +324,30 @@ if 'manual_audio_html' not in st.session_state:
     st.session_state.manual_audio_html = None
 if 'audio_key' not in st.session_state:
     st.session_state.audio_key = 'initial_key'
+if 'processed_audio_id' not in st.session_state:
+    # 이미 채점한 녹음을 fragment가 다시 실행될 때 또 처리하지 않도록 녹음 파일 ID를 기억
+    st.session_state.processed_audio_id = None
+if 'audio_play_count' not in st.session_state:
+    st.session_state.audio_play_count = 0
+if 'free_speech_audio_id' not in st.session_state:
+    st.session_state.free_speech_audio_id = None
+    st.session_state.free_speech_text = ""
+    st.session_state.free_speech_hits = None
+elif corpus_changed:
+    # 검색 결과도 예전 모음의 위치이므로 버림
+    st.session_state.free_speech_hits = None
 
 # --- 2. UI 렌더링 ---
 
 # ★★★★★ 여기부터 CSS 파일 로드하는 코드 ★★★★★
-# CSS 파일 읽기 함수
-def load_css(file_name):
+# CSS 파일 읽기 함수 (파일은 프로세스당 한 번만 읽음)
+@st.cache_resource
+def read_css(file_name):
     with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+        return f.read()
+
+def load_css(file_name):
+    st.markdown(f'<style>{read_css(file_name)}</style>', unsafe_allow_html=True)
 
 # styles/style.css 파일 로드
 load_css("styles/style.css") # 파일 경로를 정확히 지정해야 해!
@@ -105,24 +359,24 @@ st.write("한국어 문장을 듣고 영어로 말하는 연습을 해보세요.
 st.divider()
 
 # 카테고리 선택 UI
-categorys = sorted(list(set(s['category'] for s in st.session_state.sentences if 'category' in s)))
+categorys = corpus.categories
 if not categorys:
     st.warning("연습할 문장이 없습니다. sentences.json 파일을 확인해주세요.")
 else:
     cols = st.columns(len(categorys))
     for i, category in enumerate(categorys):
-        if cols[i].button(f"{category}", use_container_width=True, type=("primary" if st.session_state.selected_category == category else "secondary")):
-            if st.session_state.selected_category != category:
-                st.session_state.selected_category = category
-                set_new_random_sentence()
-                st.rerun() 
+        cols[i].button(f"{category}", use_container_width=True,
+                       type=("primary" if st.session_state.selected_category == category else "secondary"),
+                       on_click=select_category, args=(category,))
+    st.toggle("🧠 복습 모드", key="review_mode", on_change=set_new_random_sentence,
+              help="점수가 낮았던 문장을 간격 반복으로 다시 내 줍니다. 답변 점수는 이 모드를 켠 동안에만 기록됩니다.")
 
 st.divider()
 
 if st.session_state.current_index == -1:
     st.warning(f"카테고리 {st.session_state.selected_category}에 해당하는 문장이 없습니다.")
-elif st.session_state.sentences:
-    current_sentence_data = st.session_state.sentences[st.session_state.current_index]
+elif corpus:
+    current_sentence_data = corpus[st.session_state.current_index]
     sentence_id = current_sentence_data["id"]
     korean_sentence = current_sentence_data["korean"]
     correct_answers = current_sentence_data["english"]
@@ -134,82 +388,26 @@ elif st.session_state.sentences:
         # 오른쪽 컬럼 안에 또 컬럼을 만들어 버튼을 오른쪽으로 밀어내는 트릭
         spacer, button_col = st.columns([2, 1]) # [여백, 버튼] 비율
         with button_col:
-            if st.button("🔄 다른 문장"):
-                set_new_random_sentence()
-                st.rerun()
+            st.button("🔄 다른 문장", on_click=set_new_random_sentence)
 
     st.markdown(
         f'<div class="sentence-container"><h5>🇰🇷 {korean_sentence}</h5></div>',
         unsafe_allow_html=True
     )
     
-    audio_to_play = st.session_state.auto_play_audio_html or st.session_state.manual_audio_html
-    if audio_to_play:
-        components.html(audio_to_play, height=0, scrolling=False)
-        st.session_state.auto_play_audio_html = None
-        st.session_state.manual_audio_html = None
-
-    if st.button("🔂 다시 듣기", use_container_width=True):
-        st.session_state.manual_audio_html = autoplay_audio(korean_sentence)
-        st.rerun()
-
-    st.markdown("##### 🎤 말하기")
-    
-    audio_uploader = st.audio_input(
-        "마이크 아이콘을 누르고 말한 뒤, 정지 버튼을 누르세요:", 
-        key=st.session_state.audio_key
-    )
-
-    if audio_uploader:
-        st.info("음성 분석 중...")
-        
-        audio_bytes_data = audio_uploader.getvalue()
-        
-        recognized_text = process_audio_for_stt(audio_bytes_data)
-
-        if recognized_text and "Error" not in recognized_text:
-            st.session_state.user_answer = recognized_text
-            st.session_state.check_result = compare_answers(recognized_text, correct_answers)
-        else:
-            st.warning("음성을 인식하지 못했거나 처리 중 오류가 발생했습니다.")
-            st.session_state.user_answer = "" 
-            st.session_state.check_result = None
-        
-        st.session_state.audio_key = str(uuid.uuid4())
-        st.rerun() 
-
-    if st.session_state.user_answer:
-        st.markdown("---")
-        st.markdown("##### 💬 Your Answer")
-        st.write(f"##### **“{st.session_state.user_answer}”**")
-
-        if st.session_state.check_result:
-            similarity, best_match = st.session_state.check_result
-            similarity_percentage = similarity * 100
-            st.markdown(f"> **유사도: {similarity_percentage:.1f}%**")
+    # 아래 두 영역은 fragment라서, 그 안의 버튼/녹음은 스크립트 전체가 아니라 해당 영역만 다시 실행함
+    sentence_audio_player()
+    answer_area(sentence_id, correct_answers, corpus.cleaned_english_of(st.session_state.current_index))
 
-            if similarity_percentage >= 90:
-                st.success("🎉 거의 완벽해요!")
-                # 이 아래에 Corrected Answer를 추가
-                st.markdown("##### ✏️ Corrected Answer")
-            elif similarity_percentage >= 70: # 70% 이상 90% 미만일 때
-                st.info("👍 아쉽네요! 그래도 계속 도전해보세요.")
-                st.markdown("##### ✏️ Corrected Answer")
-                highlighted_answer = get_highlighted_diff_html(st.session_state.user_answer, best_match)
-                st.markdown(f"<div class='highlighted-diff'>{highlighted_answer}</div>", unsafe_allow_html=True)
-            else: # 70% 미만일 때
-                st.warning("🤔 조금 아쉬워요. 다시 한번 도전해보세요!")
+else:
+    st.warning("연습할 문장이 없습니다. 'sentences.json' 파일을 확인해주세요.")
 
-    # '모든 답안 보기/숨기기' 버튼은 사용자 답변 평가 후에 위치
-    button_text = "🙈 답안 숨기기" if st.session_state.show_all_correct_options else "📝 모든 답안 보기"
-    if st.button(button_text, key="toggle_all_answers", use_container_width=True):
-        st.session_state.show_all_correct_options = not st.session_state.show_all_correct_options
-        st.rerun()
+if corpus:
+    st.divider()
+    with st.expander("🗣️ 자유 말하기 — 말한 문장과 가장 비슷한 문장 찾기"):
+        free_speech_area()
 
-    if st.session_state.show_all_correct_options:
-        st.markdown("##### 📝 Correct Answer(s) ")
-        answer_html = "".join([f"<li>🇬🇧 {ans}</li>" for ans in correct_answers])
-        st.markdown(f"<div class='info-list-container'><ul>{answer_html}</ul></div>", unsafe_allow_html=True)
+if tracer.enabled and st.query_params.get("debug") == "1":
+    render_debug_panel()
 
-else:
-    st.warning("연습할 문장이 없습니다. 'sentences.json' 파일을 확인해주세요.")
\ No newline at end of file
+tracer.end_interaction()
\ No newline at end of file
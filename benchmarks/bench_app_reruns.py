@@ -0,0 +1,171 @@
+"""
+앱의 대표적인 상호작용마다 스크립트가 몇 번 실행되고(전체/fragment), 브라우저로 몇 바이트가
+전송되는지 Streamlit AppTest로 셉니다. 네트워크 없이 가짜 GitHub 서버와 가짜 음성 합성기를 씁니다.
+
+AppTest는 fragment 안의 위젯을 눌러도 스크립트 전체를 다시 실행하므로, 실제 브라우저처럼
+그 위젯이 속한 fragment만 다시 실행하도록 요청을 바꿔서 보냅니다.
+st.audio_input은 AppTest로 조작할 수 없어 녹음 제출 경로는 측정에서 빠집니다.
+
+    python -m benchmarks.bench_app_reruns
+    python -m benchmarks.bench_app_reruns --compare-rev HEAD~1   # 이전 버전의 app.py와 비교
+"""
+import argparse
+import dataclasses
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RunCounter:
+    """ScriptRunner를 감싸 스크립트 실행 횟수와 전송된 ForwardMsg 바이트 수를 셉니다."""
+
+    def __init__(self):
+        self.full_runs = 0
+        self.fragment_runs = 0
+        self.bytes_sent = 0
+        self.widget_fragments = {}
+        self.next_fragment_id = None
+        self._originals = []
+
+    def install(self):
+        from streamlit.runtime.scriptrunner.script_runner import ScriptRunner, ScriptRunnerEvent
+        from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+        from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+        counter = self
+        init = LocalScriptRunner.__init__
+        enqueue = ScriptRunner._enqueue_forward_msg
+        request_rerun = LocalScriptRunner.request_rerun
+
+        def on_event(sender, event, **kwargs):
+            # st.rerun()으로 이어지는 실행도 SCRIPT_STARTED를 한 번씩 보냄
+            if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                if kwargs.get("fragment_ids_this_run"):
+                    counter.fragment_runs += 1
+                else:
+                    counter.full_runs += 1
+
+        def counting_init(runner, *args, **kwargs):
+            init(runner, *args, **kwargs)
+            runner.on_event.connect(on_event, weak=False)
+
+        def counting_enqueue(runner, msg):
+            counter.bytes_sent += msg.ByteSize()
+            if msg.WhichOneof("type") == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                widget = getattr(element, element.WhichOneof("type"))
+                widget_id = getattr(widget, "id", "")
+                if widget_id:
+                    counter.widget_fragments[widget_id] = msg.delta.fragment_id
+            return enqueue(runner, msg)
+
+        def scoped_request_rerun(runner, rerun_data):
+            # 브라우저는 fragment 안의 위젯이 바뀌면 그 fragment만 다시 실행해 달라고 요청함
+            if counter.next_fragment_id:
+                # AppTest는 실행마다 새 ScriptRunner를 만들고 전체 실행 요청을 먼저 넣어 두므로, 그 요청을 비움
+                runner._requests = ScriptRequests()
+                rerun_data = dataclasses.replace(rerun_data, fragment_id=counter.next_fragment_id)
+                counter.next_fragment_id = None
+            return request_rerun(runner, rerun_data)
+
+        self._originals = [(LocalScriptRunner, "__init__", init), (ScriptRunner, "_enqueue_forward_msg", enqueue),
+                           (LocalScriptRunner, "request_rerun", request_rerun)]
+        LocalScriptRunner.__init__ = counting_init
+        ScriptRunner._enqueue_forward_msg = counting_enqueue
+        LocalScriptRunner.request_rerun = scoped_request_rerun
+
+    def uninstall(self):
+        for owner, name, original in self._originals:
+            setattr(owner, name, original)
+        self._originals = []
+
+    def snapshot(self):
+        return self.full_runs, self.fragment_runs, self.bytes_sent
+
+
+def measure(app_path: str, counter: RunCounter):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=30)
+    results = []
+
+    def interact(name, action):
+        before = counter.snapshot()
+        scoped = action()
+        after = counter.snapshot()
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+        results.append((name, *(b - a for a, b in zip(before, after))))
+        if scoped:
+            # AppTest는 fragment만 실행하면 그 fragment의 요소만 남으므로, 다음 조작을 위해
+            # 세어지지 않는 전체 실행으로 화면을 다시 만듦 (위젯 값이 그대로라 콜백은 불리지 않음)
+            at.run()
+
+    def click(predicate):
+        def action():
+            button = next(b for b in at.button if predicate(b.label))
+            counter.next_fragment_id = counter.widget_fragments.get(button.id) or None
+            scoped = counter.next_fragment_id is not None
+            button.click().run()
+            return scoped
+        return action
+
+    interact("initial load", at.run)
+    categories = [b.label for b in at.button if b.label not in ("🔄 다른 문장", "🔂 다시 듣기")
+                  and "답안" not in b.label]
+    interact("category", click(lambda label: label == categories[-1]))
+    interact("next sentence", click(lambda label: "다른 문장" in label))
+    interact("replay audio", click(lambda label: "다시 듣기" in label))
+    interact("show answers", click(lambda label: "답안" in label))
+    interact("hide answers", click(lambda label: "답안" in label))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--compare-rev", help="이 git 리비전의 app.py도 같은 방법으로 측정")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    cache_dir = tempfile.mkdtemp(prefix="bench_app_")
+    os.environ.setdefault("LEARN_SPEAKING_TTS", "fake")
+    os.environ.setdefault("LEARN_SPEAKING_TTS_DIR", os.path.join(cache_dir, "tts"))
+
+    import core.data_loader as data_loader
+    from tools.fake_github import FakeGitHubServer, make_sentence_files
+
+    server = FakeGitHubServer(make_sentence_files(3, 20)).start()
+    data_loader.get_default_source = lambda: data_loader.GitHubSource(server.api_url)
+    data_loader.DEFAULT_SNAPSHOT_PATH = os.path.join(cache_dir, "snapshot.json")
+
+    apps = [("current", args.app)]
+    if args.compare_rev:
+        old_source = subprocess.run(["git", "show", f"{args.compare_rev}:app.py"], cwd=ROOT, check=True,
+                                    capture_output=True).stdout
+        old_path = os.path.join(cache_dir, "app_old.py")
+        with open(old_path, "wb") as f:
+            f.write(old_source)
+        apps.insert(0, (args.compare_rev, old_path))
+
+    counter = RunCounter()
+    counter.install()
+    sys.path.insert(0, ROOT)
+    try:
+        for label, path in apps:
+            print(f"== {label} ({os.path.relpath(path, ROOT) if path.startswith(ROOT) else path})")
+            print(f"{'interaction':>14} {'full runs':>10} {'fragment':>9} {'bytes':>9}")
+            totals = [0, 0, 0]
+            for name, full, fragment, sent in measure(path, counter):
+                print(f"{name:>14} {full:>10} {fragment:>9} {sent:>9}")
+                totals = [totals[0] + full, totals[1] + fragment, totals[2] + sent]
+            print(f"{'total':>14} {totals[0]:>10} {totals[1]:>9} {totals[2]:>9}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+합성 WAV 모음으로 음성 인식 전처리(core.audio_preprocess)의 효과와 비용을 측정합니다.
+
+브라우저 녹음과 비슷하게 48kHz/44.1kHz 스테레오 16비트에, 앞뒤로 무음(약한 잡음)이 붙은
+말소리 흉내(변조된 톤 + 잡음 구간)를 만들고, 인식기로 보내는 바이트 수와 단계별 시간을 보고합니다.
+
+    python -m benchmarks.bench_audio_preprocess --count 50
+"""
+import argparse
+import io
+import statistics
+import wave
+
+import numpy as np
+
+from core.audio_preprocess import preprocess_audio
+
+
+def make_recording(rng: np.random.Generator, rate: int, channels: int) -> bytes:
+    lead, speech, tail = rng.uniform(0.5, 1.5), rng.uniform(1.0, 3.0), rng.uniform(0.5, 2.0)
+    t = np.arange(int(speech * rate)) / rate
+    # 음절처럼 4Hz로 크기가 변하는 120~250Hz 기본음 + 배음 + 잡음
+    f0 = rng.uniform(120, 250)
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) ** 2
+    voice = envelope * (np.sin(2 * np.pi * f0 * t) + 0.5 * np.sin(2 * np.pi * 2 * f0 * t)
+                        + 0.1 * rng.standard_normal(t.size))
+    signal = np.concatenate([
+        0.002 * rng.standard_normal(int(lead * rate)),
+        0.3 * voice,
+        0.002 * rng.standard_normal(int(tail * rate)),
+    ])
+    frames = np.repeat(signal[:, None], channels, axis=1)
+    pcm = (np.clip(frames, -1, 1) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    recordings = [make_recording(rng, rate=int(rng.choice([44100, 48000])), channels=2) for _ in range(args.count)]
+
+    results = [preprocess_audio(audio) for audio in recordings]
+    assert all(result.has_speech for result in results)
+
+    bytes_in = sum(len(audio) for audio in recordings)
+    bytes_out = sum(result.output_bytes for result in results)
+    print(f"{args.count} recordings: {bytes_in / 1e6:.1f}MB in -> {bytes_out / 1e6:.2f}MB sent "
+          f"({bytes_out / bytes_in:.1%} of original)")
+
+    print(f"{'stage':>10} {'mean(ms)':>9} {'p95(ms)':>9}")
+    for stage in results[0].timings:
+        values = sorted(result.timings[stage] * 1000 for result in results)
+        p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+        print(f"{stage:>10} {statistics.mean(values):>9.2f} {p95:>9.2f}")
+    totals = [sum(result.timings.values()) * 1000 for result in results]
+    print(f"{'total':>10} {statistics.mean(totals):>9.2f} {sorted(totals)[int(0.95 * (len(totals) - 1))]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
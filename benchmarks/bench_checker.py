@@ -0,0 +1,103 @@
+"""
+채점 엔진(core.checker)을 최적화 이전의 compare_answers와 비교합니다.
+
+1) 문장 하나씩 채점: 발화 하나를 그 문장의 정답 2~4개와 비교 (앱의 실제 경로)
+2) 배치 채점: 발화 여러 개를 큰 정답 목록과 한꺼번에 비교 (재생 도구, 자유 말하기 등)
+
+두 경우 모두 새 엔진의 결과가 이전 함수와 완전히 같은지 먼저 확인합니다.
+
+    python -m benchmarks.bench_checker --sentences 2000 --batch-utterances 100 --batch-answers 1000
+"""
+import argparse
+import difflib
+import random
+import re
+import time
+from typing import List, Tuple
+
+from core.checker import _clean_text, compare_answers, compare_answers_batch
+
+WORDS = ("i", "you", "we", "they", "want", "need", "to", "go", "the", "a", "store", "home", "today",
+         "tomorrow", "can't", "won't", "really", "coffee", "meeting", "late", "early", "please", "help",
+         "me", "with", "this", "that", "project", "is", "was", "it's", "nice", "weather", "again")
+
+
+def legacy_clean_text(text: str) -> str:
+    text = text.lower()
+    text = re.sub(r"[^\w\s']", "", text)
+    return text.strip()
+
+
+def legacy_compare_answers(user_answer: str, correct_answers: List[str]) -> Tuple[float, str]:
+    """최적화 이전의 core.checker.compare_answers"""
+    cleaned_user_answer = legacy_clean_text(user_answer)
+    max_sim, best_match = 0.0, ""
+    for correct in correct_answers:
+        cleaned_correct_answer = legacy_clean_text(correct)
+        sim = difflib.SequenceMatcher(None, cleaned_user_answer, cleaned_correct_answer).ratio()
+        if sim > max_sim:
+            max_sim, best_match = sim, correct
+    return max_sim, best_match
+
+
+def make_sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(4, 14))]
+    return " ".join(words).capitalize() + rng.choice((".", "?", "!"))
+
+
+def perturb(rng: random.Random, sentence: str) -> str:
+    """STT 결과처럼 단어를 빠뜨리거나 바꾸거나 끼워 넣습니다."""
+    words = sentence.split()
+    for _ in range(rng.randint(0, 3)):
+        op = rng.random()
+        position = rng.randrange(len(words) + 1)
+        if op < 0.33 and len(words) > 1:
+            del words[min(position, len(words) - 1)]
+        elif op < 0.66:
+            words[min(position, len(words) - 1)] = rng.choice(WORDS)
+        else:
+            words.insert(position, rng.choice(WORDS))
+    return " ".join(words)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--batch-utterances", type=int, default=100)
+    parser.add_argument("--batch-answers", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    # 1) 문장 하나씩 채점
+    sentences = [[make_sentence(rng) for _ in range(rng.randint(2, 4))] for _ in range(args.sentences)]
+    cleaned = [tuple(_clean_text(answer) for answer in answers) for answers in sentences]
+    utterances = [perturb(rng, rng.choice(answers)) for answers in sentences]
+
+    legacy, legacy_time = timed(lambda: [legacy_compare_answers(u, a) for u, a in zip(utterances, sentences)])
+    fast, fast_time = timed(lambda: [compare_answers(u, a, c) for u, a, c in zip(utterances, sentences, cleaned)])
+    assert legacy == fast, "per-sentence results differ"
+    print(f"per-sentence: {args.sentences} utterances, "
+          f"legacy {legacy_time * 1e6 / args.sentences:.1f}us, engine {fast_time * 1e6 / args.sentences:.1f}us "
+          f"({legacy_time / fast_time:.1f}x)")
+
+    # 2) 배치 채점
+    answers = [make_sentence(rng) for _ in range(args.batch_answers)]
+    batch_utterances = [perturb(rng, rng.choice(answers)) for _ in range(args.batch_utterances)]
+    legacy, legacy_time = timed(lambda: [legacy_compare_answers(u, answers) for u in batch_utterances])
+    fast, fast_time = timed(compare_answers_batch, batch_utterances, answers)
+    assert legacy == fast, "batch results differ"
+    pairs = args.batch_utterances * args.batch_answers
+    print(f"batch: {args.batch_utterances} x {args.batch_answers} pairs, "
+          f"legacy {legacy_time:.3f}s, engine {fast_time:.3f}s ({legacy_time / fast_time:.1f}x, "
+          f"{pairs / fast_time:,.0f} pairs/s)")
+
+
+if __name__ == "__main__":
+    main()
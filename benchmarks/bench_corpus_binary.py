@@ -0,0 +1,117 @@
+"""
+문장 수(기본 1만/10만/100만)에 따라 JSON 파일에서 SentenceCorpus를 만드는 기존 시작 경로와,
+컴파일된 바이너리 문장 모음(MappedCorpus)을 여는 경로의 시작 시간과 RSS 증가량을 비교합니다.
+
+- json:   폴더의 JSON 파일을 모두 읽어 SentenceCorpus.from_records (GitHub 다운로드 시간은 제외)
+- binary: tools.compile_corpus로 미리 만든 파일을 MappedCorpus로 열기
+
+시작 직후에 무작위 문장 1,000개의 한국어/정답을 읽는 시간도 함께 잽니다 (first-access).
+각 측정은 깨끗한 하위 프로세스에서 따로 실행합니다.
+
+    python -m benchmarks.bench_corpus_binary --sentences 10000 100000 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_corpus_memory import iter_records, rss_mb
+
+# 실제 데이터처럼 여러 파일로 나눠 저장할 때 파일 하나의 문장 수
+SENTENCES_PER_FILE = 10000
+ACCESS_SAMPLES = 1000
+
+
+def write_json_files(directory: str, count: int) -> None:
+    os.makedirs(directory, exist_ok=True)
+    chunk = []
+
+    def flush(number):
+        with open(os.path.join(directory, f"sentences_{number:04d}.json"), "w", encoding="utf-8") as f:
+            json.dump(chunk, f, ensure_ascii=False)
+        chunk.clear()
+
+    for i, record in enumerate(iter_records(count)):
+        chunk.append(record)
+        if len(chunk) == SENTENCES_PER_FILE:
+            flush(i // SENTENCES_PER_FILE)
+    if chunk:
+        flush(count // SENTENCES_PER_FILE)
+
+
+def worker(mode: str, path: str) -> dict:
+    # 모듈 import(streamlit 등)에 드는 메모리는 기준선에 포함시킴
+    from core.binary_corpus import MappedCorpus
+    from core.corpus import SentenceCorpus
+    from core.data_loader import LocalDirectorySource, fetch_sentences
+
+    gc.collect()
+    baseline = rss_mb()
+    start = time.perf_counter()
+    if mode == "json":
+        corpus = SentenceCorpus.from_records(fetch_sentences(LocalDirectorySource(path), max_workers=1))
+    else:
+        corpus = MappedCorpus(path)
+    startup = time.perf_counter() - start
+    gc.collect()
+    after_startup = rss_mb() - baseline
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(ACCESS_SAMPLES):
+        index = rng.randrange(len(corpus))
+        corpus.korean_of(index)
+        corpus.english_of(index)
+        corpus.cleaned_english_of(index)
+    access = time.perf_counter() - start
+    return {"mode": mode, "sentences": len(corpus), "startup_ms": startup * 1000,
+            "access_ms": access * 1000, "rss_mb": after_startup}
+
+
+def run_in_subprocess(mode: str, path: str) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.bench_corpus_binary", "--worker", mode, path],
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(*args.worker)))
+        return
+
+    from core.binary_corpus import write_binary_corpus
+    from tools.compile_corpus import iter_records as iter_file_records
+
+    print(f"{'sentences':>9} {'mode':>6} {'size(MB)':>9} {'startup(ms)':>12} {'access(ms)':>11} {'RSS(MB)':>8}")
+    for count in args.sentences:
+        work_dir = tempfile.mkdtemp(prefix="bench_corpus_binary_")
+        try:
+            json_dir = os.path.join(work_dir, "json")
+            binary_path = os.path.join(work_dir, "corpus.bin")
+            write_json_files(json_dir, count)
+            write_binary_corpus(iter_file_records([json_dir]), binary_path)
+            json_size = sum(os.path.getsize(os.path.join(json_dir, name)) for name in os.listdir(json_dir))
+            for mode, path, size in (("json", json_dir, json_size),
+                                     ("binary", binary_path, os.path.getsize(binary_path))):
+                result = run_in_subprocess(mode, path)
+                print(f"{count:>9} {mode:>6} {size / 1e6:>9.1f} {result['startup_ms']:>12.1f} "
+                      f"{result['access_ms']:>11.2f} {result['rss_mb']:>8.1f}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
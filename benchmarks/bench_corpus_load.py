@@ -0,0 +1,72 @@
+"""
+캐시가 비어 있을 때의 문장 데이터 로드 시간을 파일 수별로 측정합니다.
+
+기존 방식(파일마다 새 연결로 순차 requests.get)과
+core.data_loader.fetch_sentences(공유 Session + 워커 풀)를 로컬 가짜 GitHub 서버에서 비교합니다.
+
+    python -m benchmarks.bench_corpus_load --latency 0.03 --counts 5 20 50 100
+"""
+import argparse
+import time
+
+import requests
+
+from core.data_loader import GitHubSource, fetch_sentences
+from tools.fake_github import FakeGitHubServer, make_sentence_files
+
+
+def legacy_load(api_url: str) -> list:
+    """최적화 이전 load_data_from_github의 네트워크 패턴을 그대로 재현"""
+    response = requests.get(api_url)
+    response.raise_for_status()
+    all_sentences = []
+    for file_info in response.json():
+        if file_info['type'] == 'file' and file_info['name'].endswith('.json'):
+            file_response = requests.get(file_info['download_url'])
+            file_response.raise_for_status()
+            file_response.encoding = 'utf-8'
+            all_sentences.extend(file_response.json())
+    for i, sentence in enumerate(all_sentences):
+        sentence['id'] = i + 1
+    return all_sentences
+
+
+def pooled_load(api_url: str, max_workers: int) -> list:
+    source = GitHubSource(api_url, max_workers=max_workers)
+    try:
+        return fetch_sentences(source, max_workers=max_workers)
+    finally:
+        source.close()
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[5, 20, 50, 100])
+    parser.add_argument("--latency", type=float, default=0.03, help="요청당 인위적 지연(초)")
+    parser.add_argument("--sentences-per-file", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"latency={args.latency * 1000:.0f}ms, workers={args.workers}, best of {args.repeat}")
+    print(f"{'files':>6} {'legacy(s)':>10} {'pooled(s)':>10} {'speedup':>8}")
+    for count in args.counts:
+        files = make_sentence_files(count, args.sentences_per_file)
+        with FakeGitHubServer(files, latency=args.latency) as server:
+            assert legacy_load(server.api_url) == pooled_load(server.api_url, args.workers)
+            legacy = best_of(args.repeat, legacy_load, server.api_url)
+            pooled = best_of(args.repeat, pooled_load, server.api_url, args.workers)
+        print(f"{count:>6} {legacy:>10.3f} {pooled:>10.3f} {legacy / pooled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+동시 세션 수에 따른 프로세스 RSS를 측정합니다 (기본 50,000 문장).
+
+- legacy: 세션마다 st.cache_data가 돌려주는 복사본(피클 왕복)을 session_state에 저장하던 방식
+- shared: 프로세스에 SentenceCorpus 하나만 두고 세션은 현재 문장의 위치만 저장하는 방식
+
+각 측정은 깨끗한 하위 프로세스에서 따로 실행합니다.
+legacy 500 세션은 수십 GB가 필요할 수 있어 --full을 주지 않으면 50 세션 결과로부터 추정합니다.
+
+    python -m benchmarks.bench_corpus_memory --sentences 50000 --sessions 1 50 500
+"""
+import argparse
+import gc
+import json
+import pickle
+import subprocess
+import sys
+
+from core.corpus import SentenceCorpus
+
+
+def iter_records(count: int):
+    categories = ("기초 회화 & 미드", "비즈니스", "여행", "일상")
+    return (
+        {
+            "id": i + 1,
+            "category": categories[i % len(categories)],
+            "korean": f"이것은 {i}번째 연습 문장입니다. 오늘 날씨가 정말 좋네요.",
+            "english": [f"This is practice sentence number {i}. The weather is really nice today.",
+                        f"Sentence {i}: what a lovely day it is today."],
+        }
+        for i in range(count)
+    )
+
+
+def rss_mb() -> float:
+    """현재 프로세스의 RSS(MB). Linux에서는 /proc을, 그 밖에서는 최대 RSS를 사용합니다."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def worker(mode: str, sessions: int, sentences: int) -> dict:
+    gc.collect()
+    baseline = rss_mb()
+    session_states = []
+
+    if mode == "legacy":
+        records = list(iter_records(sentences))
+        # st.cache_data는 호출마다 반환값을 피클에서 새로 복원함
+        cached = pickle.dumps(records)
+        del records
+        for _ in range(sessions):
+            session_states.append({"sentences": pickle.loads(cached), "current_index": 0})
+        del cached
+    else:
+        corpus = SentenceCorpus.from_records(iter_records(sentences))
+        for i in range(sessions):
+            session_states.append({"current_index": i % len(corpus)})
+
+    gc.collect()
+    return {"mode": mode, "sessions": sessions, "rss_mb": rss_mb() - baseline}
+
+
+def run_in_subprocess(mode: str, sessions: int, sentences: int) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.bench_corpus_memory",
+         "--worker", mode, str(sessions), "--sentences", str(sentences)],
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=50000)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--full", action="store_true", help="legacy 방식도 모든 세션 수를 실제로 측정")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "SESSIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker[0], int(args.worker[1]), args.sentences)))
+        return
+
+    print(f"corpus: {args.sentences} sentences (RSS growth over interpreter baseline)")
+    print(f"{'sessions':>8} {'legacy(MB)':>12} {'shared(MB)':>12}")
+    legacy_per_session = None
+    for sessions in args.sessions:
+        if sessions <= 50 or args.full:
+            legacy_result = run_in_subprocess("legacy", sessions, args.sentences)
+            legacy = f"{legacy_result['rss_mb']:.1f}"
+            if sessions > 1:
+                legacy_per_session = legacy_result['rss_mb'] / sessions
+        elif legacy_per_session is not None:
+            legacy = f"~{legacy_per_session * sessions:.0f} (est.)"
+        else:
+            legacy = "skipped"
+        shared = run_in_subprocess("shared", sessions, args.sentences)["rss_mb"]
+        print(f"{sessions:>8} {legacy:>12} {shared:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
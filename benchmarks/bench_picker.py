@@ -0,0 +1,66 @@
+"""
+문장 모음 크기별 "다음 문장 고르기" 지연 시간을 측정합니다.
+
+- legacy: 클릭마다 전체 문장을 훑어 possible_indices를 만들고 random.choice를 반복하던 방식
+- picker: 미리 만든 카테고리 색인 + 세션별 셔플 가방(core.picker.SentencePicker)
+
+    python -m benchmarks.bench_picker --sizes 1000 10000 100000 500000
+"""
+import argparse
+import random
+import time
+
+from core.corpus import SentenceCorpus
+from core.picker import SentencePicker
+
+CATEGORIES = ("기초 회화 & 미드", "비즈니스", "여행", "일상")
+
+
+def make_records(count: int):
+    return (
+        {"id": i + 1, "category": CATEGORIES[i % len(CATEGORIES)], "korean": f"문장 {i}", "english": [f"Sentence {i}."]}
+        for i in range(count)
+    )
+
+
+def legacy_pick(sentences: list, category: str, current_idx: int) -> int:
+    possible_indices = [i for i, s in enumerate(sentences) if s.get('category') == category]
+    new_idx = random.choice(possible_indices)
+    if len(possible_indices) > 1 and current_idx in possible_indices:
+        while new_idx == current_idx:
+            new_idx = random.choice(possible_indices)
+    return new_idx
+
+
+def time_per_call(func, picks: int) -> float:
+    start = time.perf_counter()
+    for _ in range(picks):
+        func()
+    return (time.perf_counter() - start) / picks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 500000])
+    parser.add_argument("--picks", type=int, default=200, help="legacy 측정 횟수 (picker는 100배)")
+    args = parser.parse_args()
+
+    print(f"{'sentences':>10} {'legacy(us)':>12} {'picker(us)':>12} {'speedup':>9}")
+    for size in args.sizes:
+        sentences = list(make_records(size))
+        corpus = SentenceCorpus.from_records(sentences)
+        category = CATEGORIES[0]
+
+        state = {"current": -1}
+
+        def run_legacy():
+            state["current"] = legacy_pick(sentences, category, state["current"])
+
+        picker = SentencePicker()
+        legacy = time_per_call(run_legacy, args.picks)
+        fast = time_per_call(lambda: picker.next_index(corpus, category), args.picks * 100)
+        print(f"{size:>10} {legacy * 1e6:>12.1f} {fast * 1e6:>12.2f} {legacy / fast:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+복습 스케줄러와 답변 기록 저장소의 요청 경로 비용을 측정합니다.
+
+1) 다음 문장 고르기: 사용자가 N개(기본 10만) 문장에 답한 상태에서 next_index + record 한 번의 시간.
+   힙(ReviewScheduler)과, 모든 상태를 훑어 가장 이른 복습 시각을 찾는 방식(linear)을 비교합니다.
+2) 답변 기록: 요청 하나가 기록에 쓰는 시간. 대기열에 넣기만 하는 write-behind(AttemptStore)와,
+   답변마다 INSERT + COMMIT(synchronous=FULL)하는 방식(sync)을 비교합니다.
+
+    python -m benchmarks.bench_scheduler --sentences 100000 --attempts 2000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from core.attempts import Attempt, AttemptStore
+from core.corpus import SentenceCorpus
+from core.picker import SentencePicker
+from core.scheduler import ReviewScheduler
+
+
+def make_corpus(count: int) -> SentenceCorpus:
+    return SentenceCorpus.from_records(
+        {"id": i + 1, "category": "기초 회화", "korean": f"문장 {i}", "english": [f"sentence {i}"]}
+        for i in range(count)
+    )
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_selection(corpus: SentenceCorpus, steps: int) -> None:
+    rng = random.Random(0)
+    scheduler = ReviewScheduler()
+    schedule = scheduler.schedule_for("bench", corpus)
+    now = 1_000_000.0
+    # 모든 문장에 한 번씩 답해 둠 (절반은 틀려서 곧 다시 복습할 차례가 됨)
+    for index in range(len(corpus)):
+        schedule.record(corpus.key_of(index), "기초 회화", rng.choice((0.5, 0.95)), now - rng.random() * 3600)
+
+    def linear_next(current: int) -> int:
+        best = min((state for state in schedule._states.values() if state.key != current),
+                   key=lambda state: state.due)
+        return corpus.index_of_key(best.key)
+
+    picker = SentencePicker(rng)
+    for name in ("heap", "linear"):
+        samples = []
+        current = -1
+        for step in range(steps):
+            start = time.perf_counter()
+            if name == "heap":
+                current = scheduler.next_index("bench", corpus, "기초 회화", picker, exclude=current, now=now + step)
+            else:
+                current = linear_next(corpus.key_of(current) if current != -1 else None)
+            scheduler.record("bench", corpus, current, rng.random(), now=now + step)
+            samples.append(time.perf_counter() - start)
+            if name == "linear" and step >= 200:
+                break
+        print(f"  {name:>7}: mean {sum(samples) / len(samples) * 1e6:9.1f} us  "
+              f"p99 {percentile(samples, 0.99) * 1e6:9.1f} us  ({len(samples)} picks)")
+
+
+def bench_store(attempts: int) -> None:
+    rng = random.Random(0)
+    records = [Attempt(f"user{rng.randrange(50)}", rng.getrandbits(63), rng.random(), float(i))
+               for i in range(attempts)]
+    with tempfile.TemporaryDirectory() as directory:
+        db = sqlite3.connect(os.path.join(directory, "sync.sqlite3"), isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.execute("CREATE TABLE attempts (user_id TEXT, sentence_key INTEGER, score REAL, answered_at REAL)")
+        samples = []
+        for attempt in records:
+            start = time.perf_counter()
+            db.execute("INSERT INTO attempts VALUES (?, ?, ?, ?)", attempt)
+            samples.append(time.perf_counter() - start)
+        db.close()
+        print(f"  {'sync':>12}: mean {sum(samples) / len(samples) * 1e6:9.1f} us  "
+              f"p99 {percentile(samples, 0.99) * 1e6:9.1f} us")
+
+        store = AttemptStore(os.path.join(directory, "batched.sqlite3"))
+        samples = []
+        for attempt in records:
+            start = time.perf_counter()
+            store.record(attempt)
+            samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        store.close()
+        drain = time.perf_counter() - start
+        print(f"  {'write-behind':>12}: mean {sum(samples) / len(samples) * 1e6:9.1f} us  "
+              f"p99 {percentile(samples, 0.99) * 1e6:9.1f} us  "
+              f"({store.stats['batches']} batches, final drain {drain * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=100000)
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--attempts", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.sentences)
+    print(f"next sentence + record, {args.sentences} reviewed sentences")
+    bench_selection(corpus, args.steps)
+    print(f"recording {args.attempts} attempts (request-path latency)")
+    bench_store(args.attempts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+자유 말하기 검색(core.search.TrigramIndex)의 질의 지연을 문장 수에 따라 측정하고,
+모든 정답을 기존 채점기(_best_candidate)로 훑는 방식(brute)과 비교합니다.
+
+질의는 무작위 정답을 STT 결과처럼 흐트린 문장입니다. recall@1은 색인 검색의 1위 점수가
+전체를 훑어 찾은 최고 점수와 같은 비율입니다. brute는 느리므로 --brute-queries개만 잽니다.
+
+    python -m benchmarks.bench_search --sentences 1000 10000 100000
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_checker import WORDS, perturb
+from core.checker import _best_candidate, _clean_text
+from core.corpus import SentenceCorpus
+from core.search import TrigramIndex
+
+# 실제 문장처럼 어휘가 다양하도록 bench_checker의 단어에 만든 단어를 더함
+SYLLABLES = ("ba", "co", "de", "fi", "ga", "ho", "ki", "lu", "ma", "ne", "or", "pa", "qui", "ro", "su",
+             "ta", "ul", "ve", "wi", "xo", "ya", "ze", "ing", "tion", "er", "ly")
+
+
+def make_vocabulary(rng: random.Random, size: int = 3000):
+    words = set(WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))))
+    return sorted(words)
+
+
+def make_corpus(rng: random.Random, count: int, vocabulary) -> SentenceCorpus:
+    def sentence():
+        words = [rng.choice(WORDS) if rng.random() < 0.4 else rng.choice(vocabulary)
+                 for _ in range(rng.randint(4, 14))]
+        return " ".join(words).capitalize() + rng.choice((".", "?", "!"))
+
+    return SentenceCorpus.from_records(
+        {"id": i + 1, "category": "기초 회화", "korean": f"문장 {i}",
+         "english": [sentence() for _ in range(rng.randint(1, 3))]}
+        for i in range(count)
+    )
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--brute-queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng)
+    print(f"{'sentences':>9} {'build(s)':>9} {'index(MB)':>10} {'index p50/p95 (ms)':>19} "
+          f"{'brute mean (ms)':>16} {'speedup':>8} {'recall@1':>9}")
+    for count in args.sentences:
+        corpus = make_corpus(rng, count, vocabulary)
+        start = time.perf_counter()
+        index = TrigramIndex(corpus)
+        build = time.perf_counter() - start
+        all_cleaned = [answer for i in range(len(corpus)) for answer in corpus.cleaned_english_of(i)]
+
+        queries = []
+        for _ in range(args.queries):
+            position = rng.randrange(len(corpus))
+            queries.append(perturb(rng, rng.choice(corpus.english_of(position))))
+
+        samples, top_scores = [], []
+        for query in queries:
+            start = time.perf_counter()
+            hits = index.search(query)
+            samples.append(time.perf_counter() - start)
+            top_scores.append(hits[0].score if hits else 0.0)
+
+        brute_samples, agree = [], 0
+        for query, top_score in list(zip(queries, top_scores))[:args.brute_queries]:
+            start = time.perf_counter()
+            best, _ = _best_candidate(_clean_text(query), all_cleaned)
+            brute_samples.append(time.perf_counter() - start)
+            agree += abs(best - top_score) < 1e-12
+
+        index_mean = sum(samples) / len(samples)
+        brute_mean = sum(brute_samples) / len(brute_samples)
+        print(f"{count:>9} {build:>9.2f} {index.nbytes / 1e6:>10.1f} "
+              f"{percentile(samples, 0.5) * 1000:>9.2f}/{percentile(samples, 0.95) * 1000:<9.2f} "
+              f"{brute_mean * 1000:>16.1f} {brute_mean / index_mean:>7.0f}x {agree / len(brute_samples):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
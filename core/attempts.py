@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple
+
+# 답변 기록을 저장하는 SQLite 파일 위치
+DEFAULT_DB_PATH = os.environ.get(
+    "LEARN_SPEAKING_ATTEMPTS_DB",
+    os.path.join(os.environ.get("LEARN_SPEAKING_CACHE_DIR", ".cache"), "attempts.sqlite3"),
+)
+# 모아서 쓰는 기준: 이만큼 쌓이거나, 마지막 쓰기 후 이만큼(초) 지나면 한 트랜잭션으로 씀
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 1.0
+# 디스크가 멈춰 쓰기가 밀릴 때 메모리에 쌓아 둘 최대 기록 수 (넘치면 가장 오래된 것부터 버림)
+DEFAULT_MAX_PENDING = 50000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    user_id      TEXT    NOT NULL,
+    sentence_key INTEGER NOT NULL,
+    score        REAL    NOT NULL,
+    answered_at  REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_user ON attempts (user_id, answered_at);
+"""
+
+
+class Attempt(NamedTuple):
+    """
+    답변 한 번의 기록. score는 compare_answers의 유사도(0~1)입니다.
+    문장은 위치 순서대로 다시 매겨지는 id 대신 문장 키(core.corpus.sentence_key)로 가리킵니다.
+    """
+    user_id: str
+    sentence_key: int
+    score: float
+    answered_at: float
+
+
+class AttemptStore:
+    """
+    답변 기록을 SQLite에 나중에 모아서 쓰는(write-behind) 저장소.
+
+    - record()는 메모리 대기열에 넣기만 하므로 요청 경로가 디스크 fsync를 기다리지 않습니다.
+    - 백그라운드 스레드가 batch_size개가 쌓이거나 flush_interval초가 지나면 한 트랜잭션으로 씁니다.
+    - history()는 디스크의 기록에 아직 쓰지 않은 기록을 메모리에서 합쳐, 쓰기를 기다리지 않고도
+      방금 기록한 답변까지 포함한 이력을 돌려줍니다.
+    - 프로세스가 갑자기 죽으면 마지막 flush_interval초 동안의 기록은 잃을 수 있습니다.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, max_pending: int = DEFAULT_MAX_PENDING):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.stats = {"recorded": 0, "written": 0, "batches": 0, "dropped": 0, "failed": 0}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 연결 하나를 쓰기 스레드와 읽는 쪽이 잠금으로 나눠 씀
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL에서는 NORMAL이어도 깨지지 않고, 커밋마다 fsync하지 않음
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        if "sentence_key" not in {row[1] for row in self._db.execute("PRAGMA table_info(attempts)")}:
+            # 문장 id로 남긴 예전 기록은 지금 어느 문장인지 알 수 없으므로 읽지 않고 옆으로 치워 둠
+            self._db.execute("DROP INDEX attempts_by_user")
+            self._db.execute("ALTER TABLE attempts RENAME TO attempts_by_sentence_id")
+            self._db.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._pending: List[Attempt] = []
+        # 대기열에서 꺼냈지만 아직 커밋하지 않은 묶음들 (history()가 빠뜨리지 않도록)
+        self._writing: List[List[Attempt]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="attempt-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, attempt: Attempt) -> None:
+        """기록을 대기열에 넣습니다. 디스크에는 백그라운드에서 씁니다."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AttemptStore is closed")
+            self._pending.append(attempt)
+            self.stats["recorded"] += 1
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+                self.stats["dropped"] += overflow
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """대기 중인 기록을 지금 바로 쓰고, 쓴 개수를 돌려줍니다."""
+        with self._cond:
+            batch = self._take_batch()
+        return self._write(batch)
+
+    def history(self, user_id: str) -> List[Attempt]:
+        """
+        사용자의 모든 답변 기록을 답한 순서대로 돌려줍니다. 대기 중인 기록은 쓰지 않고 메모리에서 합칩니다.
+        쓰기 스레드는 커밋할 때 _db_lock을 잡으므로, 잠금을 잡은 동안에는 각 묶음이 디스크나 메모리
+        어느 한쪽에만 있습니다.
+        """
+        with self._db_lock:
+            with self._cond:
+                unwritten = [attempt for batch in (*self._writing, self._pending)
+                             for attempt in batch if attempt.user_id == user_id]
+            rows = self._db.execute(
+                "SELECT user_id, sentence_key, score, answered_at FROM attempts "
+                "WHERE user_id = ? ORDER BY answered_at, rowid", (user_id,)).fetchall()
+        attempts = [Attempt(*row) for row in rows]
+        if unwritten:
+            # 정렬은 안정적이므로 같은 시각이면 기록한 순서가 유지됨
+            attempts = sorted(attempts + unwritten, key=lambda attempt: attempt.answered_at)
+        return attempts
+
+    def count(self) -> int:
+        self.flush()
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM attempts").fetchone()[0]
+
+    def close(self) -> None:
+        """쓰기 스레드를 멈추고 남은 기록을 모두 쓴 뒤 연결을 닫습니다."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def _write_loop(self) -> None:
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self._cond:
+                while not self._closed and len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+                batch = self._take_batch()
+            self._write(batch)
+            deadline = time.monotonic() + self.flush_interval
+
+    def _take_batch(self) -> List[Attempt]:
+        """대기열을 비우고 그 내용을 쓰는 중인 묶음으로 옮깁니다. self._cond를 잡은 채로 부릅니다."""
+        batch, self._pending = self._pending, []
+        if batch:
+            self._writing.append(batch)
+        return batch
+
+    def _write(self, batch: List[Attempt]) -> int:
+        if not batch:
+            return 0
+        try:
+            with self._db_lock:
+                try:
+                    self._db.execute("BEGIN")
+                    try:
+                        self._db.executemany("INSERT INTO attempts VALUES (?, ?, ?, ?)", batch)
+                        self._db.execute("COMMIT")
+                    except BaseException:
+                        self._db.execute("ROLLBACK")
+                        raise
+                finally:
+                    # 커밋했든 실패했든 _db_lock을 놓기 전에 쓰는 중 목록에서 뺌
+                    with self._cond:
+                        # remove()는 내용이 같은 다른 묶음을 뺄 수 있으므로 객체로 찾음
+                        self._writing = [writing for writing in self._writing if writing is not batch]
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+        except sqlite3.Error as e:
+            # 기록을 잃더라도 앱은 계속 동작해야 함
+            print(f"ATTEMPT_STORE: Could not write {len(batch)} attempts; {e}")
+            self.stats["failed"] += len(batch)
+            return 0
+        return len(batch)
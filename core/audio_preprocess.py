@@ -0,0 +1,218 @@
+import io
+import time
+import wave
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# 음성 인식에 넘길 오디오의 샘플레이트 (음성 인식 엔진들이 기본으로 쓰는 값)
+TARGET_SAMPLE_RATE = 16000
+# 무음 판정에 쓰는 프레임 길이(ms)와, 말소리 앞뒤로 남겨 둘 여유(ms)
+VAD_FRAME_MS = 20
+VAD_PADDING_MS = 200
+# 가장 큰 프레임 에너지보다 이만큼(dB) 작거나, 절대 기준보다 작은 프레임은 무음으로 봄
+VAD_RELATIVE_THRESHOLD_DB = -35.0
+VAD_ABSOLUTE_THRESHOLD_DB = -55.0
+# 절대 기준은 녹음의 잡음 바닥(조용한 프레임 하위 VAD_NOISE_PERCENTILE%의 에너지)보다 이만큼 위까지만 씀.
+# 마이크 감도가 낮아 말소리 전체가 절대 기준보다 작아도, 잡음보다 충분히 크면 말소리로 봄
+VAD_NOISE_PERCENTILE = 10
+VAD_NOISE_MARGIN_DB = 10.0
+# 정규화 후의 최대 진폭 (1.0 = 16비트 최대값)
+TARGET_PEAK = 0.9
+
+
+class PreprocessResult(NamedTuple):
+    """전처리된 16kHz 모노 16비트 WAV와, 단계별 소요 시간(초) 및 크기 정보"""
+    wav_bytes: bytes
+    sample_rate: int
+    duration: float
+    input_bytes: int
+    timings: Dict[str, float]
+    has_speech: bool
+
+    @property
+    def output_bytes(self) -> int:
+        return len(self.wav_bytes)
+
+
+def decode_audio(audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+    """
+    오디오 바이트를 (샘플 수 x 채널 수) float32 배열(-1.0 ~ 1.0)과 샘플레이트로 바꿉니다.
+    PCM WAV는 표준 라이브러리로 직접 읽고, 그 밖의 포맷은 pydub(ffmpeg)으로 읽습니다.
+    """
+    try:
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+            raw = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return _decode_with_pydub(audio_bytes)
+    return _pcm_to_float(raw, width, channels), rate
+
+
+def _pcm_to_float(raw: bytes, width: int, channels: int) -> np.ndarray:
+    if width == 1:
+        # 8비트 WAV는 부호 없는 정수
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        # 24비트는 3바이트씩 끊어 부호 확장
+        bytes3 = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = bytes3[:, 0] | (bytes3[:, 1] << 8) | (bytes3[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"unsupported sample width: {width}")
+    return samples.reshape(-1, channels)
+
+
+def _decode_with_pydub(audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+    from pydub import AudioSegment
+
+    segment = AudioSegment.from_file(io.BytesIO(audio_bytes))
+    samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+    scale = float(1 << (8 * segment.sample_width - 1))
+    return (samples / scale).reshape(-1, segment.channels), segment.frame_rate
+
+
+def to_mono(samples: np.ndarray) -> np.ndarray:
+    """여러 채널을 평균 내어 1차원 모노 신호로 만듭니다."""
+    if samples.ndim == 1:
+        return samples
+    if samples.shape[1] == 1:
+        return samples[:, 0]
+    # (N, C) 배열의 axis=1 평균은 보폭이 있는 읽기라 느려서, 채널 열을 더하는 쪽이 훨씬 빠름
+    mono = samples[:, 0].copy()
+    for channel in range(1, samples.shape[1]):
+        mono += samples[:, channel]
+    return mono * np.float32(1.0 / samples.shape[1])
+
+
+def resample(signal: np.ndarray, source_rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """
+    샘플레이트를 바꿉니다. 낮출 때는 먼저 윈도 sinc 저역 통과 필터로 에일리어싱을 막은 뒤
+    선형 보간으로 새 샘플 위치의 값을 구합니다. 모두 NumPy 벡터 연산입니다.
+    """
+    if source_rate == target_rate or signal.size == 0:
+        return signal.astype(np.float32, copy=False)
+    if target_rate < source_rate and source_rate % target_rate == 0:
+        # 48kHz -> 16kHz 같은 정수배 축소는 남길 샘플 위치에서만 필터를 계산
+        return _lowpass_decimate(signal, source_rate // target_rate)
+    if target_rate < source_rate:
+        signal = _lowpass(signal, cutoff=0.5 * target_rate / source_rate)
+    duration = signal.size / source_rate
+    target_size = max(1, int(round(duration * target_rate)))
+    positions = np.arange(target_size, dtype=np.float64) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(signal.size), signal).astype(np.float32)
+
+
+def _lowpass_kernel(cutoff: float, taps: int = 63) -> np.ndarray:
+    """cutoff(샘플레이트 대비 비율)의 해밍 윈도 sinc FIR 필터 계수"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def _lowpass(signal: np.ndarray, cutoff: float) -> np.ndarray:
+    return np.convolve(signal, _lowpass_kernel(cutoff), mode="same")
+
+
+def _lowpass_decimate(signal: np.ndarray, factor: int) -> np.ndarray:
+    """저역 통과 필터를 factor 간격의 샘플에서만 계산 (np.convolve 후 솎아 내는 것과 같은 결과)"""
+    kernel = _lowpass_kernel(0.5 / factor)
+    half = (kernel.size - 1) // 2
+    padded = np.pad(signal.astype(np.float32, copy=False), (half, half))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, kernel.size)[::factor]
+    # np.convolve는 커널을 뒤집어 곱하므로 같은 결과가 되도록 뒤집음 (대칭 커널이라 실제로는 동일)
+    return (windows @ kernel[::-1]).astype(np.float32, copy=False)
+
+
+def frame_energy_db(signal: np.ndarray, sample_rate: int, frame_ms: int = VAD_FRAME_MS) -> np.ndarray:
+    """겹치지 않는 프레임마다의 RMS 에너지(dBFS)"""
+    frame = max(1, sample_rate * frame_ms // 1000)
+    frames = signal.size // frame
+    if frames == 0:
+        return np.full(1, -np.inf if signal.size == 0 else 20 * np.log10(np.sqrt(np.mean(signal ** 2)) + 1e-12))
+    rms = np.sqrt(np.mean(signal[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+    return 20 * np.log10(rms + 1e-12)
+
+
+def trim_silence(signal: np.ndarray, sample_rate: int, frame_ms: int = VAD_FRAME_MS,
+                 padding_ms: int = VAD_PADDING_MS,
+                 absolute_threshold_db: Optional[float] = VAD_ABSOLUTE_THRESHOLD_DB) -> Tuple[np.ndarray, bool]:
+    """
+    에너지 기반 VAD로 앞뒤 무음을 잘라 냅니다. (잘린 신호, 말소리가 있었는지)를 돌려줍니다.
+    가장 큰 프레임보다 VAD_RELATIVE_THRESHOLD_DB 이상 작거나 절대 기준보다 작은 프레임을 무음으로 봅니다.
+    절대 기준은 잡음 바닥 + VAD_NOISE_MARGIN_DB보다 높아지지 않으며, None이면 쓰지 않습니다.
+    """
+    energy = frame_energy_db(signal, sample_rate, frame_ms)
+    threshold = energy.max() + VAD_RELATIVE_THRESHOLD_DB
+    if absolute_threshold_db is not None:
+        noise_floor = float(np.percentile(energy, VAD_NOISE_PERCENTILE))
+        threshold = max(threshold, min(absolute_threshold_db, noise_floor + VAD_NOISE_MARGIN_DB))
+    voiced = np.flatnonzero(energy > threshold)
+    if voiced.size == 0:
+        return signal[:0], False
+
+    frame = max(1, sample_rate * frame_ms // 1000)
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, voiced[0] * frame - padding)
+    end = min(signal.size, (voiced[-1] + 1) * frame + padding)
+    return signal[start:end], True
+
+
+def normalize(signal: np.ndarray, target_peak: float = TARGET_PEAK) -> np.ndarray:
+    """가장 큰 진폭이 target_peak가 되도록 크기를 맞춥니다."""
+    peak = float(np.abs(signal).max()) if signal.size else 0.0
+    if peak <= 0.0:
+        return signal
+    return signal * np.float32(target_peak / peak)
+
+
+def encode_wav(signal: np.ndarray, sample_rate: int) -> bytes:
+    """모노 float 신호를 16비트 PCM WAV 바이트로 만듭니다."""
+    pcm = (np.clip(signal, -1.0, 1.0) * 32767.0).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def preprocess_audio(audio_bytes: bytes, target_rate: int = TARGET_SAMPLE_RATE) -> PreprocessResult:
+    """
+    녹음된 오디오를 음성 인식에 알맞게 다듬습니다.
+    디코딩 → 모노 → 16kHz 리샘플링 → 앞뒤 무음 제거 → 정규화 → 16비트 WAV 인코딩
+    """
+    timings: Dict[str, float] = {}
+    clock = time.perf_counter
+
+    t = clock()
+    samples, rate = decode_audio(audio_bytes)
+    timings["decode"] = clock() - t
+
+    t = clock()
+    signal = to_mono(samples)
+    timings["downmix"] = clock() - t
+
+    t = clock()
+    signal = resample(signal, rate, target_rate)
+    timings["resample"] = clock() - t
+
+    t = clock()
+    signal, has_speech = trim_silence(signal, target_rate)
+    timings["vad"] = clock() - t
+
+    t = clock()
+    signal = normalize(signal)
+    timings["normalize"] = clock() - t
+
+    t = clock()
+    wav_bytes = encode_wav(signal, target_rate)
+    timings["encode"] = clock() - t
+
+    return PreprocessResult(wav_bytes, target_rate, signal.size / target_rate, len(audio_bytes), timings, has_speech)
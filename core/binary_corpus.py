@@ -0,0 +1,378 @@
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.checker import _clean_text
+from core.corpus import KeyIndex, Sentence, sentence_key
+
+# 컴파일된 문장 모음 파일 형식 (리틀 엔디언)
+#
+#   헤더     MAGIC, 버전, 문장 수, 정답 수, 문자열 수, 카테고리 수, 각 구역의 시작 위치
+#   ids                u32[문장 수]          1부터 시작하는 문장 id
+#   category_codes     i32[문장 수]          카테고리 번호 (-1은 카테고리 없음)
+#   korean             u32[문장 수]          한국어 문장의 문자열 번호
+#   answer_starts      u32[문장 수 + 1]      문장 i의 정답은 answers[answer_starts[i]:answer_starts[i + 1]]
+#   answer_english     u32[정답 수]          영어 정답의 문자열 번호
+#   answer_cleaned     u32[정답 수]          채점용으로 정제한 정답(_clean_text)의 문자열 번호
+#   category_names     u32[카테고리 수]      카테고리 이름의 문자열 번호
+#   category_starts    u32[카테고리 수 + 1]  카테고리 c의 문장 위치는 category_positions[starts[c]:starts[c + 1]]
+#   category_positions u32[카테고리가 있는 문장 수]
+#   string_offsets     u64[문자열 수 + 1]    문자열 s는 string_data[offsets[s]:offsets[s + 1]] (UTF-8)
+#   string_data
+#
+# 모든 구역은 8바이트 경계에서 시작하므로 mmap 위에 그대로 memoryview.cast()로 올릴 수 있습니다.
+# 같은 문자열은 문자열 표에 한 번만 저장하므로, 정제해도 바뀌지 않거나 서로 같아지는 정답은 추가 공간을 쓰지 않습니다.
+MAGIC = b"LSCORPUS"
+FORMAT_VERSION = 3
+_HEADER = struct.Struct("<8sIIIII11Q")
+_SECTIONS = ("ids", "category_codes", "korean", "answer_starts", "answer_english", "answer_cleaned",
+             "category_names", "category_starts", "category_positions", "string_offsets", "string_data")
+_ALIGNMENT = 8
+# _DigestTable을 키울 때 한 번에 다시 넣는 문자열 수
+_GROW_BATCH = 1 << 16
+
+
+class CorpusFormatError(ValueError):
+    """컴파일된 문장 모음 파일이 아니거나, 지원하지 않는 버전이거나, 손상된 경우"""
+
+
+class _DigestTable:
+    """
+    문자열 내용 해시(blake2b 128비트) → 문자열 번호 표.
+    해시는 문자열 번호 순서대로 array 두 개(앞/뒤 64비트)에 붙여 두고, 선형 탐사 해시 표(NumPy int32)에는
+    문자열 번호만 넣습니다. 문자열 하나에 30바이트 남짓이면 되므로, bytes 키 dict(문자열마다 100바이트 이상)보다
+    컴파일할 때의 메모리가 훨씬 적습니다.
+    """
+
+    def __init__(self, capacity: int = 1 << 16):
+        self._high = array('q')
+        self._low = array('q')
+        self._slots = np.full(capacity, -1, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._low)
+
+    def get_or_add(self, digest: bytes) -> Tuple[int, bool]:
+        """해시의 문자열 번호와, 새로 넣었는지 여부를 돌려줍니다. 새 번호는 넣은 순서대로 0부터 매깁니다."""
+        high = int.from_bytes(digest[:8], "little", signed=True)
+        low = int.from_bytes(digest[8:], "little", signed=True)
+        slots, highs, lows = self._slots, self._high, self._low
+        mask = len(slots) - 1
+        slot = low & mask
+        while True:
+            string_id = slots.item(slot)
+            if string_id < 0:
+                break
+            if lows[string_id] == low and highs[string_id] == high:
+                return string_id, False
+            slot = (slot + 1) & mask
+        string_id = len(lows)
+        highs.append(high)
+        lows.append(low)
+        slots[slot] = string_id
+        # 채움 비율을 1/2 아래로 유지
+        if len(lows) * 2 > len(slots):
+            self._grow()
+        return string_id, True
+
+    def _grow(self) -> None:
+        capacity = len(self._slots) * 2
+        self._slots = np.full(capacity, -1, dtype=np.int32)
+        mask = capacity - 1
+        low = np.frombuffer(self._low, dtype=np.int64)
+        # 파이썬 정수로 풀지 않고 묶음 단위로 다시 넣음: 빈 슬롯을 처음 고른 번호만 넣고, 나머지는
+        # 한 칸씩 옮겨 다시 시도 (채워진 슬롯은 비지 않으므로 선형 탐사 순서가 유지됨).
+        # 묶음으로 나누는 것은 다시 넣는 동안 잠깐 쓰는 배열이 표보다 커지지 않게 하기 위함
+        for begin in range(0, len(low), _GROW_BATCH):
+            pending = np.arange(begin, min(begin + _GROW_BATCH, len(low)), dtype=np.int32)
+            positions = low[pending] & mask
+            while len(pending):
+                _, first = np.unique(positions, return_index=True)
+                placed = np.zeros(len(pending), dtype=bool)
+                placed[first] = True
+                placed &= self._slots[positions] < 0
+                self._slots[positions[placed]] = pending[placed]
+                pending, positions = pending[~placed], (positions[~placed] + 1) & mask
+        # frombuffer 뷰가 남아 있으면 array에 더 붙일 수 없음
+        del low
+
+
+def write_binary_corpus(records: Iterable[dict], path: str,
+                        on_warning: Optional[Callable[[str], None]] = None) -> Dict[str, int]:
+    """
+    문장 dict들을 한 번씩만 훑으며 컴파일된 문장 모음 파일을 쓰고, 개수와 파일 크기 요약을 돌려줍니다.
+    문자열은 읽는 즉시 임시 파일에 써 두므로 문장 dict들을 메모리에 모아 두지 않습니다.
+    같은 문자열은 내용 해시 → 문자열 번호 표(_DigestTable)로 찾아 한 번만 씁니다 (메모리에는 해시만 남음).
+    채점용으로 정제한 정답도 여기서 한 번 만들어 저장하므로, 읽는 쪽은 _clean_text를 다시 하지 않습니다.
+    load_data_from_github와 같이 id는 입력 순서대로 1부터 다시 매기며, 형식이 잘못된 문장은 건너뜁니다.
+    """
+    warn = on_warning or (lambda message: None)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    ids, category_codes, korean = array('I'), array('i'), array('I')
+    answer_starts, answer_english, answer_cleaned = array('I', [0]), array('I'), array('I')
+    string_offsets = array('Q', [0])
+    string_ids = _DigestTable()
+    category_table: Dict[str, int] = {}
+    category_members: List[array] = []
+    skipped = 0
+
+    with tempfile.TemporaryFile(dir=directory) as blob:
+        def add_string(text: str) -> int:
+            data = text.encode("utf-8")
+            string_id, added = string_ids.get_or_add(hashlib.blake2b(data, digest_size=16).digest())
+            if added:
+                blob.write(data)
+                string_offsets.append(string_offsets[-1] + len(data))
+            return string_id
+
+        for position, record in enumerate(records):
+            english = record.get("english") if isinstance(record, dict) else None
+            if (not isinstance(english, list) or not isinstance(record.get("korean"), str)
+                    or not all(isinstance(answer, str) for answer in english)):
+                skipped += 1
+                warn(f"{position + 1}번째 문장의 형식이 올바르지 않습니다. 건너뜁니다.")
+                continue
+
+            index = len(ids)
+            ids.append(index + 1)
+            category = record.get("category")
+            if category is None:
+                category_codes.append(-1)
+            else:
+                code = category_table.get(category)
+                if code is None:
+                    code = category_table[category] = len(category_table)
+                    category_members.append(array('I'))
+                category_codes.append(code)
+                category_members[code].append(index)
+            korean.append(add_string(record["korean"]))
+            answer_english.extend(add_string(answer) for answer in english)
+            answer_cleaned.extend(add_string(_clean_text(answer)) for answer in english)
+            answer_starts.append(len(answer_english))
+
+        category_names = array('I', (add_string(name) for name in category_table))
+        category_starts = array('I', [0])
+        category_positions = array('I')
+        for members in category_members:
+            category_positions.extend(members)
+            category_starts.append(len(category_positions))
+
+        columns = {
+            "ids": ids, "category_codes": category_codes, "korean": korean,
+            "answer_starts": answer_starts, "answer_english": answer_english, "answer_cleaned": answer_cleaned,
+            "category_names": category_names, "category_starts": category_starts,
+            "category_positions": category_positions, "string_offsets": string_offsets,
+        }
+        if sys.byteorder != "little":
+            for column in columns.values():
+                column.byteswap()
+
+        offsets = []
+        position = _align(_HEADER.size)
+        for name in _SECTIONS:
+            offsets.append(position)
+            size = string_offsets[-1] if name == "string_data" else len(columns[name]) * columns[name].itemsize
+            position = _align(position + size)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".corpus.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(ids), len(answer_english),
+                                       len(string_offsets) - 1, len(category_table), *offsets))
+                for name, offset in zip(_SECTIONS, offsets):
+                    _pad_to(out, offset)
+                    if name == "string_data":
+                        blob.seek(0)
+                        shutil.copyfileobj(blob, out, 1 << 20)
+                    else:
+                        columns[name].tofile(out)
+                size = out.tell()
+            # 완성된 파일만 보이도록 교체 (이미 매핑해 둔 프로세스는 예전 파일을 계속 읽음)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    return {"sentences": len(ids), "answers": len(answer_english), "strings": len(string_offsets) - 1,
+            "categories": len(category_table), "skipped": skipped, "bytes": size}
+
+
+def _align(position: int) -> int:
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _pad_to(out: BinaryIO, offset: int) -> None:
+    out.write(b"\0" * (offset - out.tell()))
+
+
+class MappedCorpus:
+    """
+    컴파일된 문장 모음 파일을 메모리 매핑하여 SentenceCorpus와 같은 방식으로 읽습니다.
+
+    여는 데에는 헤더만 읽으므로 문장 수와 관계없이 거의 즉시 끝나고, 문자열은 요청받은 문장만
+    그때그때 디코딩합니다. 파일 내용은 운영체제 페이지 캐시에 있으므로 같은 파일을 여는
+    여러 프로세스(레플리카)가 메모리를 나눠 씁니다.
+
+    대신 문장을 읽을 때마다 UTF-8 디코딩을 하고, 처음 읽는 페이지는 디스크에서 올라오므로
+    문장 하나를 읽는 비용은 메모리에 올린 SentenceCorpus보다 큽니다 (bench_corpus_binary의 access).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise CorpusFormatError(f"{path}: empty file") from None
+        if len(self._mmap) < _HEADER.size:
+            raise CorpusFormatError(f"{path}: file too small")
+        magic, version, sentences, answers, strings, categories, *offsets = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise CorpusFormatError(f"{path}: not a compiled corpus file")
+        if version != FORMAT_VERSION:
+            raise CorpusFormatError(f"{path}: unsupported format version {version} (expected {FORMAT_VERSION})")
+
+        counts = {
+            "ids": sentences, "category_codes": sentences, "korean": sentences, "answer_starts": sentences + 1,
+            "answer_english": answers, "answer_cleaned": answers, "category_names": categories,
+            "category_starts": categories + 1, "string_offsets": strings + 1,
+        }
+        view = memoryview(self._mmap)
+        sections = {}
+        for name, offset in zip(_SECTIONS[:-1], offsets):
+            if name == "category_positions":
+                continue
+            typecode = {"category_codes": "i", "string_offsets": "Q"}.get(name, "I")
+            sections[name] = _column(view, offset, counts[name], typecode, path)
+        positions = sections["category_starts"][-1] if categories else 0
+        sections["category_positions"] = _column(view, offsets[_SECTIONS.index("category_positions")],
+                                                 positions, "I", path)
+        self._strings_start = offsets[-1]
+        if len(self._mmap) < self._strings_start + sections["string_offsets"][-1]:
+            raise CorpusFormatError(f"{path}: truncated string table")
+
+        self._ids = sections["ids"]
+        self._category_codes = sections["category_codes"]
+        self._korean = sections["korean"]
+        self._answer_starts = sections["answer_starts"]
+        self._answer_english = sections["answer_english"]
+        self._answer_cleaned = sections["answer_cleaned"]
+        self._string_offsets = sections["string_offsets"]
+        self._category_names = tuple(self._string(s) for s in sections["category_names"])
+        starts = sections["category_starts"]
+        self._category_index = {
+            name: sections["category_positions"][starts[c]:starts[c + 1]]
+            for c, name in enumerate(self._category_names)
+        }
+        self._sorted_categories = tuple(sorted(self._category_names))
+        # id가 위치 + 1이 아닌 모음에서만 필요할 때 만드는 id → 위치 색인
+        self._id_index: Optional[Dict[int, int]] = None
+        self._key_index: Optional[KeyIndex] = None
+        self._empty = memoryview(array('I'))
+
+    def _string(self, string_id: int) -> str:
+        # mmap을 직접 자르는 쪽이 memoryview를 잘라 디코딩하는 것보다 빠름
+        offsets, start = self._string_offsets, self._strings_start
+        return self._mmap[start + offsets[string_id]:start + offsets[string_id + 1]].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return len(self._ids) > 0
+
+    def __getitem__(self, index: int) -> Sentence:
+        if index < 0:
+            index += len(self._ids)
+        return Sentence(index, self._ids[index], self.category_of(index),
+                        self.korean_of(index), self.english_of(index))
+
+    def __iter__(self) -> Iterator[Sentence]:
+        for index in range(len(self._ids)):
+            yield self[index]
+
+    @property
+    def categories(self) -> Tuple[str, ...]:
+        """문장이 하나 이상 있는 카테고리의 정렬된 목록"""
+        return self._sorted_categories
+
+    def indices_for(self, category: Optional[str]) -> memoryview:
+        """카테고리에 속한 문장들의 위치 (파일을 직접 가리키는 u32 뷰). 없는 카테고리면 빈 뷰를 돌려줍니다."""
+        return self._category_index.get(category, self._empty)
+
+    def id_of(self, index: int) -> int:
+        return self._ids[index]
+
+    def index_of(self, sentence_id: int) -> int:
+        """문장 id의 위치를 돌려줍니다. 없으면 -1. id는 보통 위치 + 1이므로 그 자리를 먼저 확인합니다."""
+        position = sentence_id - 1
+        if 0 <= position < len(self._ids) and self._ids[position] == sentence_id:
+            return position
+        if self._id_index is None:
+            self._id_index = {sentence_id: position for position, sentence_id in enumerate(self._ids)}
+        return self._id_index.get(sentence_id, -1)
+
+    def key_of(self, index: int) -> int:
+        return sentence_key(self.korean_of(index))
+
+    def index_of_key(self, key: int) -> int:
+        """문장 키(sentence_key)의 위치를 돌려줍니다. 없으면 -1. 색인은 처음 찾을 때 모든 한국어 문장을 읽어 만듭니다."""
+        if self._key_index is None:
+            self._key_index = KeyIndex(self.korean_of(index) for index in range(len(self._ids)))
+        return self._key_index.index_of(key)
+
+    def category_of(self, index: int) -> Optional[str]:
+        code = self._category_codes[index]
+        return None if code < 0 else self._category_names[code]
+
+    def korean_of(self, index: int) -> str:
+        return self._string(self._korean[index])
+
+    def english_of(self, index: int) -> Tuple[str, ...]:
+        start, end = self._answer_starts[index], self._answer_starts[index + 1]
+        return tuple(self._string(s) for s in self._answer_english[start:end])
+
+    def cleaned_english_of(self, index: int) -> Tuple[str, ...]:
+        """채점용으로 정제한 영어 정답 (english_of와 같은 순서). 컴파일할 때 정제해 둔 것을 읽기만 합니다."""
+        start, end = self._answer_starts[index], self._answer_starts[index + 1]
+        return tuple(self._string(s) for s in self._answer_cleaned[start:end])
+
+    def iter_cleaned_english(self) -> Iterator[Tuple[str, ...]]:
+        """모든 문장의 정제한 영어 정답을 위치 순서대로 돌려줍니다 (검색 색인을 만들 때 씀)."""
+        for index in range(len(self._ids)):
+            yield self.cleaned_english_of(index)
+
+    def to_records(self) -> List[dict]:
+        """디버깅/직렬화용으로 dict 목록을 다시 만듭니다."""
+        records = []
+        for sentence in self:
+            record = {'id': sentence.id, 'korean': sentence.korean, 'english': list(sentence.english)}
+            if sentence.category is not None:
+                record['category'] = sentence.category
+            records.append(record)
+        return records
+
+
+def _column(view: memoryview, offset: int, count: int, typecode: str, path: str):
+    """파일의 한 구역을 정수 배열처럼 읽을 수 있는 뷰로 만듭니다."""
+    size = count * struct.calcsize(typecode)
+    raw = view[offset:offset + size]
+    if len(raw) != size:
+        raise CorpusFormatError(f"{path}: truncated section at {offset}")
+    if sys.byteorder == "little":
+        return raw.cast(typecode)
+    # 빅 엔디언 환경에서는 복사해서 바이트 순서를 바꿈
+    column = array(typecode, raw.tobytes())
+    column.byteswap()
+    return column
+
@@ -1,6 +1,32 @@
 import difflib
 import re
-from typing import List, Tuple
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from core.lru import LRUCache
+from core.tracing import traced, tracer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy가 없으면 순수 파이썬 상한 계산으로 대체
+    np = None
+
+# 단어, 숫자, 공백, 어퍼스트로피(')를 제외한 모든 문자
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s']")
+# 배치 비교에서 NumPy로 상한 행렬을 계산할 최소 (발화 수 x 정답 수)
+_VECTORIZE_MIN_PAIRS = 64
+# 상한 행렬을 나눠 계산할 때 한 번에 만드는 원소 수의 상한
+_VECTORIZE_CHUNK_ELEMENTS = 1 << 22
+
+# 밑줄 스타일 정의 (빨간색)
+_UNDERLINE_RED_STYLE = "text-decoration: underline; text-decoration-color: red; font-weight: bold;"
+# 빠진 단어 스타일 정의 (회색 밑줄)
+_MISSING_WORD_STYLE = "text-decoration: underline; text-decoration-color: gray; color: gray; font-weight: bold;"
+
+# (발화, 문장 id, 정답들) → CheckResult. 같은 결과를 다시 그릴 때 정렬을 반복하지 않도록 함
+_check_cache = LRUCache(maxsize=2048)
+tracer.register_cache("check_result", lambda: (_check_cache.hits, _check_cache.misses))
 
 def _clean_text(text: str) -> str:
     """
@@ -10,69 +36,276 @@ def _clean_text(text: str) -> str:
     # 1. 모든 문자를 소문자로 변환
     text = text.lower()
     # 2. 정규표현식을 사용하여 단어, 숫자, 공백, 어퍼스트로피(')를 제외한 모든 문자를 제거
-    text = re.sub(r"[^\w\s']", "", text)
+    text = _PUNCTUATION_PATTERN.sub("", text)
     # 3. 양쪽 끝의 공백 제거
     return text.strip()
 
-def compare_answers(user_answer: str, correct_answers: List[str]) -> Tuple[float, str]:
-    """사용자의 답변과 정답 목록을 비교하여 가장 높은 유사도와 그 정답 문장을 반환합니다."""
+def _calculate_ratio(matches: int, length: int) -> float:
+    """difflib와 똑같은 식으로 비율을 계산하여, 상한과 실제 점수를 그대로 비교할 수 있게 합니다."""
+    return 2.0 * matches / length if length else 1.0
+
+def _best_candidate(cleaned_user: str, cleaned_answers: Sequence[str]) -> Tuple[float, int]:
+    """
+    정제된 답변 하나를 정제된 정답들과 비교하여 (최고 유사도, 그 정답의 위치)를 돌려줍니다.
+    일치하는 정답이 없으면(유사도 0) 위치는 -1입니다.
+
+    ratio()는 비싸므로, 값싼 상한으로 현재 최고 점수를 넘을 수 없는 후보는 건너뜁니다.
+    1) 길이 상한: 2*min(la, lb)/(la+lb)  (difflib.real_quick_ratio와 같음)
+    2) 문자 빈도 상한: 두 문자열을 문자 multiset으로 봤을 때의 교집합 크기 (difflib.quick_ratio와 같음)
+    결과는 모든 정답에 대해 ratio()를 계산하고 처음으로 가장 높은 점수를 고르는 것과 똑같습니다.
+    """
+    len_user = len(cleaned_user)
+    length_bounds = [_calculate_ratio(min(len_user, len(answer)), len_user + len(answer))
+                     for answer in cleaned_answers]
+    # 상한이 높은 후보부터 (같으면 원래 순서대로) 확인
+    order = sorted(range(len(cleaned_answers)), key=length_bounds.__getitem__, reverse=True)
+
+    best, best_j = 0.0, -1
+    user_counts = None
+    for j in order:
+        if _cannot_win(length_bounds[j], j, best, best_j):
+            if length_bounds[j] < best:
+                break
+            continue
+        answer = cleaned_answers[j]
+        if user_counts is None:
+            user_counts = Counter(cleaned_user)
+        quick_bound = _calculate_ratio(sum((user_counts & Counter(answer)).values()), len_user + len(answer))
+        if _cannot_win(quick_bound, j, best, best_j):
+            continue
+        sim = difflib.SequenceMatcher(None, cleaned_user, answer).ratio()
+        if _beats(sim, j, best, best_j):
+            best, best_j = sim, j
+    return best, best_j
+
+def _cannot_win(bound: float, j: int, best: float, best_j: int) -> bool:
+    """상한이 bound인 j번째 후보가 현재 최고 기록을 바꿀 수 없는지 판단합니다."""
+    return bound < best or (bound == best and (best_j < 0 or j > best_j))
+
+def _beats(sim: float, j: int, best: float, best_j: int) -> bool:
+    """
+    j번째 후보가 현재 최고 기록을 바꾸는지 판단합니다.
+    원래 함수는 앞에서부터 '더 큰' 점수만 채택하므로, 동점이면 앞선 정답이 이깁니다.
+    """
+    return sim > best or (sim == best and best_j >= 0 and j < best_j)
+
+@traced("compare_answers")
+def compare_answers(user_answer: str, correct_answers: List[str],
+                    cleaned_answers: Optional[Sequence[str]] = None) -> Tuple[float, str]:
+    """
+    사용자의 답변과 정답 목록을 비교하여 가장 높은 유사도와 그 정답 문장을 반환합니다.
+    cleaned_answers에 미리 정제해 둔 정답(SentenceCorpus.cleaned_english_of)을 넘기면 정제를 다시 하지 않습니다.
+    """
     # 비교 전에 사용자의 답변을 깨끗하게 만듦
     cleaned_user_answer = _clean_text(user_answer)
-    max_sim, best_match = 0.0, ""
-
-    for correct in correct_answers:
+    if cleaned_answers is None:
         # 비교 전에 각 정답 문장도 깨끗하게 만듦
-        cleaned_correct_answer = _clean_text(correct)
-        sim = difflib.SequenceMatcher(None, cleaned_user_answer, cleaned_correct_answer).ratio()
-        if sim > max_sim:
-            max_sim, best_match = sim, correct
-            
-    return max_sim, best_match
+        cleaned_answers = [_clean_text(correct) for correct in correct_answers]
 
-def get_highlighted_diff_html(user_answer: str, correct_answer: str) -> str:
+    max_sim, best_j = _best_candidate(cleaned_user_answer, cleaned_answers)
+    return max_sim, (correct_answers[best_j] if best_j >= 0 else "")
+
+def compare_answers_batch(user_answers: Sequence[str], correct_answers: Sequence[str],
+                          cleaned_answers: Optional[Sequence[str]] = None) -> List[Tuple[float, str]]:
     """
-    사용자의 답변과 정답을 비교하여, 사용자의 답변 중 틀리거나 불필요한 부분을 밑줄로 표시하고,
-    빠뜨린 단어는 단어 길이만큼 '@' 기호로 표시한 HTML을 생성합니다.
-    즉, '사용자의 답변'을 기준으로 교정된 형태를 보여줍니다.
+    여러 답변을 같은 정답 목록과 한 번에 비교합니다. 각 답변의 결과는 compare_answers와 같습니다.
+
+    정답마다 SequenceMatcher를 하나만 만들어 답변만 바꿔 가며 재사용하고(정답 쪽 색인 재사용),
+    NumPy가 있으면 모든 (답변, 정답) 쌍의 문자 빈도 상한을 행렬 연산으로 한꺼번에 구해 가지치기합니다.
+    """
+    if cleaned_answers is None:
+        cleaned_answers = [_clean_text(correct) for correct in correct_answers]
+    cleaned_users = [_clean_text(user) for user in user_answers]
+    bounds = _upper_bound_matrix(cleaned_users, cleaned_answers)
+    matchers = [None] * len(cleaned_answers)
+
+    results = []
+    for u, cleaned_user in enumerate(cleaned_users):
+        row = bounds[u]
+        order = sorted(range(len(cleaned_answers)), key=row.__getitem__, reverse=True)
+        best, best_j = 0.0, -1
+        for j in order:
+            if _cannot_win(row[j], j, best, best_j):
+                if row[j] < best:
+                    break
+                continue
+            matcher = matchers[j]
+            if matcher is None:
+                matcher = matchers[j] = difflib.SequenceMatcher(None, "", cleaned_answers[j])
+            matcher.set_seq1(cleaned_user)
+            sim = matcher.ratio()
+            if _beats(sim, j, best, best_j):
+                best, best_j = sim, j
+        results.append((best, correct_answers[best_j] if best_j >= 0 else ""))
+    return results
+
+def score_matrix(user_answers: Sequence[str], correct_answers: Sequence[str],
+                 min_score: float = 0.0) -> List[List[float]]:
+    """
+    모든 (답변, 정답) 쌍의 유사도 행렬을 돌려줍니다. 값은 SequenceMatcher.ratio()와 같습니다.
+    min_score를 주면 상한이 그보다 낮은 쌍은 계산하지 않고 0.0으로 채웁니다.
     """
-    cleaned_user_words = _clean_text(user_answer).split()
-    cleaned_correct_words = _clean_text(correct_answer).split()
+    cleaned_users = [_clean_text(user) for user in user_answers]
+    cleaned_answers = [_clean_text(correct) for correct in correct_answers]
+    bounds = _upper_bound_matrix(cleaned_users, cleaned_answers)
 
-    original_user_words_for_display = user_answer.strip().split()
-    original_correct_words_for_display = correct_answer.strip().split() # 빠진 단어 길이 파악용
+    matrix = [[0.0] * len(cleaned_answers) for _ in cleaned_users]
+    for j, answer in enumerate(cleaned_answers):
+        matcher = difflib.SequenceMatcher(None, "", answer)
+        for u, cleaned_user in enumerate(cleaned_users):
+            if bounds[u][j] < min_score:
+                continue
+            matcher.set_seq1(cleaned_user)
+            matrix[u][j] = matcher.ratio()
+    return matrix
 
-    matcher = difflib.SequenceMatcher(None, cleaned_user_words, cleaned_correct_words)
-    
+def _upper_bound_matrix(cleaned_users: Sequence[str], cleaned_answers: Sequence[str]) -> List[List[float]]:
+    """모든 (답변, 정답) 쌍에 대한 문자 빈도 상한(quick_ratio)을 계산합니다."""
+    if np is not None and len(cleaned_users) * len(cleaned_answers) >= _VECTORIZE_MIN_PAIRS:
+        return _upper_bound_matrix_numpy(cleaned_users, cleaned_answers)
+    answer_counts = [Counter(answer) for answer in cleaned_answers]
+    matrix = []
+    for user in cleaned_users:
+        user_counts = Counter(user)
+        matrix.append([
+            _calculate_ratio(sum((user_counts & counts).values()), len(user) + len(answer))
+            for answer, counts in zip(cleaned_answers, answer_counts)
+        ])
+    return matrix
+
+def _upper_bound_matrix_numpy(cleaned_users: Sequence[str], cleaned_answers: Sequence[str]) -> List[List[float]]:
+    """_upper_bound_matrix의 NumPy 버전. 문자 빈도 벡터끼리의 원소별 최솟값 합으로 교집합 크기를 구합니다."""
+    vocabulary = {}
+    for text in (*cleaned_users, *cleaned_answers):
+        for char in text:
+            vocabulary.setdefault(char, len(vocabulary))
+
+    def count_matrix(texts):
+        counts = np.zeros((len(texts), max(1, len(vocabulary))), dtype=np.int32)
+        for row, text in enumerate(texts):
+            for char, count in Counter(text).items():
+                counts[row, vocabulary[char]] = count
+        return counts
+
+    user_counts, answer_counts = count_matrix(cleaned_users), count_matrix(cleaned_answers)
+    user_lengths = np.array([len(text) for text in cleaned_users], dtype=np.float64)
+    answer_lengths = np.array([len(text) for text in cleaned_answers], dtype=np.float64)
+
+    matches = np.empty((len(cleaned_users), len(cleaned_answers)), dtype=np.float64)
+    rows_per_chunk = max(1, _VECTORIZE_CHUNK_ELEMENTS // (answer_counts.size or 1))
+    for start in range(0, len(cleaned_users), rows_per_chunk):
+        chunk = user_counts[start:start + rows_per_chunk, None, :]
+        matches[start:start + rows_per_chunk] = np.minimum(chunk, answer_counts[None, :, :]).sum(axis=2)
+
+    lengths = user_lengths[:, None] + answer_lengths[None, :]
+    # 길이가 0인 쌍은 difflib과 같이 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bounds = np.where(lengths > 0, 2.0 * matches / lengths, 1.0)
+    return bounds.tolist()
+
+def _tokenize(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    문장을 (화면에 보여 줄 원래 단어들, 정제된 단어들)로 나눕니다. 두 튜플의 같은 위치는 같은 단어입니다.
+    정제 후 비어 버리는 단어(예: "-", "!")는 양쪽에서 함께 빠지므로 위치가 어긋나지 않습니다.
+    정제된 단어들은 _clean_text(text).split()과 같습니다.
+    """
+    display, cleaned = [], []
+    for word in text.split():
+        cleaned_word = _clean_text(word)
+        if cleaned_word:
+            display.append(word)
+            cleaned.append(cleaned_word)
+    return tuple(display), tuple(cleaned)
+
+@dataclass(frozen=True)
+class CheckResult:
+    """
+    답변 채점 결과. 유사도와 가장 가까운 정답, 그리고 그 정답과의 단어 단위 정렬(opcodes)을 한 번에 담습니다.
+    opcodes의 인덱스는 user_words / answer_words(와 각각의 cleaned_*)의 위치를 가리킵니다.
+    """
+    user_answer: str
+    score: float
+    best_match: str
+    best_index: int
+    user_words: Tuple[str, ...]
+    cleaned_user_words: Tuple[str, ...]
+    answer_words: Tuple[str, ...]
+    cleaned_answer_words: Tuple[str, ...]
+    opcodes: Tuple[Tuple[str, int, int, int, int], ...]
+
+    @property
+    def similarity_percentage(self) -> float:
+        return self.score * 100
+
+@traced("check_answer")
+def check_answer(user_answer: str, correct_answers: Sequence[str],
+                 cleaned_answers: Optional[Sequence[str]] = None,
+                 sentence_id: Optional[int] = None) -> CheckResult:
+    """
+    compare_answers와 같은 점수를 계산하고, 가장 가까운 정답과의 단어 단위 정렬까지 한 번에 만듭니다.
+    sentence_id를 주면 (발화, 문장 id, 정답들)을 키로 결과를 LRU 캐시에 보관합니다.
+    """
+    if sentence_id is None:
+        return _check_answer(user_answer, correct_answers, cleaned_answers)
+    key = (user_answer, sentence_id, tuple(correct_answers))
+    return _check_cache.get_or_compute(key, lambda: _check_answer(user_answer, correct_answers, cleaned_answers))
+
+def _check_answer(user_answer: str, correct_answers: Sequence[str],
+                  cleaned_answers: Optional[Sequence[str]]) -> CheckResult:
+    if cleaned_answers is None:
+        cleaned_answers = [_clean_text(correct) for correct in correct_answers]
+    score, best_index = _best_candidate(_clean_text(user_answer), cleaned_answers)
+    best_match = correct_answers[best_index] if best_index >= 0 else ""
+    return _build_result(user_answer, score, best_match, best_index)
+
+def _build_result(user_answer: str, score: float, best_match: str, best_index: int) -> CheckResult:
+    user_words, cleaned_user_words = _tokenize(user_answer)
+    answer_words, cleaned_answer_words = _tokenize(best_match)
+    matcher = difflib.SequenceMatcher(None, cleaned_user_words, cleaned_answer_words)
+    return CheckResult(
+        user_answer=user_answer,
+        score=score,
+        best_match=best_match,
+        best_index=best_index,
+        user_words=user_words,
+        cleaned_user_words=cleaned_user_words,
+        answer_words=answer_words,
+        cleaned_answer_words=cleaned_answer_words,
+        opcodes=tuple(matcher.get_opcodes()),
+    )
+
+@traced("render_diff")
+def render_diff_html(result: CheckResult) -> str:
+    """
+    채점 결과로부터, 사용자의 답변 중 틀리거나 불필요한 부분을 밑줄로 표시하고
+    빠뜨린 단어는 단어 길이만큼 '❌' 기호로 표시한 HTML을 만듭니다. 비교를 다시 하지 않는 순수 함수입니다.
+    """
     highlighted_parts = []
-    
-    # 밑줄 스타일 정의 (빨간색)
-    underline_red_style = "text-decoration: underline; text-decoration-color: red; font-weight: bold;"
-    # 빠진 단어 스타일 정의 (회색 밑줄)
-    missing_word_style = "text-decoration: underline; text-decoration-color: gray; color: gray; font-weight: bold;"
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    for tag, i1, i2, j1, j2 in result.opcodes:
         if tag == 'equal':
-            highlighted_parts.extend(original_user_words_for_display[i1:i2])
-        elif tag == 'replace':
-            # 사용자 답변의 단어가 정답과 다른 경우: 사용자 답변의 해당 단어들을 밑줄
-            for word_idx in range(i1, i2):
-                highlighted_parts.append(f"<span style='{underline_red_style}'>{original_user_words_for_display[word_idx]}</span>")
-        elif tag == 'delete':
-            # 사용자 답변에만 있고 정답에는 없는 경우 (불필요하게 추가된 단어): 사용자 답변의 해당 단어들을 밑줄
-            for word_idx in range(i1, i2):
-                highlighted_parts.append(f"<span style='{underline_red_style}'>{original_user_words_for_display[word_idx]}</span>")
+            highlighted_parts.extend(result.user_words[i1:i2])
+        elif tag in ('replace', 'delete'):
+            # 정답과 다르거나(replace) 불필요하게 추가된(delete) 사용자 답변의 단어들을 밑줄
+            for word in result.user_words[i1:i2]:
+                highlighted_parts.append(f"<span style='{_UNDERLINE_RED_STYLE}'>{word}</span>")
         elif tag == 'insert':
             # 정답에만 있고 사용자 답변에는 없는 경우 (사용자가 빠뜨린 단어):
-            # 빠뜨린 단어들을 단어 길이만큼 '@' 기호로 표시
-            for word_idx in range(j1, j2): # correct_words의 인덱스를 사용하여 빠뜨린 단어를 가져옴
-                if word_idx < len(original_correct_words_for_display):
-                    missing_word_original = original_correct_words_for_display[word_idx]
-                    # 단어 길이만큼 '❌' 기호 생성 (알파벳, 숫자만 고려, 구두점 무시)
-                    placeholder = '❌' * len(re.sub(r"[^\w]", "", missing_word_original))
-                    if not placeholder: # 단어가 구두점 등으로만 이루어진 경우 (예: "!") 빈 문자열 방지
-                        placeholder = '❌' # 최소 1개는 표시
-                    highlighted_parts.append(f"<span style='{missing_word_style}'>[{placeholder}]</span>")
-                else: # 예외 처리
-                    highlighted_parts.append(f"<span style='{missing_word_style}'>[❌]</span>") # 기본 플레이스홀더
-    
-    return " ".join(highlighted_parts)
\ No newline at end of file
+            # 빠뜨린 단어들을 단어 길이만큼 '❌' 기호로 표시 (알파벳, 숫자만 고려, 구두점 무시)
+            for word in result.answer_words[j1:j2]:
+                placeholder = '❌' * len(re.sub(r"[^\w]", "", word))
+                if not placeholder: # 단어가 구두점 등으로만 이루어진 경우 (예: "'") 빈 문자열 방지
+                    placeholder = '❌' # 최소 1개는 표시
+                highlighted_parts.append(f"<span style='{_MISSING_WORD_STYLE}'>[{placeholder}]</span>")
+
+    return " ".join(highlighted_parts)
+
+@traced("highlighted_diff")
+def get_highlighted_diff_html(user_answer: str, correct_answer: str) -> str:
+    """
+    사용자의 답변과 정답을 비교하여, 사용자의 답변 중 틀리거나 불필요한 부분을 밑줄로 표시하고,
+    빠뜨린 단어는 단어 길이만큼 '❌' 기호로 표시한 HTML을 생성합니다.
+    즉, '사용자의 답변'을 기준으로 교정된 형태를 보여줍니다.
+    이미 check_answer의 결과가 있다면 render_diff_html을 바로 쓰는 편이 비교를 한 번 줄입니다.
+    """
+    return render_diff_html(_build_result(user_answer, 0.0, correct_answer, -1))
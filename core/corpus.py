@@ -0,0 +1,207 @@
+import hashlib
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.checker import _clean_text
+from core.lru import LRUCache
+
+
+_EMPTY_INDICES = array('I')
+# 채점용으로 정제한 정답을 기억해 둘 문장 수 (모든 정답을 정제해 두면 영어 정답이 두 벌이 됨)
+CLEANED_CACHE_SIZE = 4096
+
+
+def sentence_key(korean: str) -> int:
+    """
+    문장 파일이 추가/삭제되어도 바뀌지 않는 문장 키 (한국어 문장의 blake2b 64비트 해시, SQLite INTEGER에 들어감).
+    id는 불러올 때마다 위치 순서대로 다시 매겨지므로, 답변 기록처럼 오래 남는 데이터는 이 키를 씁니다.
+    """
+    return int.from_bytes(hashlib.blake2b(korean.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+class KeyIndex:
+    """
+    문장 키 → 위치 색인. 키를 정렬한 NumPy 배열에서 이진 탐색하므로 문장 하나에 16바이트만 씁니다.
+    같은 한국어 문장이 여러 번 있으면 가장 앞의 위치를 돌려줍니다.
+    """
+
+    def __init__(self, korean: Iterable[str]):
+        keys = np.fromiter((sentence_key(text) for text in korean), dtype=np.int64)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    def index_of(self, key: int) -> int:
+        position = int(np.searchsorted(self._keys, key))
+        if position < len(self._keys) and self._keys[position] == key:
+            return int(self._order[position])
+        return -1
+
+
+class Sentence:
+    """
+    문장 하나에 대한 읽기 전용 뷰. 필요할 때만 만들어지며 __slots__로 dict보다 가볍습니다.
+    기존 코드와의 호환을 위해 sentence["korean"]처럼 키로도 읽을 수 있습니다.
+    """
+    __slots__ = ("index", "id", "category", "korean", "english")
+
+    def __init__(self, index: int, id: int, category: Optional[str], korean: str, english: Tuple[str, ...]):
+        self.index = index
+        self.id = id
+        self.category = category
+        self.korean = korean
+        self.english = english
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __repr__(self) -> str:
+        return f"Sentence(id={self.id}, category={self.category!r}, korean={self.korean!r})"
+
+
+class SentenceCorpus:
+    """
+    모든 세션이 함께 쓰는 읽기 전용 문장 모음.
+
+    문장마다 dict를 두는 대신 열(column) 단위로 저장합니다.
+    - id: array('I'), 카테고리: 카테고리 표의 번호를 담은 array('i') (-1은 카테고리 없음)
+    - 한국어: 문자열 튜플, 영어 정답: 인턴(intern)된 문자열 튜플의 튜플
+    - 채점용으로 정제(_clean_text)한 영어 정답은 필요할 때 만들어 최근 문장 것만 LRU 캐시에 둠
+    세션은 문장 자체가 아니라 이 모음 안의 위치(index)만 들고 있으면 됩니다.
+
+    만들 때 카테고리 → 위치 배열 색인과 정렬된 카테고리 목록도 한 번만 계산해 둡니다.
+    """
+
+    def __init__(self, ids: array, category_codes: array, category_names: Tuple[str, ...],
+                 korean: Tuple[str, ...], english: Tuple[Tuple[str, ...], ...]):
+        self._ids = ids
+        self._category_codes = category_codes
+        self._category_names = category_names
+        self._korean = korean
+        self._english = english
+        self._cleaned_english = LRUCache(CLEANED_CACHE_SIZE)
+
+        index: Dict[str, array] = {name: array('I') for name in category_names}
+        for position, code in enumerate(category_codes):
+            if code >= 0:
+                index[category_names[code]].append(position)
+        self._category_index = index
+        self._sorted_categories = tuple(sorted(category_names))
+        # id가 위치 + 1이 아닌 모음에서만 필요할 때 만드는 id → 위치 색인
+        self._id_index: Optional[Dict[int, int]] = None
+        # 처음 찾을 때 만드는 문장 키 → 위치 색인
+        self._key_index: Optional[KeyIndex] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "SentenceCorpus":
+        """load_data_from_github 형식의 dict 목록으로부터 모음을 만듭니다."""
+        ids = array('I')
+        category_codes = array('i')
+        category_table = {}
+        korean: List[str] = []
+        english: List[Tuple[str, ...]] = []
+
+        for record in records:
+            ids.append(record['id'])
+            category = record.get('category')
+            if category is None:
+                category_codes.append(-1)
+            else:
+                if category not in category_table:
+                    category_table[category] = len(category_table)
+                category_codes.append(category_table[category])
+            korean.append(record['korean'])
+            # 같은 정답 문장이 여러 번 나와도 한 객체만 남도록 인턴
+            english.append(tuple(sys.intern(answer) for answer in record['english']))
+
+        return cls(ids, category_codes, tuple(category_table), tuple(korean), tuple(english))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return len(self._ids) > 0
+
+    def __getitem__(self, index: int) -> Sentence:
+        if index < 0:
+            index += len(self._ids)
+        return Sentence(index, self._ids[index], self.category_of(index),
+                        self._korean[index], self._english[index])
+
+    def __iter__(self) -> Iterator[Sentence]:
+        for index in range(len(self._ids)):
+            yield self[index]
+
+    @property
+    def categories(self) -> Tuple[str, ...]:
+        """문장이 하나 이상 있는 카테고리의 정렬된 목록"""
+        return self._sorted_categories
+
+    def indices_for(self, category: Optional[str]) -> array:
+        """카테고리에 속한 문장들의 위치 배열. 없는 카테고리면 빈 배열을 돌려줍니다."""
+        return self._category_index.get(category, _EMPTY_INDICES)
+
+    def id_of(self, index: int) -> int:
+        return self._ids[index]
+
+    def index_of(self, sentence_id: int) -> int:
+        """문장 id의 위치를 돌려줍니다. 없으면 -1. id는 보통 위치 + 1이므로 그 자리를 먼저 확인합니다."""
+        position = sentence_id - 1
+        if 0 <= position < len(self._ids) and self._ids[position] == sentence_id:
+            return position
+        if self._id_index is None:
+            self._id_index = {sentence_id: position for position, sentence_id in enumerate(self._ids)}
+        return self._id_index.get(sentence_id, -1)
+
+    def key_of(self, index: int) -> int:
+        return sentence_key(self._korean[index])
+
+    def index_of_key(self, key: int) -> int:
+        """문장 키(sentence_key)의 위치를 돌려줍니다. 없으면 -1."""
+        if self._key_index is None:
+            self._key_index = KeyIndex(self._korean)
+        return self._key_index.index_of(key)
+
+    def category_of(self, index: int) -> Optional[str]:
+        code = self._category_codes[index]
+        return None if code < 0 else self._category_names[code]
+
+    def korean_of(self, index: int) -> str:
+        return self._korean[index]
+
+    def english_of(self, index: int) -> Tuple[str, ...]:
+        return self._english[index]
+
+    def cleaned_english_of(self, index: int) -> Tuple[str, ...]:
+        """채점용으로 정제한 영어 정답 (english_of와 같은 순서). 최근에 쓴 문장 것은 캐시에서 돌려줍니다."""
+        return self._cleaned_english.get_or_compute(
+            index, lambda: tuple(_clean_text(answer) for answer in self._english[index]))
+
+    def iter_cleaned_english(self) -> Iterator[Tuple[str, ...]]:
+        """
+        모든 문장의 정제한 영어 정답을 위치 순서대로 돌려줍니다 (검색 색인을 만들 때 씀).
+        캐시를 거치지 않으므로 연습 중인 문장의 캐시를 밀어내지 않습니다.
+        """
+        for answers in self._english:
+            yield tuple(_clean_text(answer) for answer in answers)
+
+    def to_records(self) -> List[dict]:
+        """디버깅/직렬화용으로 dict 목록을 다시 만듭니다."""
+        records = []
+        for sentence in self:
+            record = {'id': sentence.id, 'korean': sentence.korean, 'english': list(sentence.english)}
+            if sentence.category is not None:
+                record['category'] = sentence.category
+            records.append(record)
+        return records
@@ -1,65 +1,470 @@
 import requests
 import streamlit as st
 import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
-# 이 함수는 이제 여러 JSON 파일을 불러와 하나로 합치는 역할을 합니다.
-@st.cache_data(ttl=3600) 
-def load_data_from_github():
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.binary_corpus import MappedCorpus
+from core.corpus import SentenceCorpus
+from core.tracing import traced
+
+# 요청 하나당 (연결, 읽기) 타임아웃(초)
+DEFAULT_TIMEOUT = (3.05, 15)
+# 동시에 내려받을 파일 수의 상한
+DEFAULT_MAX_WORKERS = 8
+# 문장 데이터를 다시 확인하는 주기(초)와, 확인에 실패했을 때 재시도까지의 간격(초)
+DEFAULT_TTL = 3600
+DEFAULT_RETRY_INTERVAL = 60
+# 프로세스 재시작 후에도 바로 쓸 수 있도록 마지막으로 받은 문장 데이터를 저장하는 위치
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.environ.get("LEARN_SPEAKING_CACHE_DIR", ".cache"), "corpus_snapshot.json")
+SNAPSHOT_VERSION = 1
+# tools/compile_corpus.py로 만든 바이너리 문장 모음. 지정하면 GitHub 대신 이 파일을 메모리 매핑해서 사용
+BINARY_CORPUS_ENV = "LEARN_SPEAKING_CORPUS_BIN"
+
+# 조건부 요청에 서버가 304(변경 없음)로 응답했음을 나타내는 표식
+NOT_MODIFIED = object()
+
+
+class CorpusFile(NamedTuple):
+    """문장 파일 하나의 메타데이터 (GitHub contents API 항목과 같은 구성)"""
+    name: str
+    url: str
+    sha: str = ""
+
+
+class CorpusSource:
     """
-    비공개 GitHub 레포지토리의 특정 폴더에서 모든 .json 파일을 가져와
-    하나의 리스트로 합친 후, id를 재정렬하여 반환합니다.
+    문장 JSON 파일을 제공하는 소스의 공통 인터페이스.
+    list_files()로 파일 목록을, fetch()로 파일 하나의 파싱된 내용을 돌려줍니다.
+    조건부 요청(ETag)을 지원하는 소스는 *_if_changed 메서드를 재정의합니다.
+    """
+
+    def list_files(self) -> List[CorpusFile]:
+        raise NotImplementedError
+
+    def fetch(self, file: CorpusFile):
+        raise NotImplementedError
+
+    def list_files_if_changed(self, etag: Optional[str] = None) -> Tuple[Optional[List[CorpusFile]], Optional[str]]:
+        """목록이 etag 이후로 바뀌지 않았다면 (None, etag)를, 아니면 (목록, 새 etag)를 돌려줍니다."""
+        return self.list_files(), None
+
+    def fetch_if_changed(self, file: CorpusFile, etag: Optional[str] = None):
+        """파일이 etag 이후로 바뀌지 않았다면 (NOT_MODIFIED, etag)를, 아니면 (내용, 새 etag)를 돌려줍니다."""
+        return self.fetch(file), None
+
+    def close(self) -> None:
+        pass
+
+
+def make_session(max_workers: int = DEFAULT_MAX_WORKERS, retries: int = 3,
+                 backoff_factor: float = 0.3) -> requests.Session:
+    """
+    keep-alive 연결을 재사용하고, 일시적인 오류는 지수 백오프로 재시도하는 Session을 만듭니다.
+    연결 풀 크기는 워커 수에 맞춰 모든 워커가 연결을 공유할 수 있게 합니다.
     """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class GitHubSource(CorpusSource):
+    """
+    GitHub contents API로 폴더를 나열하고 download_url로 파일을 내려받는 소스.
+    api_url을 바꾸면 로컬 HTTP 대역(stand-in) 서버를 대신 사용할 수 있습니다.
+    """
+
+    def __init__(self, api_url: str, token: Optional[str] = None,
+                 session: Optional[requests.Session] = None,
+                 timeout=DEFAULT_TIMEOUT, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.headers = {"Accept": "application/vnd.github.v3+json"}
+        if token:
+            self.headers["Authorization"] = f"token {token}"
+        self._owns_session = session is None
+        self.session = session or make_session(max_workers=max_workers)
+
+    def _get(self, url: str, etag: Optional[str] = None):
+        """GET 요청을 보내고 (응답, ETag)를 돌려줍니다. 304면 응답 대신 None을 돌려줍니다."""
+        headers = self.headers
+        if etag:
+            headers = {**headers, "If-None-Match": etag}
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+        return response, response.headers.get("ETag")
+
+    def list_files(self) -> List[CorpusFile]:
+        return self.list_files_if_changed()[0]
+
+    def list_files_if_changed(self, etag: Optional[str] = None):
+        response, new_etag = self._get(self.api_url, etag)
+        if response is None:
+            return None, new_etag
+        files = [
+            CorpusFile(info['name'], info['download_url'], info.get('sha', ""))
+            for info in response.json()
+            if info['type'] == 'file' and info['name'].endswith('.json')
+        ]
+        return files, new_etag
+
+    def fetch(self, file: CorpusFile):
+        return self.fetch_if_changed(file)[0]
+
+    def fetch_if_changed(self, file: CorpusFile, etag: Optional[str] = None):
+        response, new_etag = self._get(file.url, etag)
+        if response is None:
+            return NOT_MODIFIED, new_etag
+        # UTF-8 인코딩을 명시하여 한글 깨짐 방지
+        response.encoding = 'utf-8'
+        return response.json(), new_etag
+
+    def close(self) -> None:
+        if self._owns_session:
+            self.session.close()
+
+
+class LocalDirectorySource(CorpusSource):
+    """로컬 폴더의 .json 파일들을 읽는 소스 (테스트, 벤치마크, 오프라인 실행용)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def list_files(self) -> List[CorpusFile]:
+        files = []
+        for name in sorted(n for n in os.listdir(self.path) if n.endswith('.json')):
+            file_path = os.path.join(self.path, name)
+            stat = os.stat(file_path)
+            # 수정 시각과 크기로 변경 여부를 판단 (내용 해시 대신 값싼 식별자)
+            files.append(CorpusFile(name, file_path, f"{stat.st_mtime_ns}-{stat.st_size}"))
+        return files
+
+    def fetch(self, file: CorpusFile):
+        with open(file.url, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def fetch_sentences(source: CorpusSource, max_workers: int = DEFAULT_MAX_WORKERS,
+                    on_warning: Optional[Callable[[str], None]] = None) -> List[dict]:
+    """
+    소스의 모든 .json 파일을 워커 풀로 동시에 내려받아 하나의 리스트로 합칩니다.
+    병합 순서는 완료 순서가 아니라 파일 목록 순서를 따르므로 재할당되는 id가 항상 같습니다.
+    네트워크 오류는 그대로 전파하고, 형식이 잘못된 파일은 on_warning으로 알린 뒤 건너뜁니다.
+    """
+    warn = on_warning or (lambda message: None)
+    files = source.list_files()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files) or 1))) as pool:
+        # map은 입력 순서대로 결과를 돌려줌
+        results = list(pool.map(_fetch_one, [source] * len(files), files))
+
+    all_sentences = []
+    for file_info, (sentences_in_file, error, _) in zip(files, results):
+        if _check_file_content(file_info, sentences_in_file, error, warn):
+            all_sentences.extend(sentences_in_file)
+
+    # 모든 문장을 합친 후, ID를 1부터 순서대로 재할당
+    for i, sentence in enumerate(all_sentences):
+        sentence['id'] = i + 1
+    return all_sentences
+
+
+def _fetch_one(source: CorpusSource, file_info: CorpusFile, etag: Optional[str] = None):
+    """
+    파일 하나를 (etag가 있으면 조건부로) 가져와 (내용, JSON 오류, 새 ETag)를 돌려줍니다.
+    네트워크 오류는 전파합니다.
+    """
+    try:
+        content, new_etag = source.fetch_if_changed(file_info, etag)
+        return content, None, new_etag
+    except json.JSONDecodeError as e:
+        # requests.exceptions.JSONDecodeError도 json.JSONDecodeError의 하위 클래스
+        return None, e, None
+
+
+def _check_file_content(file_info: CorpusFile, content, error, warn: Callable[[str], None]) -> bool:
+    """파일 내용이 문장 리스트로 쓸 수 있는지 확인하고, 아니면 경고를 남깁니다."""
+    if error is not None:
+        warn(f"'{file_info.name}' 파일의 JSON 형식이 올바르지 않습니다. 건너뜁니다.")
+        return False
+    if not isinstance(content, list):
+        warn(f"'{file_info.name}' 파일이 리스트 형태가 아닙니다. 건너뜁니다.")
+        return False
+    return True
+
+
+class _FileEntry(NamedTuple):
+    """갱신기가 파일별로 기억하는 상태. sentences가 None이면 형식 오류로 건너뛴 파일입니다."""
+    sha: str
+    etag: Optional[str]
+    sentences: Optional[list]
+
+
+class CorpusRefresher:
+    """
+    stale-while-revalidate 방식으로 문장 데이터를 관리합니다.
+
+    - get()은 항상 현재 문장 리스트를 즉시 돌려주고, TTL이 지났으면 백그라운드 스레드에서 다시 확인합니다.
+    - 다시 확인할 때는 목록의 sha가 바뀐 파일만 (ETag 조건부 요청으로) 내려받습니다.
+    - 새 SentenceCorpus는 완성된 뒤 참조 교체 한 번으로 바꿔 끼우므로, 읽는 쪽은 항상 완전한 모음을 봅니다.
+    - 스냅샷 파일을 남겨 프로세스를 다시 시작해도 네트워크 왕복 없이 바로 응답합니다.
+    """
+
+    def __init__(self, source: CorpusSource, ttl: float = DEFAULT_TTL,
+                 snapshot_path: Optional[str] = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 retry_interval: float = DEFAULT_RETRY_INTERVAL):
+        self.source = source
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.max_workers = max_workers
+        self.retry_interval = retry_interval
+        self.last_error: Optional[Exception] = None
+
+        self._order: List[str] = []
+        self._entries: Dict[str, _FileEntry] = {}
+        self._list_etag: Optional[str] = None
+        self._corpus = SentenceCorpus.from_records([])
+        self._next_refresh_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+        if snapshot_path:
+            self._load_snapshot()
+
+    @property
+    def corpus(self) -> SentenceCorpus:
+        return self._corpus
+
+    def is_stale(self) -> bool:
+        return time.time() >= self._next_refresh_at
+
+    def get(self, on_warning: Optional[Callable[[str], None]] = None) -> SentenceCorpus:
+        """
+        현재 문장 모음을 돌려줍니다. 데이터가 전혀 없을 때만 호출한 쪽에서 동기적으로 내려받으며,
+        이때의 네트워크 오류는 호출한 쪽으로 전파됩니다.
+        """
+        if not self._corpus:
+            with self._refresh_lock:
+                # 기다리는 동안 다른 세션이 먼저 받아 왔을 수 있음
+                if not self._corpus:
+                    self._refresh_locked(on_warning)
+        elif self.is_stale():
+            self.refresh_in_background()
+        return self._corpus
+
+    @traced("corpus_refresh")
+    def refresh(self, on_warning: Optional[Callable[[str], None]] = None) -> bool:
+        """지금 바로 다시 확인합니다. 문장 데이터가 바뀌었으면 True를 돌려줍니다."""
+        with self._refresh_lock:
+            return self._refresh_locked(on_warning)
+
+    def refresh_in_background(self) -> bool:
+        """백그라운드 갱신을 시작합니다. 이미 갱신 중이면 아무것도 하지 않고 False를 돌려줍니다."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        thread = threading.Thread(target=self._background_refresh, name="corpus-refresh", daemon=True)
+        try:
+            thread.start()
+        except Exception:
+            self._refresh_lock.release()
+            raise
+        return True
+
+    def _background_refresh(self) -> None:
+        try:
+            self._refresh_locked(lambda message: print(f"CORPUS_REFRESH: {message}"))
+        except Exception as e:
+            # 기존 데이터를 계속 제공하고, 잠시 뒤 다시 시도
+            print(f"CORPUS_REFRESH: Refresh failed, serving previous corpus; {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_locked(self, on_warning: Optional[Callable[[str], None]]) -> bool:
+        warn = on_warning or (lambda message: None)
+        try:
+            files, list_etag = self.source.list_files_if_changed(self._list_etag if self._corpus else None)
+            if files is None:
+                # 목록 자체가 그대로이므로 어떤 파일도 바뀌지 않음
+                self._next_refresh_at = time.time() + self.ttl
+                self.last_error = None
+                return False
+
+            old_entries = self._entries
+            to_fetch = [
+                f for f in files
+                if f.name not in old_entries or not f.sha or old_entries[f.name].sha != f.sha
+            ]
+            workers = max(1, min(self.max_workers, len(to_fetch) or 1))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    lambda f: _fetch_one(self.source, f, old_entries[f.name].etag if f.name in old_entries else None),
+                    to_fetch,
+                ))
+        except Exception as e:
+            self.last_error = e
+            self._next_refresh_at = time.time() + self.retry_interval
+            raise
+
+        fetched = dict(zip((f.name for f in to_fetch), results))
+        new_entries: Dict[str, _FileEntry] = {}
+        for file_info in files:
+            if file_info.name not in fetched:
+                new_entries[file_info.name] = old_entries[file_info.name]
+                continue
+            content, error, etag = fetched[file_info.name]
+            if content is NOT_MODIFIED:
+                new_entries[file_info.name] = old_entries[file_info.name]._replace(sha=file_info.sha)
+            elif _check_file_content(file_info, content, error, warn):
+                new_entries[file_info.name] = _FileEntry(file_info.sha, etag, content)
+            else:
+                new_entries[file_info.name] = _FileEntry(file_info.sha, None, None)
+
+        order = [f.name for f in files]
+        changed = (order != self._order or
+                   any(new_entries[name].sentences is not old_entries.get(name, _FileEntry("", None, None)).sentences
+                       for name in order))
+        if changed:
+            corpus = _merge_entries(order, new_entries)
+            # 완성된 모음을 참조 교체 한 번으로 바꿔 끼움
+            self._order, self._entries, self._corpus = order, new_entries, corpus
+        else:
+            self._entries = new_entries
+        self._list_etag = list_etag
+        self._next_refresh_at = time.time() + self.ttl
+        self.last_error = None
+
+        if changed and self.snapshot_path:
+            self._save_snapshot()
+        return changed
+
+    def _load_snapshot(self) -> None:
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                return
+            order = [item["name"] for item in snapshot["files"]]
+            entries = {
+                item["name"]: _FileEntry(item["sha"], item.get("etag"), item.get("sentences"))
+                for item in snapshot["files"]
+            }
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"CORPUS_REFRESH: Ignoring unreadable snapshot {self.snapshot_path}; {e}")
+            return
+
+        self._order, self._entries = order, entries
+        self._list_etag = snapshot.get("list_etag")
+        self._corpus = _merge_entries(order, entries)
+        # 스냅샷을 저장한 시점을 기준으로 TTL을 계산
+        self._next_refresh_at = snapshot.get("saved_at", 0.0) + self.ttl
+
+    def _save_snapshot(self) -> None:
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "list_etag": self._list_etag,
+            "files": [
+                {"name": name, "sha": entry.sha, "etag": entry.etag, "sentences": entry.sentences}
+                for name in self._order
+                for entry in [self._entries[name]]
+            ],
+        }
+        directory = os.path.dirname(self.snapshot_path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # 임시 파일에 쓴 뒤 교체하여, 중간에 죽어도 깨진 스냅샷이 남지 않게 함
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".corpus_snapshot.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"CORPUS_REFRESH: Could not write snapshot {self.snapshot_path}; {e}")
+
+
+def _merge_entries(order: List[str], entries: Dict[str, _FileEntry]) -> SentenceCorpus:
+    """파일 순서대로 문장을 합쳐 id를 1부터 재할당한 SentenceCorpus를 만듭니다. 원본 dict는 건드리지 않습니다."""
+    merged = []
+    for name in order:
+        sentences = entries[name].sentences
+        if sentences:
+            merged.extend(sentences)
+    return SentenceCorpus.from_records({**sentence, 'id': i + 1} for i, sentence in enumerate(merged))
+
+
+def get_default_source() -> CorpusSource:
+    """앱이 사용하는 기본 소스(비공개 GitHub 레포지토리)를 만듭니다."""
     github_token = st.secrets["github"]["token"]
 
     repo_owner = "yun6160"
     repo_name = "Learn-Speaking-Json"
 
     api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/contents/"
+    return GitHubSource(api_url, token=github_token)
+
+
+@st.cache_resource
+def get_corpus_refresher() -> CorpusRefresher:
+    """프로세스 전체가 공유하는 문장 데이터 갱신기"""
+    return CorpusRefresher(get_default_source(), ttl=DEFAULT_TTL, snapshot_path=DEFAULT_SNAPSHOT_PATH)
+
+
+@st.cache_resource(max_entries=2)
+def _open_binary_corpus(path: str, mtime_ns: int) -> MappedCorpus:
+    return MappedCorpus(path)
 
-    headers = {
-        "Authorization": f"token {github_token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
 
+def load_binary_corpus(path: str) -> MappedCorpus:
+    """
+    바이너리 문장 모음을 프로세스 전체가 공유하도록 한 번만 매핑합니다.
+    파일이 새로 컴파일되어 교체되면(수정 시각이 바뀌면) 다시 매핑합니다.
+    """
+    return _open_binary_corpus(path, os.stat(path).st_mtime_ns)
+
+
+# 이 함수는 이제 여러 JSON 파일을 불러와 하나로 합치는 역할을 합니다.
+@traced("load_data")
+def load_data_from_github() -> SentenceCorpus:
+    """
+    비공개 GitHub 레포지토리의 특정 폴더에서 모든 .json 파일을 가져와
+    하나의 SentenceCorpus로 합친 후, id를 재정렬하여 반환합니다.
+    반환된 모음은 모든 세션이 공유하는 읽기 전용 객체이므로 세션 상태에 복사하지 않습니다.
+    이미 받아 둔 데이터(또는 스냅샷)가 있으면 바로 반환하고, 오래됐으면 백그라운드에서 갱신합니다.
+    LEARN_SPEAKING_CORPUS_BIN이 지정되어 있으면 GitHub 대신 그 바이너리 문장 모음(MappedCorpus)을 반환합니다.
+    """
     try:
-        # 1. 폴더 안의 파일 목록 가져오기
-        response = requests.get(api_url, headers=headers)
-        response.raise_for_status()
-        files = response.json()
+        binary_path = os.environ.get(BINARY_CORPUS_ENV)
+        if binary_path:
+            corpus = load_binary_corpus(binary_path)
+        else:
+            corpus = get_corpus_refresher().get(on_warning=st.warning)
 
-        all_sentences = []
-        
-        # 2. 각 파일의 내용을 순회하며 가져오기
-        for file_info in files:
-            # .json 파일만 대상으로 함
-            if file_info['type'] == 'file' and file_info['name'].endswith('.json'):
-                file_url = file_info['download_url']
-                
-                file_response = requests.get(file_url, headers=headers)
-                file_response.raise_for_status()
-                
-                # UTF-8 인코딩을 명시하여 한글 깨짐 방지
-                file_response.encoding = 'utf-8'
-                
-                try:
-                    # 각 JSON 파일의 내용을 리스트에 추가
-                    sentences_in_file = file_response.json()
-                    if isinstance(sentences_in_file, list):
-                        all_sentences.extend(sentences_in_file)
-                    else:
-                        st.warning(f"'{file_info['name']}' 파일이 리스트 형태가 아닙니다. 건너뜁니다.")
-                except json.JSONDecodeError:
-                    st.warning(f"'{file_info['name']}' 파일의 JSON 형식이 올바르지 않습니다. 건너뜁니다.")
-
-        # 3. 모든 문장을 합친 후, ID를 1부터 순서대로 재할당
-        for i, sentence in enumerate(all_sentences):
-            sentence['id'] = i + 1
-            
-        if not all_sentences:
+        if not corpus:
             st.error("GitHub에서 문장 데이터를 가져오지 못했거나, JSON 파일이 없습니다.")
             st.stop()
-            
-        return all_sentences
+
+        return corpus
 
     except requests.exceptions.RequestException as e:
         st.error(f"비공개 GitHub에서 데이터를 로드하는 중 오류가 발생했습니다: {e}")
@@ -0,0 +1,96 @@
+import random
+from typing import Dict, Optional
+
+from core.corpus import SentenceCorpus
+
+
+class ShuffleBag:
+    """
+    0 .. size-1 을 겹치지 않게 하나씩 무작위로 뽑는 셔플 가방.
+
+    피셔-예이츠 셔플을 한 단계씩 진행하되, 자리를 옮긴 값만 dict에 기록합니다(희소 셔플).
+    그래서 뽑기 한 번은 O(1)이고, 메모리는 카테고리 크기가 아니라 지금까지 뽑은 횟수에 비례합니다.
+    가방을 다 비우면 새로 섞으며, 새 가방의 첫 문장이 직전 문장과 같지 않도록 합니다.
+    peek()으로 다음에 나올 값을 미리 볼 수 있고, 이어지는 draw()는 그 값을 그대로 돌려줍니다.
+    """
+    __slots__ = ("size", "_rng", "_position", "_swapped", "_last", "_pending")
+
+    def __init__(self, size: int, rng: Optional[random.Random] = None):
+        self.size = size
+        self._rng = rng or random.Random()
+        self._position = 0
+        self._swapped: Dict[int, int] = {}
+        self._last = -1
+        self._pending: Optional[int] = None
+
+    @property
+    def remaining(self) -> int:
+        return self.size - self._position + (self._pending is not None)
+
+    def peek(self) -> int:
+        """다음 draw()가 돌려줄 값을 미리 뽑아 둡니다."""
+        if self._pending is None:
+            self._pending = self._draw()
+        return self._pending
+
+    def draw(self) -> int:
+        if self._pending is not None:
+            value, self._pending = self._pending, None
+            return value
+        return self._draw()
+
+    def _draw(self) -> int:
+        if self.size <= 0:
+            raise IndexError("빈 가방에서 뽑을 수 없습니다.")
+        if self._position >= self.size:
+            self._position = 0
+            self._swapped.clear()
+
+        rng, swapped, i = self._rng, self._swapped, self._position
+        j = rng.randrange(i, self.size)
+        value = swapped.get(j, j)
+        if j != i:
+            swapped[j] = swapped.pop(i, i)
+        else:
+            swapped.pop(i, None)
+
+        if i == 0 and value == self._last and self.size > 1:
+            # 새 가방의 첫 문장이 직전 문장과 같으면 남은 자리 중 하나와 맞바꿈
+            k = rng.randrange(1, self.size)
+            value, swapped[k] = swapped.get(k, k), value
+
+        self._position += 1
+        self._last = value
+        return value
+
+
+class SentencePicker:
+    """
+    세션마다 하나씩 두는 문장 선택기.
+    카테고리별 셔플 가방을 유지하여, 카테고리를 한 바퀴 다 돌기 전에는 같은 문장이 다시 나오지 않습니다.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self._rng = rng or random.Random()
+        self._bags: Dict[str, ShuffleBag] = {}
+
+    def next_index(self, corpus: SentenceCorpus, category: Optional[str]) -> int:
+        """카테고리에서 다음 문장의 위치를 돌려줍니다. 문장이 없으면 -1을 돌려줍니다."""
+        indices = corpus.indices_for(category)
+        if not indices:
+            return -1
+        return indices[self._bag_for(category, len(indices)).draw()]
+
+    def peek_index(self, corpus: SentenceCorpus, category: Optional[str]) -> int:
+        """next_index가 다음에 돌려줄 위치를 미리 봅니다 (선택은 확정하지 않음). 문장이 없으면 -1."""
+        indices = corpus.indices_for(category)
+        if not indices:
+            return -1
+        return indices[self._bag_for(category, len(indices)).peek()]
+
+    def _bag_for(self, category: Optional[str], size: int) -> ShuffleBag:
+        bag = self._bags.get(category)
+        if bag is None or bag.size != size:
+            # 처음 고른 카테고리이거나 문장 모음이 갱신되어 크기가 바뀐 경우
+            bag = self._bags[category] = ShuffleBag(size, self._rng)
+        return bag
@@ -0,0 +1,273 @@
+import atexit
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from core.attempts import Attempt, AttemptStore
+from core.lru import LRUCache
+from core.picker import SentencePicker
+from core.tracing import tracer
+
+# 유사도(compare_answers 점수, 0~1)에 따른 복습 등급. 앱의 피드백 문구와 같은 경계를 씁니다.
+GOOD_SCORE = 0.9
+PASS_SCORE = 0.7
+# 다음 복습까지의 간격(초): 틀린 문장은 1분 뒤, 처음 맞히면 10분 뒤, 두 번 연속 맞히면 하루 뒤,
+# 그 뒤로는 직전 간격 × ease
+RELEARN_INTERVAL = 60.0
+FIRST_INTERVAL = 10 * 60.0
+SECOND_INTERVAL = 24 * 3600.0
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# 새 문장을 고를 때 이미 복습 중인 문장이 나오면 다시 뽑는 최대 횟수
+NEW_SENTENCE_ATTEMPTS = 16
+# 복습 상태를 메모리에 들고 있는 사용자 수의 상한 (밀려난 사용자는 다음에 기록에서 다시 만듦)
+DEFAULT_MAX_USERS = 1000
+
+# 힙 항목: (다음 복습 시각, 항목 번호, 문장 키)
+_Entry = Tuple[float, int, int]
+
+
+class ReviewState:
+    """문장 하나에 대한 사용자의 복습 상태 (SM-2를 단순화한 방식)"""
+    __slots__ = ("key", "category", "reps", "interval", "ease", "due", "last_score", "entry")
+
+    def __init__(self, key: int, category: Optional[str]):
+        self.key = key
+        self.category = category
+        self.reps = 0
+        self.interval = 0.0
+        self.ease = INITIAL_EASE
+        self.due = 0.0
+        self.last_score = 0.0
+        # 힙에 들어 있는 이 문장의 유효한 항목 번호 (그보다 오래된 항목은 지연 삭제 대상)
+        self.entry = 0
+
+    def review(self, score: float, now: float) -> None:
+        """답변 점수로 다음 복습 시각을 정합니다."""
+        self.last_score = score
+        if score < PASS_SCORE:
+            self.reps = 0
+            self.interval = RELEARN_INTERVAL
+            self.ease = max(MIN_EASE, self.ease - 0.2)
+        else:
+            self.reps += 1
+            if self.reps == 1:
+                self.interval = FIRST_INTERVAL
+            elif self.reps == 2:
+                self.interval = SECOND_INTERVAL
+            else:
+                self.interval *= self.ease
+            if score < GOOD_SCORE:
+                # 통과했지만 어려웠던 문장은 간격이 덜 늘어나도록
+                self.ease = max(MIN_EASE, self.ease - 0.15)
+        self.due = now + self.interval
+
+
+class UserSchedule:
+    """
+    사용자 한 명의 복습 상태. 문장은 문장 키(core.corpus.sentence_key)로 가리킵니다.
+
+    카테고리마다 다음 복습 시각을 키로 하는 최소 힙을 두므로, 가장 먼저 복습할 문장을 찾는 데
+    O(log n)이 듭니다. 다시 답한 문장은 힙에서 찾아 지우지 않고 새 항목을 넣은 뒤, 오래된 항목은
+    꺼낼 때 건너뜁니다(지연 삭제). 오래된 항목이 절반을 넘으면 힙을 다시 만듭니다.
+    """
+
+    def __init__(self):
+        self._states: Dict[int, ReviewState] = {}
+        self._heaps: Dict[Optional[str], List[_Entry]] = {}
+        self._stale: Dict[Optional[str], int] = {}
+        self._next_entry = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._states
+
+    def state(self, key: int) -> Optional[ReviewState]:
+        return self._states.get(key)
+
+    def record(self, key: int, category: Optional[str], score: float, now: float) -> ReviewState:
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = ReviewState(key, category)
+            else:
+                self._mark_stale(state.category)
+                # 문장 모음이 갱신되어 카테고리가 바뀌었을 수 있음
+                state.category = category
+            state.review(score, now)
+            self._push(state)
+            return state
+
+    def forget(self, key: int) -> None:
+        """문장 모음에서 사라진 문장의 상태를 지웁니다. 힙 항목은 꺼낼 때 건너뜁니다."""
+        with self._lock:
+            state = self._states.pop(key, None)
+            if state is not None:
+                self._mark_stale(state.category)
+
+    def earliest(self, category: Optional[str], exclude: Optional[int] = None) -> Optional[ReviewState]:
+        """카테고리에서 가장 먼저 복습할 문장의 상태. exclude(문장 키)는 건너뜁니다."""
+        with self._lock:
+            heap = self._heaps.get(category)
+            if not heap:
+                return None
+            top = self._top(category)
+            if top is None or top[2] != exclude:
+                return None if top is None else self._states[top[2]]
+            # 제외할 문장을 잠시 꺼내고 그다음 항목을 봄
+            held = heapq.heappop(heap)
+            second = self._top(category)
+            heapq.heappush(heap, held)
+            return None if second is None else self._states[second[2]]
+
+    def _top(self, category: Optional[str]) -> Optional[_Entry]:
+        """힙 맨 위의 오래된 항목들을 버리고 유효한 첫 항목을 돌려줍니다."""
+        heap = self._heaps[category]
+        while heap:
+            due, entry, key = heap[0]
+            state = self._states.get(key)
+            if state is not None and state.entry == entry:
+                return heap[0]
+            heapq.heappop(heap)
+            if self._stale.get(category):
+                self._stale[category] -= 1
+        return None
+
+    def _push(self, state: ReviewState) -> None:
+        self._next_entry += 1
+        state.entry = self._next_entry
+        heap = self._heaps.setdefault(state.category, [])
+        heapq.heappush(heap, (state.due, state.entry, state.key))
+        if self._stale.get(state.category, 0) * 2 > len(heap):
+            self._compact(state.category)
+
+    def _mark_stale(self, category: Optional[str]) -> None:
+        self._stale[category] = self._stale.get(category, 0) + 1
+
+    def _compact(self, category: Optional[str]) -> None:
+        heap = [
+            item for item in self._heaps[category]
+            if item[2] in self._states and self._states[item[2]].entry == item[1]
+        ]
+        heapq.heapify(heap)
+        self._heaps[category] = heap
+        self._stale[category] = 0
+
+
+class ReviewScheduler:
+    """
+    간격 반복 복습 모드의 문장 선택기. 프로세스 전체가 하나를 공유합니다.
+
+    - record()는 답변 점수를 사용자의 복습 상태에 반영하고, 기록을 AttemptStore에 맡깁니다
+      (디스크에는 나중에 모아서 씀).
+    - next_index()는 복습할 때가 된 문장이 있으면 가장 오래 기다린 문장을, 없으면 세션의
+      SentencePicker로 아직 답한 적 없는 새 문장을 고릅니다. 새 문장도 없으면 가장 먼저
+      복습할 문장을 앞당겨 고릅니다.
+    - 사용자 상태는 LRU로 max_users명까지만 메모리에 두고, 밀려나면 기록에서 다시 만듭니다.
+
+    기록과 상태는 한국어 문장에서 만든 문장 키로 남고, 쓸 때마다 지금 문장 모음의 위치로 찾으므로
+    문장 파일이 추가/삭제되어 id가 다시 매겨져도 같은 문장을 가리킵니다. 한국어 문장이 같은 문장들은
+    기록을 함께 씁니다.
+    """
+
+    def __init__(self, store: Optional[AttemptStore] = None, max_users: int = DEFAULT_MAX_USERS):
+        self.store = store
+        self._users = LRUCache(max_users)
+        # 사용자마다 상태를 한 번만 불러오도록 하는 잠금 (다른 사용자의 불러오기는 기다리지 않음)
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    @property
+    def users(self) -> LRUCache:
+        return self._users
+
+    def schedule_for(self, user_id: str, corpus) -> UserSchedule:
+        schedule = self._users.get(user_id)
+        if schedule is None:
+            with self._lock:
+                load_lock = self._load_locks.setdefault(user_id, threading.Lock())
+            try:
+                with load_lock:
+                    # 기다리는 동안 같은 사용자의 다른 세션이 먼저 만들었을 수 있음
+                    schedule = self._users.get(user_id)
+                    if schedule is None:
+                        schedule = self._load(user_id, corpus)
+                        self._users.put(user_id, schedule)
+            finally:
+                with self._lock:
+                    if self._load_locks.get(user_id) is load_lock:
+                        del self._load_locks[user_id]
+        return schedule
+
+    def record(self, user_id: str, corpus, index: int, score: float,
+               now: Optional[float] = None) -> ReviewState:
+        """corpus[index] 문장에 대한 답변 점수(0~1)를 기록합니다."""
+        now = time.time() if now is None else now
+        key = corpus.key_of(index)
+        state = self.schedule_for(user_id, corpus).record(key, corpus.category_of(index), score, now)
+        if self.store is not None:
+            self.store.record(Attempt(user_id, key, score, now))
+        return state
+
+    def next_index(self, user_id: str, corpus, category: Optional[str], picker: SentencePicker,
+                   exclude: int = -1, now: Optional[float] = None, peek: bool = False) -> int:
+        """
+        다음에 연습할 문장의 위치를 돌려줍니다. 고를 문장이 없으면 -1.
+        exclude(지금 보고 있는 문장의 위치)는 바로 다시 고르지 않습니다.
+        peek=True면 새 문장을 picker에서 미리 보기만 하므로 선택이 확정되지 않습니다 (음성 미리 합성용).
+        """
+        now = time.time() if now is None else now
+        schedule = self.schedule_for(user_id, corpus)
+        exclude_key = corpus.key_of(exclude) if 0 <= exclude < len(corpus) else None
+
+        due = self._earliest_valid(schedule, corpus, category, exclude_key)
+        if due is not None and due[0].due <= now:
+            return due[1]
+
+        for _ in range(NEW_SENTENCE_ATTEMPTS):
+            index = picker.peek_index(corpus, category) if peek else picker.next_index(corpus, category)
+            if index == -1:
+                return -1
+            if peek or (index != exclude and corpus.key_of(index) not in schedule):
+                return index
+        # 새 문장이 (거의) 남지 않았으면 복습을 앞당김. 복습할 문장도 없으면 지금 문장이나
+        # 이미 답한 문장을 새 문장처럼 돌려주지 않고 -1
+        return due[1] if due is not None else -1
+
+    @staticmethod
+    def _earliest_valid(schedule: UserSchedule, corpus, category: Optional[str],
+                        exclude_key: Optional[int]) -> Optional[Tuple[ReviewState, int]]:
+        while True:
+            state = schedule.earliest(category, exclude_key)
+            if state is None:
+                return None
+            index = corpus.index_of_key(state.key)
+            if index != -1 and corpus.category_of(index) == category:
+                return state, index
+            schedule.forget(state.key)
+
+    def _load(self, user_id: str, corpus) -> UserSchedule:
+        schedule = UserSchedule()
+        if self.store is not None:
+            for attempt in self.store.history(user_id):
+                index = corpus.index_of_key(attempt.sentence_key)
+                if index != -1:
+                    schedule.record(attempt.sentence_key, corpus.category_of(index), attempt.score,
+                                    attempt.answered_at)
+        return schedule
+
+
+@st.cache_resource
+def get_scheduler() -> ReviewScheduler:
+    """프로세스 전체가 공유하는 복습 스케줄러. 종료할 때 남은 답변 기록을 모두 씁니다."""
+    store = AttemptStore()
+    atexit.register(store.close)
+    scheduler = ReviewScheduler(store)
+    tracer.register_cache("review_schedules", lambda: (scheduler.users.hits, scheduler.users.misses))
+    return scheduler
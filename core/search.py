@@ -0,0 +1,232 @@
+import difflib
+import heapq
+import sys
+import threading
+import weakref
+from array import array
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from core.checker import _best_candidate, _calculate_ratio, _clean_text
+from core.tracing import traced, tracer
+
+# 한 번에 trigram으로 바꾸는 정답 수 (색인을 만들 때 임시 배열의 크기를 제한)
+_BUILD_CHUNK_ANSWERS = 50000
+# 정답과 정답 사이에 넣는 구분 문자. _clean_text의 결과에는 나오지 않음
+_SEPARATOR = "\x00"
+# 전체 정답 중 이 비율보다 많이 나오는 흔한 trigram(" th", "the" 등)은 후보를 고를 때 건너뜀
+DEFAULT_MAX_POSTINGS_RATIO = 0.05
+# 흔한 trigram만 있는 짧은 발화라도, 가장 드문 것부터 이만큼은 씀
+MIN_QUERY_GRAMS = 3
+# SequenceMatcher로 다시 채점할 후보 정답 수
+DEFAULT_CANDIDATES = 20
+
+
+class SearchHit(NamedTuple):
+    """자유 말하기 검색 결과 하나. score는 compare_answers와 같은 유사도(0~1)입니다."""
+    index: int
+    score: float
+    best_match: str
+
+
+def _trigrams(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    문자열의 모든 위치에서 시작하는 문자 trigram을 (코드 포인트 3개를 21비트씩 붙인) 정수로 바꾸고,
+    구분 문자가 끼지 않은 trigram인지를 나타내는 배열과 함께 돌려줍니다.
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < 3:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=bool)
+    grams = (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+    valid = (codes[:-2] != 0) & (codes[1:-1] != 0) & (codes[2:] != 0)
+    return grams, valid
+
+
+def _padded(cleaned: str) -> str:
+    # 단어 경계도 trigram에 들어가도록 앞뒤에 공백을 붙임
+    return f" {cleaned} "
+
+
+class TrigramIndex:
+    """
+    모든 정제된 정답(cleaned_english_of)에 대한 문자 trigram 역색인.
+
+    - trigram → 그 trigram을 가진 정답 번호 목록(posting)을 CSR 형태의 NumPy 배열 하나에 담습니다.
+    - 검색할 때는 발화의 trigram 중 드문 것들의 posting만 모아, 공유 trigram 수로 만든 Dice 계수가
+      높은 정답 candidates개를 고릅니다. 흔한 trigram은 건너뛰므로 문장 모음 전체를 훑지 않습니다.
+    - 후보 문장들은 compare_answers와 같은 SequenceMatcher 점수로 다시 채점해 순서를 정합니다.
+    - 정제한 정답은 만들 때 문장 모음의 iter_cleaned_english()로 한 번만 읽어 문자열 하나에 이어 붙여 두고,
+      다시 채점할 때도 그것을 씁니다 (문장 모음의 정제 결과 LRU 캐시를 밀어내지 않음).
+    """
+
+    def __init__(self, corpus, max_postings_ratio: float = DEFAULT_MAX_POSTINGS_RATIO):
+        # 색인은 문장 모음을 키로 하는 약한 참조 캐시에 들어가므로, 모음을 붙잡지 않도록 약한 참조로 둠
+        self.corpus = weakref.proxy(corpus)
+
+        grams, owners, parts = [], [], []
+        answer_counts = np.zeros(len(corpus), dtype=np.int64)
+        lengths = array('q')
+        chunk: List[str] = []
+        first_answer = 0
+        for index, cleaned_answers in enumerate(corpus.iter_cleaned_english()):
+            answer_counts[index] = len(cleaned_answers)
+            chunk.extend(cleaned_answers)
+            if len(chunk) >= _BUILD_CHUNK_ANSWERS or index == len(corpus) - 1:
+                chunk_grams, chunk_owners = self._chunk_pairs([_padded(answer) for answer in chunk], first_answer)
+                grams.append(chunk_grams)
+                owners.append(chunk_owners)
+                parts.append(_SEPARATOR.join(chunk))
+                lengths.extend(len(answer) + 1 for answer in chunk)
+                first_answer += len(chunk)
+                chunk = []
+
+        self.answers = first_answer
+        self.max_postings = max(1, int(self.answers * max_postings_ratio))
+        self._answer_sentence = np.repeat(np.arange(len(corpus), dtype=np.uint32), answer_counts)
+        # 문장 i의 정답 번호는 _first_answer[i]부터 _first_answer[i + 1] 전까지
+        self._first_answer = np.concatenate(([0], np.cumsum(answer_counts))).tolist()
+        # 정답 a는 _cleaned[_answer_starts[a]:_answer_starts[a + 1] - 1] (정답마다 구분 문자 하나가 붙음)
+        self._cleaned = _SEPARATOR.join(parts)
+        self._answer_starts = np.concatenate(([0], np.cumsum(np.frombuffer(lengths, dtype=np.int64))))
+
+        gram_codes = np.concatenate(grams) if grams else np.empty(0, dtype=np.uint64)
+        answer_ids = np.concatenate(owners) if owners else np.empty(0, dtype=np.uint32)
+        # (trigram, 정답) 순으로 정렬하고 정답 안에서 겹치는 trigram은 하나만 남김
+        order = np.lexsort((answer_ids, gram_codes))
+        gram_codes, answer_ids = gram_codes[order], answer_ids[order]
+        unique = np.ones(len(gram_codes), dtype=bool)
+        unique[1:] = (gram_codes[1:] != gram_codes[:-1]) | (answer_ids[1:] != answer_ids[:-1])
+        gram_codes, answer_ids = gram_codes[unique], answer_ids[unique]
+
+        self._grams, starts = np.unique(gram_codes, return_index=True)
+        self._starts = np.append(starts, len(gram_codes)).astype(np.int64)
+        self._postings = answer_ids
+        self._answer_grams = np.bincount(answer_ids, minlength=self.answers).astype(np.int32)
+
+    def _answer(self, answer_id: int) -> str:
+        """정답 번호의 정제된 정답"""
+        return self._cleaned[int(self._answer_starts[answer_id]):int(self._answer_starts[answer_id + 1]) - 1]
+
+    def _cleaned_answers(self, index: int) -> List[str]:
+        """문장의 정제된 정답들 (cleaned_english_of와 같은 순서)"""
+        return [self._answer(answer_id)
+                for answer_id in range(self._first_answer[index], self._first_answer[index + 1])]
+
+    @staticmethod
+    def _chunk_pairs(texts: Sequence[str], first_answer: int):
+        """정답 여러 개의 (trigram, 정답 번호) 쌍을 한 번에 만듭니다."""
+        grams, valid = _trigrams(_SEPARATOR.join(texts))
+        # 구분 문자까지 포함한 각 정답의 길이만큼 정답 번호를 반복하면, trigram 시작 위치의 정답 번호가 됨
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        owners = np.repeat(np.arange(first_answer, first_answer + len(texts), dtype=np.uint32), lengths)
+        return grams[valid], owners[:len(grams)][valid]
+
+    @property
+    def nbytes(self) -> int:
+        columns = (self._grams, self._starts, self._postings, self._answer_grams,
+                   self._answer_sentence, self._answer_starts)
+        return sum(column.nbytes for column in columns) + sys.getsizeof(self._cleaned)
+
+    def candidate_answers(self, cleaned: str, candidates: int = DEFAULT_CANDIDATES) -> np.ndarray:
+        """정제된 발화와 trigram을 가장 많이 공유하는 정답 번호들 (Dice 계수가 높은 순서)"""
+        grams, valid = _trigrams(_padded(cleaned))
+        query = np.unique(grams[valid])
+        if not len(query) or not len(self._grams):
+            return np.empty(0, dtype=np.uint32)
+        positions = np.searchsorted(self._grams, query)
+        found = positions < len(self._grams)
+        found[found] = self._grams[positions[found]] == query[found]
+        gram_ids = positions[found]
+        if not len(gram_ids):
+            return np.empty(0, dtype=np.uint32)
+
+        document_counts = self._starts[gram_ids + 1] - self._starts[gram_ids]
+        order = np.argsort(document_counts, kind="stable")
+        keep = order[(document_counts[order] <= self.max_postings) | (np.arange(len(order)) < MIN_QUERY_GRAMS)]
+        hits = np.concatenate([self._postings[self._starts[g]:self._starts[g + 1]] for g in gram_ids[keep]])
+        answers, shared = np.unique(hits, return_counts=True)
+        # Dice 계수: 2 * 공유 trigram 수 / (발화 trigram 수 + 정답 trigram 수)
+        scores = 2.0 * shared / (len(query) + self._answer_grams[answers])
+        if len(answers) > candidates:
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            answers, scores = answers[top], scores[top]
+        return answers[np.argsort(-scores, kind="stable")]
+
+    @traced("free_speech_search")
+    def search(self, text: str, limit: int = 5, candidates: int = DEFAULT_CANDIDATES) -> List[SearchHit]:
+        """발화와 가장 가까운 문장 limit개를 유사도가 높은 순서로 돌려줍니다."""
+        cleaned = _clean_text(text)
+        if not cleaned:
+            return []
+        # Dice 계수가 높은 후보부터 채점하면서, 지금의 limit번째 점수를 넘을 수 없는 후보는
+        # _best_candidate와 같은 값싼 상한(길이, 문자 빈도)으로 건너뜀
+        user_counts = Counter(cleaned)
+        scores: Dict[int, float] = {}
+        threshold = 0.0
+        for answer_id in self.candidate_answers(cleaned, candidates).tolist():
+            index = int(self._answer_sentence[answer_id])
+            answer = self._answer(answer_id)
+            length = len(cleaned) + len(answer)
+            if _calculate_ratio(min(len(cleaned), len(answer)), length) < threshold:
+                continue
+            if _calculate_ratio(sum((user_counts & Counter(answer)).values()), length) < threshold:
+                continue
+            score = difflib.SequenceMatcher(None, cleaned, answer).ratio()
+            if score > scores.get(index, -1.0):
+                scores[index] = score
+                if len(scores) >= limit:
+                    threshold = heapq.nlargest(limit, scores.values())[-1]
+
+        # 남은 문장들은 정답 전체와 다시 비교하여 compare_answers와 똑같은 점수와 정답을 돌려줌
+        hits = []
+        for index in heapq.nlargest(limit, scores, key=lambda i: (scores[i], -i)):
+            score, best_j = _best_candidate(cleaned, self._cleaned_answers(index))
+            if best_j >= 0:
+                hits.append(SearchHit(index, score, self.corpus.english_of(index)[best_j]))
+        hits.sort(key=lambda hit: (-hit.score, hit.index))
+        return hits[:limit]
+
+
+_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# 문장 모음마다 색인을 한 번만 만들기 위한 잠금 (만드는 동안 다른 모음의 검색은 기다리지 않음)
+_build_locks: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(corpus) -> TrigramIndex:
+    """
+    문장 모음마다 색인을 한 번만 만들어 모든 세션이 공유합니다.
+    문장 모음이 갱신되어 이전 모음이 사라지면 그 색인도 함께 사라집니다.
+    색인은 모듈 전체 잠금 밖에서 만들므로, 이미 만들어 둔 다른 모음의 검색은 기다리지 않습니다.
+    """
+    with _indexes_lock:
+        index = _indexes.get(corpus)
+        if index is not None:
+            return index
+        build_lock = _build_locks.setdefault(corpus, threading.Lock())
+    with build_lock:
+        # 기다리는 동안 다른 세션(또는 prebuild_search_index)이 먼저 만들었을 수 있음
+        with _indexes_lock:
+            index = _indexes.get(corpus)
+        if index is None:
+            with tracer.span("search_index_build"):
+                index = TrigramIndex(corpus)
+            with _indexes_lock:
+                _indexes[corpus] = index
+                _build_locks.pop(corpus, None)
+    return index
+
+
+def prebuild_search_index(corpus) -> bool:
+    """
+    문장 모음의 색인을 백그라운드 스레드에서 미리 만들어, 첫 자유 말하기 검색이 만들기를 기다리지 않게 합니다.
+    이미 만들었거나 만드는 중이면 아무것도 하지 않고 False를 돌려줍니다.
+    """
+    with _indexes_lock:
+        if corpus in _indexes or corpus in _build_locks:
+            return False
+        _build_locks[corpus] = threading.Lock()
+    threading.Thread(target=get_search_index, args=(corpus,), name="search-index-build", daemon=True).start()
+    return True
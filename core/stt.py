@@ -1,44 +1,302 @@
 import speech_recognition as sr
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from io import BytesIO
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
 
-# 이 함수는 더 이상 마이크를 직접 사용하지 않고,
-# 오디오 파일의 바이트 데이터를 직접 받아서 처리합니다.
-def process_audio_for_stt(audio_bytes: bytes) -> str:
+from core.audio_preprocess import preprocess_audio
+from core.tracing import traced
+
+# 인식 한 번에 기다리는 최대 시간(초)
+DEFAULT_TIMEOUT = 10.0
+# 프로세스 전체에서 동시에 실행하는 인식 작업 수의 상한
+DEFAULT_MAX_WORKERS = 4
+
+# STTResult.status 값
+STATUS_OK = "ok"
+STATUS_NO_SPEECH = "no_speech"          # 녹음은 됐지만 아무 말도 인식되지 않음 (또는 빈 오디오)
+STATUS_REQUEST_ERROR = "request_error"  # 인식 서비스 요청 실패 (네트워크, API 키 등)
+STATUS_TIMEOUT = "timeout"              # 제한 시간 안에 결과가 오지 않음
+STATUS_AUDIO_ERROR = "audio_error"      # 오디오 포맷 문제 등 예상치 못한 오류
+
+
+class STTError(Exception):
+    """음성 인식 백엔드가 던지는 오류의 기반 클래스. status는 STTResult.status로 그대로 쓰입니다."""
+    status = STATUS_AUDIO_ERROR
+
+
+class NoSpeechError(STTError):
+    status = STATUS_NO_SPEECH
+
+
+class BackendRequestError(STTError):
+    status = STATUS_REQUEST_ERROR
+
+
+class BackendUnavailableError(BackendRequestError):
+    """백엔드에 필요한 라이브러리나 모델이 설치되어 있지 않음"""
+
+
+class STTTimeoutError(STTError):
+    status = STATUS_TIMEOUT
+
+
+class AudioFormatError(STTError):
+    status = STATUS_AUDIO_ERROR
+
+
+class STTResult(NamedTuple):
+    """인식 결과. 실패해도 예외 대신 status와 error로 이유를 알려 줍니다."""
+    text: str
+    status: str
+    backend: str = ""
+    elapsed: float = 0.0
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK and bool(self.text)
+
+
+class STTBackend:
+    """음성 인식 백엔드의 공통 인터페이스. 실패는 STTError의 하위 클래스로 알립니다."""
+    name = "base"
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        raise NotImplementedError
+
+
+class GoogleBackend(STTBackend):
+    """Google Web Speech API (speech_recognition.recognize_google)"""
+    name = "google"
+
+    def __init__(self, language: str = "en-US", timeout: Optional[float] = DEFAULT_TIMEOUT):
+        self.language = language
+        # Recognizer는 인식 중에 상태를 바꾸지 않으므로 호출마다 새로 만들지 않고 공유함
+        self._recognizer = sr.Recognizer()
+        self._recognizer.operation_timeout = timeout
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            raise NoSpeechError("Google Speech Recognition could not understand audio") from None
+        except sr.RequestError as e:
+            raise BackendRequestError(f"Could not request results from Google service; {e}") from e
+
+
+class SphinxBackend(STTBackend):
+    """네트워크 없이 동작하는 CMU PocketSphinx 엔진 (pip install pocketsphinx 필요)"""
+    name = "sphinx"
+
+    def __init__(self, language: str = "en-US"):
+        try:
+            import pocketsphinx  # noqa: F401
+        except ImportError:
+            raise BackendUnavailableError("pocketsphinx is not installed") from None
+        self.language = language
+        self._recognizer = sr.Recognizer()
+        # PocketSphinx 디코더는 스레드 간 공유가 안전하지 않으므로 인식을 하나씩 실행
+        self._lock = threading.Lock()
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        try:
+            with self._lock:
+                return self._recognizer.recognize_sphinx(audio, language=self.language)
+        except sr.UnknownValueError:
+            raise NoSpeechError("Sphinx could not understand audio") from None
+        except sr.RequestError as e:
+            raise BackendRequestError(f"Sphinx error; {e}") from e
+
+
+class FakeBackend(STTBackend):
     """
-    st.audio_input을 통해 받은 오디오 바이트를 STT 처리합니다.
+    테스트용 결정적 백엔드. transcript 함수(오디오 → 문장) 또는 고정 문장을 돌려주고,
+    latency로 지연을, error로 실패를 흉내 냅니다. 빈 문장은 NoSpeechError가 됩니다.
     """
-    # 데이터가 없는 경우를 위한 방어 코드
-    if not audio_bytes:
-        print("STT_PROCESS: No audio bytes received.")
-        return ""
 
-    r = sr.Recognizer()
+    def __init__(self, text: str = "", transcript: Optional[Callable[[sr.AudioData], str]] = None,
+                 latency: float = 0.0, error: Optional[STTError] = None, name: str = "fake"):
+        self.text = text
+        self.transcript = transcript
+        self.latency = latency
+        self.error = error
+        self.name = name
+        self.calls = 0
+
+    def recognize(self, audio: sr.AudioData) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        text = self.transcript(audio) if self.transcript else self.text
+        if not text:
+            raise NoSpeechError("Fake backend returned no text")
+        return text
 
-    # 받은 바이트 데이터를 speech_recognition이 이해할 수 있는 AudioData 형태로 변환
+
+def load_audio(audio_bytes: bytes) -> sr.AudioData:
+    """WAV/AIFF/FLAC 바이트를 speech_recognition의 AudioData로 바꿉니다."""
     try:
         # BytesIO를 사용해 바이트 데이터를 메모리 상의 파일처럼 다룸
-        audio_data_as_file = BytesIO(audio_bytes)
-
-        # sr.AudioFile을 사용해 오디오 데이터를 로드.
-        # 이 방법은 라이브러리가 오디오 포맷을 스스로 파악하게 하므로 더 안정적임.
-        with sr.AudioFile(audio_data_as_file) as source:
+        # sr.AudioFile은 라이브러리가 오디오 포맷을 스스로 파악하게 하므로 더 안정적임
+        with sr.AudioFile(BytesIO(audio_bytes)) as source:
             # record() 메서드로 전체 오디오 데이터를 읽음
-            audio_data = r.record(source)
-
-        print("STT_PROCESS: Audio data loaded successfully. Recognizing...")
-        # 이제 이 AudioData를 가지고 구글 음성 인식을 수행
-        recognized_text = r.recognize_google(audio_data, language="en-US")
-        return recognized_text
-        
-    except sr.UnknownValueError:
-        # 소리가 녹음됐지만 아무 말도 인식되지 않은 경우
-        print("STT_PROCESS: Google Speech Recognition could not understand audio")
-        return ""
-    except sr.RequestError as e:
-        # 구글 API 요청에 실패한 경우 (네트워크 문제, API 키 문제 등)
-        print(f"STT_PROCESS: Could not request results from Google service; {e}")
-        return "API Error"
+            return sr.Recognizer().record(source)
     except Exception as e:
-        # 그 외 예상치 못한 에러 (예: 오디오 포맷 문제)
-        print(f"STT_PROCESS: An unexpected error occurred: {e}")
-        return "Processing Error"
+        raise AudioFormatError(f"Could not read audio; {e}") from e
+
+
+class STTService:
+    """
+    백엔드들을 제한된 워커 풀에서 실행하고 제한 시간을 지키는 인식 서비스.
+
+    hedge=True면 두 번째 백엔드도 함께 사용합니다. 첫 번째 백엔드가 hedge_delay초 안에
+    답하지 않거나 실패하면 두 번째 백엔드를 시작하고, 먼저 도착한 '쓸 만한' 결과를 채택합니다.
+
+    preprocess=True면 인식 전에 16kHz 모노로 바꾸고 앞뒤 무음을 잘라 보내는 데이터를 줄입니다.
+    말소리가 전혀 없는 녹음은 백엔드를 부르지 않고 바로 STATUS_NO_SPEECH로 돌려줍니다.
+    """
+
+    def __init__(self, backends: Sequence[STTBackend], max_workers: int = DEFAULT_MAX_WORKERS,
+                 timeout: float = DEFAULT_TIMEOUT, hedge: bool = False, hedge_delay: float = 1.0,
+                 preprocess: bool = True):
+        if not backends:
+            raise ValueError("at least one STT backend is required")
+        self.backends = list(backends)
+        self.timeout = timeout
+        self.hedge = hedge and len(self.backends) > 1
+        self.hedge_delay = hedge_delay
+        self.preprocess = preprocess
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt")
+
+    def recognize(self, audio_bytes: bytes) -> STTResult:
+        start = time.perf_counter()
+        if not audio_bytes:
+            return STTResult("", STATUS_NO_SPEECH, error="No audio bytes received.")
+        if self.preprocess:
+            try:
+                prepared = preprocess_audio(audio_bytes)
+            except Exception as e:
+                # 전처리에 실패해도 원래 오디오로 인식은 시도함
+                print(f"STT_PROCESS: Preprocessing failed, sending original audio; {e}")
+            else:
+                if not prepared.has_speech:
+                    return STTResult("", STATUS_NO_SPEECH, elapsed=time.perf_counter() - start,
+                                     error="No speech detected in audio")
+                audio_bytes = prepared.wav_bytes
+        try:
+            audio = load_audio(audio_bytes)
+        except STTError as e:
+            return STTResult("", e.status, elapsed=time.perf_counter() - start, error=str(e))
+
+        deadline = start + self.timeout
+        candidates = self.backends[:2] if self.hedge else self.backends[:1]
+        futures: Dict[Future, STTBackend] = {self._submit(candidates[0], audio): candidates[0]}
+        waiting_for_hedge = len(candidates) > 1
+        failures: List[STTResult] = []
+
+        while futures:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            wait_for = deadline - now
+            if waiting_for_hedge:
+                wait_for = min(wait_for, max(0.0, start + self.hedge_delay - now))
+            done, _ = wait(list(futures), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                backend = futures.pop(future)
+                result = self._to_result(future, backend, start)
+                if result.ok:
+                    for other in futures:
+                        other.cancel()
+                    return result
+                failures.append(result)
+
+            # 첫 백엔드가 늦거나 실패하면 두 번째 백엔드를 시작
+            if waiting_for_hedge and (failures or time.perf_counter() >= start + self.hedge_delay):
+                futures[self._submit(candidates[1], audio)] = candidates[1]
+                waiting_for_hedge = False
+
+        for future in futures:
+            future.cancel()
+        if futures or not failures:
+            names = "+".join(backend.name for backend in futures.values()) or candidates[0].name
+            return STTResult("", STATUS_TIMEOUT, names, time.perf_counter() - start,
+                             f"No result within {self.timeout:.1f}s")
+        # 모두 실패했다면 '말이 없음'보다 서비스 오류를 우선해서 알림
+        failures.sort(key=lambda result: result.status == STATUS_NO_SPEECH)
+        return failures[0]
+
+    def _submit(self, backend: STTBackend, audio: sr.AudioData) -> Future:
+        return self._executor.submit(backend.recognize, audio)
+
+    @staticmethod
+    def _to_result(future: Future, backend: STTBackend, start: float) -> STTResult:
+        elapsed = time.perf_counter() - start
+        try:
+            text = future.result()
+        except STTError as e:
+            return STTResult("", e.status, backend.name, elapsed, str(e))
+        except Exception as e:
+            return STTResult("", STATUS_AUDIO_ERROR, backend.name, elapsed, f"An unexpected error occurred: {e}")
+        if not text:
+            return STTResult("", STATUS_NO_SPEECH, backend.name, elapsed, "Empty transcript")
+        return STTResult(text, STATUS_OK, backend.name, elapsed)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def make_backend(name: str) -> STTBackend:
+    """이름으로 백엔드를 만듭니다: google, sphinx, fake"""
+    if name == "google":
+        return GoogleBackend()
+    if name == "sphinx":
+        return SphinxBackend()
+    if name == "fake":
+        return FakeBackend(text=os.environ.get("LEARN_SPEAKING_STT_FAKE_TEXT", "hello"),
+                           latency=float(os.environ.get("LEARN_SPEAKING_STT_LATENCY", "0")))
+    raise ValueError(f"unknown STT backend: {name}")
+
+
+_default_service: Optional[STTService] = None
+_default_service_lock = threading.Lock()
+
+
+def get_stt_service() -> STTService:
+    """
+    프로세스 전체가 공유하는 인식 서비스.
+    LEARN_SPEAKING_STT로 백엔드를 고릅니다. "google+sphinx"처럼 두 개를 주면 hedge 모드로 동작합니다.
+    """
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            names = os.environ.get("LEARN_SPEAKING_STT", "google").split("+")
+            _default_service = STTService(
+                [make_backend(name.strip()) for name in names],
+                timeout=float(os.environ.get("LEARN_SPEAKING_STT_TIMEOUT", str(DEFAULT_TIMEOUT))),
+                hedge=len(names) > 1,
+                preprocess=os.environ.get("LEARN_SPEAKING_STT_PREPROCESS", "1") != "0",
+            )
+        return _default_service
+
+
+# 이 함수는 더 이상 마이크를 직접 사용하지 않고,
+# 오디오 파일의 바이트 데이터를 직접 받아서 처리합니다.
+@traced("stt")
+def process_audio_for_stt(audio_bytes: bytes, service: Optional[STTService] = None) -> STTResult:
+    """
+    st.audio_input을 통해 받은 오디오 바이트를 STT 처리합니다.
+    실패해도 예외를 던지지 않고, 결과의 status로 이유를 알려 줍니다.
+    """
+    result = (service or get_stt_service()).recognize(audio_bytes)
+    if result.ok:
+        print(f"STT_PROCESS: Recognized by {result.backend} in {result.elapsed:.2f}s")
+    else:
+        print(f"STT_PROCESS: {result.status} ({result.backend or 'no backend'}); {result.error}")
+    return result
@@ -0,0 +1,335 @@
+import contextvars
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# 환경 변수
+# LEARN_SPEAKING_TRACE=1             추적 켜기 (꺼져 있으면 감싼 함수는 플래그 하나만 확인하고 바로 원래 함수를 부름)
+# LEARN_SPEAKING_TRACE_FILE=path     스팬을 한 줄에 하나씩 JSON으로 덧붙여 기록
+# LEARN_SPEAKING_TRACE_PROM=path     Prometheus textfile 형식의 집계를 주기적으로 파일에 씀
+TRACE_ENV = "LEARN_SPEAKING_TRACE"
+TRACE_FILE_ENV = "LEARN_SPEAKING_TRACE_FILE"
+TRACE_PROM_ENV = "LEARN_SPEAKING_TRACE_PROM"
+
+METRIC_PREFIX = "learn_speaking"
+# 지연 시간 히스토그램의 구간 경계(초)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 디버그 패널에 보여 줄 최근 상호작용(스크립트 실행) 수
+RECENT_INTERACTIONS = 20
+# Prometheus 파일을 다시 쓰는 최소 간격(초)
+PROM_WRITE_INTERVAL = 10.0
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "errors")
+
+    def __init__(self):
+        self.counts = [0] * (len(DURATION_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool) -> None:
+        index = 0
+        while index < len(DURATION_BUCKETS) and seconds > DURATION_BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+        if error:
+            self.errors += 1
+
+
+class Interaction:
+    """한 세션의 스크립트 실행 한 번. 그 동안 기록된 스팬의 (이름, 시간 ms)를 모읍니다."""
+    __slots__ = ("id", "session", "started", "ended", "last_activity", "spans")
+
+    def __init__(self, id: int, session: str, started: float):
+        self.id = id
+        self.session = session
+        self.started = started
+        self.ended: Optional[float] = None
+        self.last_activity = started
+        self.spans: List[Tuple[str, float]] = []
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.ended is None else (self.ended - self.started) * 1000
+
+
+class Tracer:
+    """
+    스팬(이름 붙은 구간의 소요 시간)을 기록하고 집계하는 가벼운 추적기.
+
+    - 스팬마다 이름별 히스토그램에 누적하고, 파일이 지정돼 있으면 JSONL로도 기록합니다.
+    - start_interaction()으로 스크립트 실행(rerun) 단위를 구분해, 최근 실행들의 단계별 시간을 보관합니다.
+    - register_cache()로 등록한 캐시의 적중/실패 횟수를 Prometheus 형식 출력에 함께 넣습니다.
+    """
+
+    def __init__(self, enabled: bool = False, trace_file: Optional[str] = None,
+                 prom_file: Optional[str] = None, recent: int = RECENT_INTERACTIONS):
+        self.enabled = enabled
+        self.trace_file = trace_file
+        self.prom_file = prom_file
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, _Histogram] = {}
+        self.recent: Deque[Interaction] = deque(maxlen=recent)
+        self._caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._open: Dict[str, Interaction] = {}
+        self._next_id = 0
+        self._last_prom_write = 0.0
+        self._lock = threading.Lock()
+        self._current: contextvars.ContextVar[Optional[Interaction]] = contextvars.ContextVar(
+            "learn_speaking_interaction", default=None)
+        self._parent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+            "learn_speaking_span", default=None)
+
+    # --- 스팬 ---------------------------------------------------------------
+    def span(self, name: str, **attrs):
+        """with tracer.span("이름"): ... 으로 구간 시간을 잽니다. 꺼져 있으면 아무 일도 하지 않습니다."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, attrs)
+
+    def record(self, name: str, start: float, duration: float, error: Optional[str] = None,
+               parent: Optional[str] = None, attrs: Optional[dict] = None, attach: bool = True) -> None:
+        """스팬 하나를 집계에 넣습니다. attach=True면 지금 실행 중인 상호작용의 스팬 목록에도 넣습니다."""
+        interaction = self._current.get() if attach else None
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = _Histogram()
+            histogram.observe(duration, error is not None)
+            if interaction is not None:
+                interaction.spans.append((name, duration * 1000))
+                interaction.last_activity = time.perf_counter()
+        if self.trace_file:
+            entry = {"name": name, "start": start, "duration_ms": round(duration * 1000, 3)}
+            if parent:
+                entry["parent"] = parent
+            if interaction is not None:
+                entry["interaction"] = interaction.id
+                entry["session"] = interaction.session
+            if error:
+                entry["error"] = error
+            if attrs:
+                entry["attrs"] = attrs
+            self._write_line(json.dumps(entry, ensure_ascii=False))
+
+    def _write_line(self, line: str) -> None:
+        with self._lock:
+            with open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    # --- 카운터와 캐시 ---------------------------------------------------------
+    def count(self, name: str, amount: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def register_cache(self, name: str, stats: Callable[[], Tuple[int, int]]) -> None:
+        """stats()는 (적중 수, 실패 수)를 돌려주는 함수. 추적이 꺼져 있어도 등록만은 해 둡니다."""
+        with self._lock:
+            self._caches[name] = stats
+
+    def cache_stats(self) -> Dict[str, Tuple[int, int]]:
+        with self._lock:
+            caches = dict(self._caches)
+        return {name: stats() for name, stats in caches.items()}
+
+    # --- 스크립트 실행 단위 -------------------------------------------------------
+    def start_interaction(self, session: str) -> None:
+        """
+        스크립트 실행 한 번을 시작합니다. st.rerun()이나 st.stop()으로 끝나 end_interaction()에
+        닿지 못한 같은 세션의 이전 실행은 마지막 스팬이 끝난 시각으로 닫습니다.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            previous = self._open.pop(session, None)
+            if previous is not None:
+                previous.ended = previous.last_activity
+            self._next_id += 1
+            interaction = Interaction(self._next_id, session, now)
+            self._open[session] = interaction
+            self.recent.append(interaction)
+            self.counters["script_runs"] = self.counters.get("script_runs", 0) + 1
+        if previous is not None:
+            self._record_run(previous)
+        self._current.set(interaction)
+
+    def end_interaction(self) -> None:
+        if not self.enabled:
+            return
+        interaction = self._current.get()
+        if interaction is None:
+            return
+        interaction.ended = time.perf_counter()
+        with self._lock:
+            if self._open.get(interaction.session) is interaction:
+                del self._open[interaction.session]
+        self._current.set(None)
+        self._record_run(interaction)
+        self._maybe_write_prometheus()
+
+    def _record_run(self, interaction: Interaction) -> None:
+        # 실행 전체 시간은 그 실행의 스팬 목록이 아니라 집계에만 넣음
+        duration = interaction.ended - interaction.started
+        self.record("script_run", time.time() - duration, duration, attach=False,
+                    attrs={"interaction": interaction.id, "session": interaction.session})
+
+    def recent_interactions(self) -> List[Interaction]:
+        """최근 실행들 (최신이 앞)"""
+        with self._lock:
+            return list(reversed(self.recent))
+
+    def span_summary(self) -> Dict[str, Tuple[int, float, int]]:
+        """스팬 이름별 (횟수, 평균 ms, 오류 수)"""
+        with self._lock:
+            return {name: (h.count, h.total / h.count * 1000 if h.count else 0.0, h.errors)
+                    for name, h in self.histograms.items()}
+
+    # --- 내보내기 -------------------------------------------------------------
+    def prometheus_text(self) -> str:
+        """집계된 카운터, 스팬 히스토그램, 캐시 적중/실패를 Prometheus 텍스트 형식으로 만듭니다."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {name: (list(h.counts), h.total, h.count, h.errors) for name, h in self.histograms.items()}
+        lines = []
+        for name, value in sorted(counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for name, (counts, total, count, _) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(DURATION_BUCKETS + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{span="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {count}')
+
+        metric = f"{METRIC_PREFIX}_span_errors_total"
+        lines.append(f"# TYPE {metric} counter")
+        for name, (_, _, _, errors) in sorted(histograms.items()):
+            lines.append(f'{metric}{{span="{name}"}} {errors}')
+
+        caches = self.cache_stats()
+        for kind, position in (("hits", 0), ("misses", 1)):
+            metric = f"{METRIC_PREFIX}_cache_{kind}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in sorted(caches.items()):
+                lines.append(f'{metric}{{cache="{name}"}} {stats[position]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Optional[str] = None) -> None:
+        """node_exporter textfile collector가 읽을 수 있도록 파일을 원자적으로 바꿔 씁니다."""
+        path = path or self.prom_file
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def _maybe_write_prometheus(self) -> None:
+        if not self.prom_file:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_prom_write < PROM_WRITE_INTERVAL:
+                return
+            self._last_prom_write = now
+        try:
+            self.write_prometheus()
+        except OSError as e:
+            print(f"TRACING: Could not write metrics file; {e}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.recent.clear()
+            self._open.clear()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "wall", "token")
+
+    def __init__(self, tracer: Tracer, name: str, attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.token = self.tracer._parent.set(self.name)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        self.tracer._parent.reset(self.token)
+        # st.rerun()/st.stop()은 예외로 구현돼 있으므로, 오류로는 일반 Exception만 셈
+        error = None
+        if exc_type is not None and issubclass(exc_type, Exception) and not _is_control_flow(exc_type):
+            error = f"{exc_type.__name__}: {exc}"
+        self.tracer.record(self.name, self.wall, duration, error, self.tracer._parent.get(), self.attrs)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _is_control_flow(exc_type) -> bool:
+    # streamlit을 가져오지 않고도 판단할 수 있도록 이름으로 비교
+    return exc_type.__name__ in ("RerunException", "StopException")
+
+
+def _from_env() -> Tracer:
+    return Tracer(enabled=os.environ.get(TRACE_ENV, "0") not in ("", "0"),
+                  trace_file=os.environ.get(TRACE_FILE_ENV) or None,
+                  prom_file=os.environ.get(TRACE_PROM_ENV) or None)
+
+
+# 프로세스 전체가 공유하는 추적기
+tracer = _from_env()
+
+
+def traced(name: Optional[str] = None):
+    """
+    함수 호출을 스팬으로 기록하는 데코레이터. 추적이 꺼져 있으면 플래그 하나만 확인하고 원래 함수를 부릅니다.
+
+        @traced("stt")
+        def process_audio_for_stt(...): ...
+    """
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
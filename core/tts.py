@@ -3,27 +3,401 @@
 import streamlit as st # Streamlit 임포트 추가 (에러 표시용)
 from gtts import gTTS
 import base64
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
+from typing import Dict, Iterable, Optional
 
-@st.cache_data(ttl=86400)
+from core.tracing import traced, tracer
+
+# 합성된 음성 파일을 저장하는 폴더. Streamlit 정적 파일 서빙(static/)의 하위 폴더라서 URL로 바로 재생됨
+DEFAULT_CLIP_DIR = os.environ.get("LEARN_SPEAKING_TTS_DIR", os.path.join("static", "tts"))
+# 정적 파일 서빙 기준 URL (페이지 주소 기준 상대 경로)
+DEFAULT_CLIP_URL_PREFIX = "app/static/tts"
+# 음성 파일 저장소의 최대 크기
+DEFAULT_CLIP_STORE_MAX_BYTES = int(os.environ.get("LEARN_SPEAKING_TTS_CACHE_MB", "200")) * 1024 * 1024
+# 정리할 때는 max_bytes의 이 비율까지 줄여, 가득 찬 뒤에도 저장할 때마다 정리하지 않게 함
+EVICT_LOW_WATER = 0.9
+
+
+def clip_key(text: str, lang: str = 'ko', slow: bool = False) -> str:
+    """(문장, 언어, 속도)로부터 음성 파일의 내용 주소(content address)를 만듭니다."""
+    return hashlib.sha256(f"{lang}\0{int(slow)}\0{text}".encode("utf-8")).hexdigest()
+
+
+class Synthesizer:
+    """문장을 MP3 바이트로 바꾸는 음성 합성기의 공통 인터페이스"""
+
+    def synthesize(self, text: str, lang: str = 'ko', slow: bool = False) -> bytes:
+        raise NotImplementedError
+
+
+class GTTSSynthesizer(Synthesizer):
+    """Google 번역 TTS(gTTS)를 사용하는 합성기"""
+
+    def synthesize(self, text: str, lang: str = 'ko', slow: bool = False) -> bytes:
+        tts = gTTS(text=text, lang=lang, slow=slow)
+        mp3_fp = BytesIO()
+        tts.write_to_fp(mp3_fp)
+        return mp3_fp.getvalue()
+
+
+class FakeSynthesizer(Synthesizer):
+    """
+    네트워크 없이 쓰는 가짜 합성기 (테스트, 벤치마크, 부하 테스트용).
+    문장마다 결정적인 바이트를 돌려주며, latency로 실제 왕복 시간을 흉내 낼 수 있습니다.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, lang: str = 'ko', slow: bool = False) -> bytes:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return b"FAKE-MP3\0" + clip_key(text, lang, slow).encode("ascii")
+
+
+class RateLimiter:
+    """초당 rate회까지만 통과시키는 스레드 안전한 간격 제한기"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ClipStore:
+    """
+    디스크에 저장하는 내용 주소 기반 음성 파일 저장소.
+
+    - 파일 이름은 clip_key(문장, 언어, 속도)이므로 같은 문장은 한 번만 합성되고, 재시작 후에도 그대로 재사용됩니다.
+    - 파일의 수정 시각을 마지막 사용 시각으로 삼아, 전체 크기가 max_bytes를 넘으면 오래 쓰지 않은 파일부터
+      max_bytes * EVICT_LOW_WATER 이하가 될 때까지 지웁니다. 정리는 한 번에 한 스레드만 합니다.
+    - 같은 문장을 여러 스레드가 동시에 요청해도 합성은 한 번만 합니다.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CLIP_DIR, max_bytes: int = DEFAULT_CLIP_STORE_MAX_BYTES,
+                 url_prefix: str = DEFAULT_CLIP_URL_PREFIX):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.url_prefix = url_prefix.rstrip("/")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._evict_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def url_for(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}.mp3"
+
+    def contains(self, text: str, lang: str = 'ko', slow: bool = False) -> bool:
+        return os.path.exists(self.path_for(clip_key(text, lang, slow)))
+
+    def get(self, key: str) -> Optional[str]:
+        """저장된 파일 경로를 돌려주고 사용 시각을 갱신합니다. 없으면 None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """
+        파일을 원자적으로 저장한 뒤, 크기 제한을 넘었으면 오래된 파일을 지웁니다.
+        같은 키의 파일이 이미 있으면 내용도 같으므로 다시 쓰지 않습니다 (크기를 두 번 세지 않도록).
+        """
+        path = self.path_for(key)
+        if self.get(key):
+            return path
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".clip.", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes += len(data)
+            over_limit = self._total_bytes > self.max_bytes
+        # 다른 스레드가 이미 정리 중이면 그쪽이 낮은 기준까지 줄이므로 기다리지 않음
+        if over_limit and self._evict_lock.acquire(blocking=False):
+            try:
+                self._evict_locked()
+            finally:
+                self._evict_lock.release()
+        return path
+
+    def get_or_synthesize(self, text: str, synthesizer: Synthesizer,
+                          lang: str = 'ko', slow: bool = False) -> str:
+        """저장된 음성 파일의 키를 돌려줍니다. 없으면 합성해서 저장합니다."""
+        key = clip_key(text, lang, slow)
+        if self.get(key):
+            with self._lock:
+                self.hits += 1
+            return key
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # 기다리는 동안 다른 스레드가 이미 합성했을 수 있음
+            if self.get(key):
+                with self._lock:
+                    self.hits += 1
+                return key
+            with self._lock:
+                self.misses += 1
+            try:
+                with tracer.span("tts_synthesize"):
+                    data = synthesizer.synthesize(text, lang=lang, slow=slow)
+                self.put(key, data)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return key
+
+    def read_or_synthesize(self, text: str, synthesizer: Synthesizer,
+                           lang: str = 'ko', slow: bool = False) -> bytes:
+        """음성 파일의 내용을 돌려줍니다. 읽기 직전에 다른 세션의 정리로 지워졌으면 한 번 다시 합성합니다."""
+        for attempt in range(2):
+            key = self.get_or_synthesize(text, synthesizer, lang=lang, slow=slow)
+            try:
+                with open(self.path_for(key), "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                if attempt:
+                    raise
+
+    def evict(self) -> int:
+        """
+        전체 크기가 max_bytes를 넘으면 max_bytes * EVICT_LOW_WATER 이하가 될 때까지 가장 오래 쓰지 않은
+        파일부터 지우고, 지운 개수를 돌려줍니다.
+        """
+        with self._evict_lock:
+            return self._evict_locked()
+
+    def _evict_locked(self) -> int:
+        with self._lock:
+            counted_before = self._total_bytes
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        target = self.max_bytes * EVICT_LOW_WATER if total > self.max_bytes else self.max_bytes
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            # 디렉터리를 훑은 값으로 맞추되, 정리하는 동안 다른 스레드가 저장한 만큼은 더함
+            self._total_bytes = total + (self._total_bytes - counted_before)
+        return removed
+
+    def _scan(self):
+        """(경로, 크기, 마지막 사용 시각) 목록"""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mp3"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+def prewarm(store: ClipStore, synthesizer: Synthesizer, texts: Iterable[str], max_workers: int = 4,
+            rate: float = 5.0, lang: str = 'ko', slow: bool = False, on_progress=None) -> Dict[str, int]:
+    """
+    문장들을 워커 풀에서 미리 합성해 저장소에 채웁니다. 이미 있는 문장은 건너뛰고,
+    합성 요청은 초당 rate회로 제한합니다. {"synthesized", "cached", "failed"} 개수를 돌려줍니다.
+    """
+    limiter = RateLimiter(rate)
+    counts = {"synthesized": 0, "cached": 0, "failed": 0}
+    counts_lock = threading.Lock()
+
+    def work(text: str) -> None:
+        if store.contains(text, lang, slow):
+            outcome = "cached"
+        else:
+            limiter.wait()
+            try:
+                store.get_or_synthesize(text, synthesizer, lang=lang, slow=slow)
+                outcome = "synthesized"
+            except Exception as e:
+                print(f"TTS_PREWARM: Could not synthesize {text!r}; {e}")
+                outcome = "failed"
+        with counts_lock:
+            counts[outcome] += 1
+            if on_progress:
+                on_progress(dict(counts))
+
+    unique_texts = list(dict.fromkeys(texts))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(work, unique_texts))
+    return counts
+
+
+class AudioPrefetcher:
+    """
+    다음에 보여 줄 문장의 음성을 미리 합성해 두는 프로세스 공용 백그라운드 실행기.
+
+    - 세션(owner)마다 대기 중인 미리 합성은 최신 하나만 유지하고, cancel(owner)로 취소할 수 있습니다.
+    - 프로세스 전체에서 동시에 대기/실행 중인 미리 합성은 max_in_flight개로 제한하고, 넘치면 버립니다.
+    - record_switch()로 문장을 바꿀 때 음성이 이미 준비돼 있었는지(hit) 아닌지(miss)를 셉니다.
+    """
+
+    def __init__(self, store: ClipStore, synthesizer: Synthesizer, max_workers: int = 2,
+                 max_in_flight: int = 8, lang: str = 'ko', slow: bool = False):
+        self.store = store
+        self.synthesizer = synthesizer
+        self.max_in_flight = max_in_flight
+        self.lang = lang
+        self.slow = slow
+        self.stats = {"hits": 0, "misses": 0, "submitted": 0, "completed": 0,
+                      "cancelled": 0, "dropped": 0, "failed": 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-prefetch")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._pending: Dict[str, Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def prefetch(self, text: str, owner: str) -> bool:
+        """text의 음성을 백그라운드에서 합성하도록 예약합니다. 예약했으면 True를 돌려줍니다."""
+        if self.store.contains(text, self.lang, self.slow):
+            return False
+        # 같은 세션의 이전 예약은 더 이상 필요 없음
+        self.cancel(owner)
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self.stats["dropped"] += 1
+                return False
+            self._in_flight += 1
+            self.stats["submitted"] += 1
+            future = self._executor.submit(self._run, text)
+            self._pending[owner] = future
+        future.add_done_callback(lambda f: self._finished(owner, f))
+        return True
+
+    def cancel(self, owner: str) -> bool:
+        """owner가 예약한, 아직 시작하지 않은 미리 합성을 취소합니다. 이미 실행 중이면 끝까지 진행됩니다."""
+        with self._lock:
+            future = self._pending.pop(owner, None)
+        if future is not None and future.cancel():
+            with self._lock:
+                self.stats["cancelled"] += 1
+            return True
+        return False
+
+    def record_switch(self, text: str) -> bool:
+        """문장을 바꾸는 시점에 음성이 이미 준비돼 있는지 기록하고 그 여부를 돌려줍니다."""
+        hit = self.store.contains(text, self.lang, self.slow)
+        with self._lock:
+            self.stats["hits" if hit else "misses"] += 1
+        return hit
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else None
+
+    def _run(self, text: str) -> None:
+        self.store.get_or_synthesize(text, self.synthesizer, lang=self.lang, slow=self.slow)
+
+    def _finished(self, owner: str, future: Future) -> None:
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._in_flight -= 1
+            if self._pending.get(owner) is future:
+                del self._pending[owner]
+            if not future.cancelled():
+                self.stats["failed" if error is not None else "completed"] += 1
+        if error is not None:
+            print(f"TTS_PREFETCH: Prefetch failed; {error}")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_synthesizer() -> Synthesizer:
+    """환경 변수 LEARN_SPEAKING_TTS=fake면 가짜 합성기를, 아니면 gTTS를 사용합니다."""
+    if os.environ.get("LEARN_SPEAKING_TTS") == "fake":
+        return FakeSynthesizer(latency=float(os.environ.get("LEARN_SPEAKING_TTS_LATENCY", "0")))
+    return GTTSSynthesizer()
+
+
+@st.cache_resource
+def get_clip_store() -> ClipStore:
+    """프로세스 전체가 공유하는 음성 파일 저장소"""
+    store = ClipStore()
+    tracer.register_cache("tts_clip_store", lambda: (store.hits, store.misses))
+    return store
+
+
+@st.cache_resource
+def _get_default_synthesizer() -> Synthesizer:
+    return get_synthesizer()
+
+
+@st.cache_resource
+def get_prefetcher() -> AudioPrefetcher:
+    """프로세스 전체가 공유하는 음성 미리 합성기"""
+    prefetcher = AudioPrefetcher(get_clip_store(), _get_default_synthesizer())
+    tracer.register_cache("tts_prefetch", lambda: (prefetcher.stats["hits"], prefetcher.stats["misses"]))
+    return prefetcher
+
+
+@traced("tts")
 def autoplay_audio(text: str):
     """
     주어진 텍스트에 대해 자동 재생되는 오디오 HTML을 생성합니다.
     (오디오 컨트롤러는 숨겨진 상태로 자동 재생)
+    음성은 디스크 저장소에 한 번만 합성해 두고, 정적 파일 URL로 참조합니다.
+    정적 파일 서빙이 꺼져 있으면 예전처럼 base64로 HTML에 넣습니다.
     """
     try:
-        tts = gTTS(text=text, lang='ko', slow=False)
-        mp3_fp = BytesIO()
-        tts.write_to_fp(mp3_fp)
-        mp3_fp.seek(0)
-        b64_audio = base64.b64encode(mp3_fp.read()).decode('utf-8')
+        store = get_clip_store()
+        if st.get_option("server.enableStaticServing"):
+            src = store.url_for(store.get_or_synthesize(text, _get_default_synthesizer(), lang='ko', slow=False))
+        else:
+            data = store.read_or_synthesize(text, _get_default_synthesizer(), lang='ko', slow=False)
+            src = "data:audio/mp3;base64," + base64.b64encode(data).decode('utf-8')
         audio_html = f"""
         <audio autoplay style="display:none;">
-            <source src="data:audio/mp3;base64,{b64_audio}" type="audio/mp3">
+            <source src="{src}" type="audio/mp3">
             Your browser does not support the audio element.
         </audio>
         """
         return audio_html
     except Exception as e:
         st.error(f"음성 변환 중 오류가 발생했습니다: {e}") # 오류 발생 시 Streamlit에 에러 메시지 표시
-        return None
\ No newline at end of file
+        return None
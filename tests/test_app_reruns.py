@@ -0,0 +1,54 @@
+"""
+콜백과 fragment로 바꾼 뒤의 상호작용별 스크립트 실행 횟수와 전송 바이트 수를 확인합니다.
+측정은 benchmarks.bench_app_reruns와 같은 방법(AppTest + RunCounter)을 씁니다.
+"""
+import os
+
+import pytest
+
+from benchmarks.bench_app_reruns import ROOT, RunCounter, measure
+
+
+@pytest.fixture
+def interactions(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv("LEARN_SPEAKING_TTS", "fake")
+    monkeypatch.setenv("LEARN_SPEAKING_STT", "fake")
+    monkeypatch.setenv("LEARN_SPEAKING_ATTEMPTS_DB", str(tmp_path / "attempts.sqlite3"))
+
+    import core.data_loader as data_loader
+    import core.tts as tts
+    from tools.fake_github import FakeGitHubServer, make_sentence_files
+
+    store = tts.ClipStore(str(tmp_path / "tts"))
+    prefetcher = tts.AudioPrefetcher(store, tts.FakeSynthesizer())
+    monkeypatch.setattr(tts, "get_clip_store", lambda: store)
+    monkeypatch.setattr(tts, "get_prefetcher", lambda: prefetcher)
+    server = FakeGitHubServer(make_sentence_files(3, 20)).start()
+    monkeypatch.setattr(data_loader, "get_default_source", lambda: data_loader.GitHubSource(server.api_url))
+    monkeypatch.setattr(data_loader, "DEFAULT_SNAPSHOT_PATH", str(tmp_path / "snapshot.json"))
+    counter = RunCounter()
+    counter.install()
+    try:
+        results = measure(os.path.join(ROOT, "app.py"), counter)
+    finally:
+        counter.uninstall()
+        prefetcher.shutdown()
+        server.stop()
+    return {name: (full, fragment, sent) for name, full, fragment, sent in results}
+
+
+def test_page_changes_run_the_script_once(interactions):
+    # 예전에는 버튼 처리 후 st.rerun()으로 전체 스크립트가 두 번 실행됨
+    for name in ("category", "next sentence"):
+        full, fragment, _ = interactions[name]
+        assert (full, fragment) == (1, 0), name
+
+
+def test_fragment_widgets_rerun_only_their_fragment(interactions):
+    _, _, initial_bytes = interactions["initial load"]
+    for name in ("replay audio", "show answers", "hide answers"):
+        full, fragment, sent = interactions[name]
+        assert (full, fragment) == (0, 1), name
+        # fragment만 다시 보내므로 전체 화면보다 훨씬 작음 (측정값은 전체의 15% 안팎)
+        assert sent < initial_bytes * 0.3, name
@@ -0,0 +1,42 @@
+import numpy as np
+
+from core.audio_preprocess import TARGET_SAMPLE_RATE, encode_wav, preprocess_audio, trim_silence
+
+RATE = TARGET_SAMPLE_RATE
+
+
+def _recording(voice_amplitude: float, noise_amplitude: float, seed: int = 0) -> np.ndarray:
+    """0.8초 잡음 → 1초 말소리(크기가 변하는 톤) + 잡음 → 0.8초 잡음"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(RATE) / RATE
+    voice = voice_amplitude * (0.5 * (1 + np.sin(2 * np.pi * 4 * t))) ** 2 * np.sin(2 * np.pi * 180 * t)
+    signal = np.concatenate([np.zeros(int(0.8 * RATE)), voice, np.zeros(int(0.8 * RATE))])
+    return (signal + noise_amplitude * rng.standard_normal(signal.size)).astype(np.float32)
+
+
+def test_trims_silence_around_normal_speech():
+    trimmed, has_speech = trim_silence(_recording(0.3, 0.002), RATE)
+    assert has_speech
+    assert 1.0 <= trimmed.size / RATE < 1.6
+
+
+def test_keeps_low_gain_speech_below_absolute_floor():
+    # 말소리의 가장 큰 프레임도 -55 dB보다 작지만, 잡음 바닥보다는 20 dB 이상 큼
+    signal = _recording(0.001, 0.00003)
+    trimmed, has_speech = trim_silence(signal, RATE)
+    assert has_speech
+    assert 1.0 <= trimmed.size / RATE < 1.6
+
+    result = preprocess_audio(encode_wav(signal, RATE))
+    assert result.has_speech
+    assert result.duration >= 1.0
+
+
+def test_quiet_noise_only_is_not_speech():
+    _, has_speech = trim_silence(_recording(0.0, 0.001), RATE)
+    assert not has_speech
+
+
+def test_absolute_floor_can_be_disabled():
+    _, has_speech = trim_silence(_recording(0.0, 0.001), RATE, absolute_threshold_db=None)
+    assert has_speech
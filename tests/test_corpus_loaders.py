@@ -0,0 +1,60 @@
+"""
+같은 폴더를 JSON 로더(fetch_sentences)와 바이너리 컴파일러(tools.compile_corpus)로 읽었을 때
+두 문장 모음이 같은 문장에 같은 id를 주는지 확인합니다.
+"""
+import json
+
+from core.binary_corpus import MappedCorpus, write_binary_corpus
+from core.corpus import SentenceCorpus
+from core.data_loader import LocalDirectorySource, fetch_sentences
+from tools.compile_corpus import iter_records
+
+
+def _columns(corpus):
+    return [(corpus.id_of(index), corpus.korean_of(index), tuple(corpus.english_of(index)), corpus.category_of(index))
+            for index in range(len(corpus))]
+
+
+def test_binary_corpus_dedupes_strings(tmp_path):
+    # 해시 표가 여러 번 커지도록 충분히 많은 문자열을 넣음
+    records = [{"korean": f"문장 {i % 50000}", "english": [f"Sentence {i}.", f"sentence {i}"]} for i in range(100000)]
+    path = str(tmp_path / "corpus.bin")
+    stats = write_binary_corpus(records, path)
+    # 한국어 5만 개 + 정답 20만 개, 정제한 정답("sentence i")은 두 번째 정답과 같음
+    assert stats["strings"] == 50000 + 200000
+
+    corpus = MappedCorpus(path)
+    expected = SentenceCorpus.from_records(dict(record, id=i + 1) for i, record in enumerate(records))
+    for index in (0, 1, 49999, 50000, 99999):
+        assert corpus.korean_of(index) == expected.korean_of(index)
+        assert corpus.english_of(index) == expected.english_of(index)
+        assert corpus.cleaned_english_of(index) == expected.cleaned_english_of(index) == (f"sentence {index}",) * 2
+
+
+def test_loaders_agree_with_malformed_file(tmp_path):
+    source = tmp_path / "sentences"
+    source.mkdir()
+    (source / "00.json").write_text(json.dumps([
+        {"korean": "가", "english": ["a"], "category": "x"},
+        {"korean": "나", "english": ["b", "bb"]},
+    ]), encoding="utf-8")
+    # 앞의 두 원소는 읽히지만 파일 끝이 잘림
+    (source / "01.json").write_text(
+        '[{"korean": "다", "english": ["c"]}, {"korean": "라", "english": ["d"]}, {"korean": "마"',
+        encoding="utf-8")
+    (source / "02.json").write_text(json.dumps([{"korean": "바", "english": ["e"], "category": "y"}]) + " []",
+                                    encoding="utf-8")
+    (source / "03.json").write_text(json.dumps([{"korean": "사", "english": ["f"], "category": "x"}]),
+                                    encoding="utf-8")
+
+    expected = _columns(SentenceCorpus.from_records(fetch_sentences(LocalDirectorySource(str(source)), max_workers=1)))
+
+    path = str(tmp_path / "corpus.bin")
+    write_binary_corpus(iter_records([str(source)]), path)
+    assert _columns(MappedCorpus(path)) == expected
+
+    assert expected == [
+        (1, "가", ("a",), "x"),
+        (2, "나", ("b", "bb"), None),
+        (3, "사", ("f",), "x"),
+    ]
@@ -0,0 +1,80 @@
+"""
+복습 스케줄러와 답변 기록 저장소: 문장 모음이 바뀐 뒤에도 기록이 같은 문장을 가리키는지,
+다음 문장 고르기가 지금 문장을 다시 내지 않는지, 쓰는 중인 묶음을 정확히 빼는지 확인합니다.
+"""
+import random
+import sqlite3
+
+from core.attempts import Attempt, AttemptStore
+from core.corpus import SentenceCorpus
+from core.picker import SentencePicker
+from core.scheduler import ReviewScheduler
+
+
+def _corpus(koreans):
+    return SentenceCorpus.from_records(
+        {"id": i + 1, "category": "일상", "korean": korean, "english": [f"answer {korean}"]}
+        for i, korean in enumerate(koreans)
+    )
+
+
+def test_history_follows_sentence_after_renumbering(tmp_path):
+    store = AttemptStore(str(tmp_path / "attempts.sqlite3"))
+    try:
+        before = _corpus(["가", "나", "다"])
+        ReviewScheduler(store).record("user", before, 1, 0.2, now=100.0)
+        store.flush()
+
+        # 앞에 파일이 추가되어 id와 위치가 모두 밀린 모음
+        after = _corpus(["새1", "새2", "가", "나", "다"])
+        schedule = ReviewScheduler(store).schedule_for("user", after)
+        assert len(schedule) == 1
+        assert after.key_of(3) in schedule
+        assert after.index_of_key(after.key_of(3)) == 3
+        assert after.index_of_key(before.key_of(0)) == 2
+        assert after.index_of_key(_corpus(["없음"]).key_of(0)) == -1
+    finally:
+        store.close()
+
+
+def test_old_attempts_table_is_set_aside(tmp_path):
+    path = str(tmp_path / "attempts.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE attempts (user_id TEXT NOT NULL, sentence_id INTEGER NOT NULL, "
+               "score REAL NOT NULL, answered_at REAL NOT NULL)")
+    db.execute("CREATE INDEX attempts_by_user ON attempts (user_id, answered_at)")
+    db.execute("INSERT INTO attempts VALUES ('user', 2, 0.5, 1.0)")
+    db.commit()
+    db.close()
+
+    store = AttemptStore(path)
+    try:
+        assert store.history("user") == []
+        assert store.count() == 0
+    finally:
+        store.close()
+
+
+def test_next_index_never_returns_excluded_sentence():
+    corpus = SentenceCorpus.from_records([
+        {"id": 1, "category": "일상", "korean": "가", "english": ["a"]},
+        {"id": 2, "category": "여행", "korean": "나", "english": ["b"]},
+    ])
+    scheduler = ReviewScheduler()
+    picker = SentencePicker(random.Random(0))
+    # 카테고리에 지금 문장 하나뿐이고 복습할 문장도 없음
+    assert scheduler.next_index("user", corpus, "일상", picker, exclude=0, now=0.0) == -1
+    assert scheduler.next_index("user", corpus, "일상", picker, now=0.0) == 0
+
+
+def test_write_removes_the_written_batch_object(tmp_path):
+    store = AttemptStore(str(tmp_path / "attempts.sqlite3"))
+    try:
+        attempt = Attempt("user", 1, 0.5, 1.0)
+        first, second = [attempt], [attempt]
+        with store._cond:
+            store._writing.extend([first, second])
+        store._write(second)
+        assert len(store._writing) == 1 and store._writing[0] is first
+    finally:
+        store.close()
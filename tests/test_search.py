@@ -0,0 +1,25 @@
+"""
+자유 말하기 검색 색인이 문장 모음의 정제 결과 캐시를 쓰지 않고, compare_answers와 같은 점수를 내는지 확인합니다.
+"""
+from core.checker import compare_answers
+from core.corpus import SentenceCorpus
+from core.search import TrigramIndex
+
+
+def test_index_keeps_its_own_cleaned_answers():
+    corpus = SentenceCorpus.from_records([
+        {"id": 1, "korean": "가", "english": ["Where is the hotel?", "Where's my hotel?"]},
+        {"id": 2, "korean": "나", "english": []},
+        {"id": 3, "korean": "다", "english": ["I want a café au lait."]},
+        {"id": 4, "korean": "라", "english": ["The dog runs quickly."]},
+    ])
+    index = TrigramIndex(corpus)
+    assert corpus._cleaned_english.misses == 0
+
+    for i in range(len(corpus)):
+        assert tuple(index._cleaned_answers(i)) == corpus.cleaned_english_of(i)
+    for text in ("where is my hotel", "cafe au lait", "dog runs"):
+        hits = index.search(text)
+        assert hits
+        for hit in hits:
+            assert (hit.score, hit.best_match) == compare_answers(text, list(corpus.english_of(hit.index)))
@@ -0,0 +1,146 @@
+"""
+문장 JSON 파일들을 메모리 매핑해서 읽을 수 있는 바이너리 문장 모음(core.binary_corpus)으로 컴파일합니다.
+
+입력은 파일이나 폴더이며, 폴더 안에서는 이름 순서대로 읽습니다 (LocalDirectorySource와 같은 순서).
+- .json    문장 dict의 배열. 파일 전체를 읽지 않고 배열 원소를 하나씩 파싱합니다.
+- .jsonl   한 줄에 문장 dict 하나
+- .gz      위 두 형식의 gzip 압축본 (.json.gz, .jsonl.gz)
+
+    python -m tools.compile_corpus ./sentences -o .cache/corpus.bin
+    python -m tools.compile_corpus big.jsonl.gz -o corpus.bin
+
+앱에서는 LEARN_SPEAKING_CORPUS_BIN=corpus.bin으로 GitHub 대신 이 파일을 사용합니다.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Iterable, Iterator, List, TextIO
+
+from core.binary_corpus import write_binary_corpus
+
+SUFFIXES = (".json", ".jsonl", ".json.gz", ".jsonl.gz")
+READ_CHUNK = 1 << 16
+
+
+def iter_json_array(stream: TextIO, chunk_size: int = READ_CHUNK) -> Iterator[object]:
+    """
+    최상위 JSON 배열의 원소를 하나씩 돌려줍니다. 버퍼에는 아직 파싱하지 않은 부분만 남기므로
+    원소 하나보다 큰 메모리를 쓰지 않습니다.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    def skip_whitespace() -> None:
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or not fill():
+                return
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("expected a JSON array")
+    position += 1
+
+    expect_value = True
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("unexpected end of JSON array")
+        if buffer[position] == "]":
+            # json.load와 같이 배열 뒤에 다른 내용이 있으면 잘못된 파일로 봄
+            position += 1
+            skip_whitespace()
+            if position < len(buffer):
+                raise ValueError("extra data after JSON array")
+            return
+        if not expect_value:
+            if buffer[position] != ",":
+                raise ValueError(f"expected ',' or ']' but got {buffer[position]!r}")
+            position += 1
+            expect_value = True
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # 원소가 버퍼 끝에서 잘렸을 수 있으므로 더 읽어서 다시 시도
+                if eof or not fill():
+                    raise
+                continue
+            # 숫자는 버퍼 끝에서 잘려도 파싱에 성공하므로, 끝에 닿았다면 더 읽어서 확인
+            if end == len(buffer) and not eof and fill():
+                continue
+            break
+        yield value
+        position = end
+        expect_value = False
+
+
+def iter_jsonl(stream: TextIO) -> Iterator[object]:
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def input_files(paths: Iterable[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_records(paths: Iterable[str]) -> Iterator[object]:
+    """
+    입력 파일들의 문장 dict를 차례로 돌려줍니다. 파일 하나씩 끝까지 읽은 뒤에 내보내므로,
+    앱(fetch_sentences)과 마찬가지로 형식이 잘못된 파일은 앞부분까지 포함해 통째로 건너뜁니다.
+    그래야 같은 폴더에서 만든 두 문장 모음의 id가 같습니다.
+    """
+    for path in input_files(paths):
+        opener = gzip.open if path.endswith(".gz") else open
+        name = path[:-3] if path.endswith(".gz") else path
+        with opener(path, "rt", encoding="utf-8") as stream:
+            try:
+                records = list(iter_jsonl(stream) if name.endswith(".jsonl") else iter_json_array(stream))
+            except ValueError as e:
+                print(f"'{path}' 파일의 JSON 형식이 올바르지 않습니다. 건너뜁니다: {e}", file=sys.stderr)
+                continue
+        yield from records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="문장 파일 또는 폴더")
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = write_binary_corpus(iter_records(args.inputs), args.output,
+                                on_warning=lambda message: print(message, file=sys.stderr))
+    elapsed = time.perf_counter() - start
+    print(f"{stats['sentences']} sentences ({stats['answers']} answers, {stats['categories']} categories, "
+          f"{stats['skipped']} skipped) -> {args.output} {stats['bytes'] / 1e6:.1f}MB in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+GitHub contents API를 흉내 내는 로컬 HTTP 서버.
+네트워크나 토큰 없이 core.data_loader.GitHubSource를 벤치마크/점검할 때 사용합니다.
+
+    with FakeGitHubServer({"a.json": [...]}, latency=0.02) as server:
+        source = GitHubSource(server.api_url)
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import unquote
+
+
+def git_blob_sha(content: bytes) -> str:
+    """GitHub가 contents 목록의 sha로 돌려주는 것과 같은 git blob 해시"""
+    header = f"blob {len(content)}\0".encode()
+    return hashlib.sha1(header + content).hexdigest()
+
+
+class FakeGitHubServer:
+    """
+    /repos/<owner>/<repo>/contents/ 에서 파일 목록을, /raw/<name> 에서 파일 내용을 제공합니다.
+    latency만큼 모든 응답을 지연시켜 실제 왕복 시간을 흉내 냅니다.
+    """
+
+    def __init__(self, files: Dict[str, object], latency: float = 0.0, port: int = 0):
+        self.latency = latency
+        self.request_count = 0
+        self.not_modified_count = 0
+        self._lock = threading.Lock()
+        self._files: Dict[str, bytes] = {}
+        for name, content in files.items():
+            self.set_file(name, content)
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/repos/fake/corpus/contents/"
+
+    def set_file(self, name: str, content) -> None:
+        """파일을 추가하거나 교체합니다. bytes가 아니면 JSON으로 직렬화합니다."""
+        if not isinstance(content, bytes):
+            content = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._files[name] = content
+
+    def remove_file(self, name: str) -> None:
+        with self._lock:
+            self._files.pop(name, None)
+
+    def start(self) -> "FakeGitHubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _listing(self) -> bytes:
+        with self._lock:
+            items = sorted(self._files.items())
+        listing = [
+            {
+                "name": name,
+                "path": name,
+                "sha": git_blob_sha(content),
+                "size": len(content),
+                "type": "file",
+                "download_url": f"{self.base_url}/raw/{name}",
+            }
+            for name, content in items
+        ]
+        return json.dumps(listing).encode("utf-8")
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Content-Length를 보내는 HTTP/1.1이어야 클라이언트가 연결을 재사용함
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if self.path.startswith("/repos/"):
+                    self._send_with_etag(server._listing(), "application/json")
+                elif self.path.startswith("/raw/"):
+                    name = unquote(self.path[len("/raw/"):])
+                    with server._lock:
+                        content = server._files.get(name)
+                    if content is None:
+                        self._send(404, b"Not Found", "text/plain")
+                    else:
+                        self._send_with_etag(content, "text/plain; charset=utf-8")
+                else:
+                    self._send(404, b"Not Found", "text/plain")
+
+            def _send_with_etag(self, body: bytes, content_type: str):
+                """GitHub처럼 ETag를 붙이고, If-None-Match가 같으면 본문 없이 304로 응답"""
+                etag = f'"{git_blob_sha(body)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified_count += 1
+                    self._send(304, b"", content_type, {"ETag": etag})
+                else:
+                    self._send(200, body, content_type, {"ETag": etag})
+
+            def _send(self, status: int, body: bytes, content_type: str, extra_headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (extra_headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def make_sentence_files(file_count: int, sentences_per_file: int = 50,
+                        categories=("기초 회화", "비즈니스", "여행")) -> Dict[str, list]:
+    """벤치마크용 가짜 문장 파일들을 만듭니다."""
+    files = {}
+    for f in range(file_count):
+        files[f"sentences_{f:04d}.json"] = [
+            {
+                "category": categories[(f + i) % len(categories)],
+                "korean": f"테스트 문장 {f}-{i} 입니다.",
+                "english": [f"This is test sentence {f} {i}.", f"It's sentence number {i} of file {f}."],
+            }
+            for i in range(sentences_per_file)
+        ]
+    return files
@@ -0,0 +1,354 @@
+"""
+동시 세션 부하 테스트. Streamlit AppTest로 실제 app.py를 세션 N개가 동시에 사용하게 하고,
+상호작용별 지연 시간 백분위수, 처리량, 프로세스 메모리를 보고합니다. 네트워크는 쓰지 않습니다.
+
+- GitHub: tools.fake_github의 로컬 HTTP 서버 (--github-latency로 응답 지연)
+- 음성 합성: LEARN_SPEAKING_TTS=fake (--tts-latency)
+- 음성 인식: LEARN_SPEAKING_STT=fake (--stt-latency, --stt-text)
+
+세션마다 "카테고리 고르기 → 다시 듣기 → 녹음 제출 → 답안 보기/숨기기 → 다른 문장"을
+--iterations번 반복하고, 상호작용 사이에는 평균 --think-time초(지수 분포)를 쉽니다.
+
+AppTest의 한계와 우회 방법:
+- AppTest는 st.audio_input을 조작할 수 없으므로 st.audio_input을 감싸, 부하 생성기가 세션 상태에 넣어 둔
+  녹음을 위젯 값처럼 돌려줍니다. 그 뒤의 전처리 → 인식 → 채점 경로는 앱 그대로 실행됩니다
+  (답변 기록은 복습 모드에서만 하므로, --review-mode를 주면 세션마다 복습 모드를 켜고 시작합니다).
+- AppTest는 실행마다 전역 Runtime을 새로 만들고 지우므로, 세션들이 하나의 가짜 Runtime과
+  스크립트 바이트코드 캐시를 함께 쓰도록 바꿔 실제 서버 프로세스처럼 동시에 실행되게 합니다.
+- AppTest는 fragment 안의 위젯도 스크립트 전체를 다시 실행하므로, 다시 듣기/녹음/답안 보기의 지연은
+  실제 브라우저보다 큰 상한값입니다. AppTest 자체의 요소 트리 처리도 같은 프로세스의 CPU를 씁니다.
+
+세션 수마다 깨끗한 하위 프로세스에서 따로 측정합니다.
+
+    python -m tools.load_test --sessions 1 10 25 --iterations 3
+    python -m tools.load_test --sessions 20 --stt-latency 0.8 --tts-latency 0.3 --json load.json
+    python -m tools.load_test --sessions 10 --max-p95-ms 2000   # CI: p95가 넘으면 종료 코드 1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 부하 생성기가 세션 상태에 넣어 두는 녹음 ({위젯 key: RecordedAudio})
+RECORDINGS_KEY = "_load_test_recordings"
+PERCENTILES = (50, 95, 99)
+
+
+class RecordedAudio:
+    """st.audio_input이 돌려주는 UploadedFile 대신 쓰는 녹음 (앱은 file_id와 getvalue()만 씀)"""
+
+    def __init__(self, file_id: str, data: bytes):
+        self.file_id = file_id
+        self._data = data
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+
+class Sample(NamedTuple):
+    step: str
+    seconds: float
+    error: Optional[str]
+
+
+def install_app_test_patches() -> None:
+    """여러 스레드에서 AppTest를 동시에 실행할 수 있도록 Streamlit 전역 상태를 한 번만 준비합니다."""
+    from unittest.mock import MagicMock
+
+    import streamlit as st
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.util import patch_config_options
+
+    # 1) 모든 세션이 같은 가짜 Runtime을 봄 (AppTest가 실행마다 바꿔 끼우는 Runtime._instance는 무시)
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    # 2) 실제 서버처럼 스크립트는 한 번만 컴파일 (동시에 ast.parse를 하면 CPython 3.11에서 오류가 남)
+    compiled: Dict[str, object] = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_get_bytecode(cache, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(cache, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = shared_get_bytecode
+
+    # 세션 스레드마다 찍히는 Streamlit 경고가 결과를 가리지 않도록 함 (Streamlit은 설정을 읽을 때마다 로그 수준을 되돌림)
+    logging.disable(logging.WARNING)
+
+    # 3) 실행마다 설정을 바꿨다 되돌리면 스레드끼리 엇갈리므로, 부하 테스트 내내 한 번만 적용
+    patch_config_options({"global.appTest": True}).__enter__()
+    app_test.patch_config_options = lambda overrides: nullcontext()
+
+    # 4) 녹음 위젯: 부하 생성기가 넣어 둔 녹음이 있으면 그것을 위젯 값으로 돌려줌
+    audio_input = st.audio_input
+
+    def scripted_audio_input(label, *args, key=None, **kwargs):
+        value = audio_input(label, *args, key=key, **kwargs)
+        recording = st.session_state.get(RECORDINGS_KEY, {}).get(key)
+        return recording if recording is not None else value
+
+    st.audio_input = scripted_audio_input
+
+
+def make_recording(seconds: float = 2.0, rate: int = 48000, seed: int = 0) -> bytes:
+    """앞뒤 무음 사이에 크기가 변하는 톤을 넣은 녹음 (tools.replay의 점검용 녹음과 같은 모양)"""
+    import numpy as np
+    from core.audio_preprocess import encode_wav
+
+    noise = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    voice = 0.3 * (0.5 * (1 + np.sin(2 * np.pi * 4 * t))) ** 2 * np.sin(2 * np.pi * 180 * t)
+    silence = 0.002 * noise.standard_normal(int(0.8 * rate))
+    return encode_wav(np.concatenate([silence, voice, silence]).astype(np.float32), rate)
+
+
+class SessionDriver:
+    """사용자 한 명을 흉내 냅니다. 상호작용마다 걸린 시간과 오류를 samples에 남깁니다."""
+
+    def __init__(self, number: int, app_path: str, recording: bytes, iterations: int,
+                 think_time: float, timeout: float, seed: int, review_mode: bool = False):
+        self.number = number
+        self.app_path = app_path
+        self.recording = recording
+        self.iterations = iterations
+        self.think_time = think_time
+        self.timeout = timeout
+        self.review_mode = review_mode
+        self.rng = random.Random(seed * 100003 + number)
+        self.samples: List[Sample] = []
+        self.at = None
+
+    def run(self) -> None:
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(self.app_path, default_timeout=self.timeout)
+        # 앱은 32자리 16진수 토큰만 사용자 ID로 받음
+        self.at.query_params["user"] = f"{self.number:032x}"
+        if not self._step("load", self.at.run):
+            return
+        if self.review_mode and not self._step("review mode", self._enable_review_mode):
+            return
+        categories = [b.label for b in self.at.button
+                      if b.label not in ("🔄 다른 문장", "🔂 다시 듣기") and "답안" not in b.label]
+        steps = [
+            ("category", self._click(lambda label: label in categories)),
+            ("listen", self._click(lambda label: "다시 듣기" in label)),
+            ("answer", self._answer),
+            ("show answers", self._click(lambda label: "모든 답안 보기" in label)),
+            ("hide answers", self._click(lambda label: "답안 숨기기" in label)),
+            ("next sentence", self._click(lambda label: "다른 문장" in label)),
+        ]
+        for _ in range(self.iterations):
+            for name, action in steps:
+                self._think()
+                if not self._step(name, action):
+                    return
+
+    def _step(self, name: str, action) -> bool:
+        start = time.perf_counter()
+        error = None
+        try:
+            action()
+            if self.at.exception:
+                error = self.at.exception[0].message
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.samples.append(Sample(name, time.perf_counter() - start, error))
+        return error is None
+
+    def _click(self, predicate):
+        def action():
+            buttons = [b for b in self.at.button if predicate(b.label)]
+            if not buttons:
+                raise LookupError("no matching button on the page")
+            self.rng.choice(buttons).click().run()
+        return action
+
+    def _answer(self) -> None:
+        # 녹음은 지금 녹음 위젯의 key에 맞춰 넣음 (앱은 새 문장으로 바꿀 때 key를 바꾸고, 같은 문장에서는
+        # file_id로 이미 채점한 녹음을 건너뜀)
+        key = self.at.session_state.audio_key
+        file_id = f"load-{self.number}-{len(self.samples)}"
+        self.at.session_state[RECORDINGS_KEY] = {key: RecordedAudio(file_id, self.recording)}
+        self.at.run()
+        if self.at.session_state.check_result is None:
+            raise RuntimeError("recording was not scored")
+
+    def _enable_review_mode(self) -> None:
+        self.at.toggle(key="review_mode").set_value(True).run()
+
+    def _think(self) -> None:
+        if self.think_time > 0:
+            time.sleep(self.rng.expovariate(1 / self.think_time))
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(samples: Sequence[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    summary = {"count": len(samples), "mean_ms": sum(samples) / len(samples) * 1000}
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = percentile(samples, p / 100) * 1000
+    return summary
+
+
+def worker(sessions: int, args) -> dict:
+    """세션 sessions개를 스레드로 동시에 실행하고 결과를 dict로 돌려줍니다 (하위 프로세스 안에서 호출)."""
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    os.environ.update({
+        "LEARN_SPEAKING_CACHE_DIR": workdir,
+        "LEARN_SPEAKING_TTS": "fake",
+        "LEARN_SPEAKING_TTS_DIR": os.path.join(workdir, "tts"),
+        "LEARN_SPEAKING_TTS_LATENCY": str(args.tts_latency),
+        "LEARN_SPEAKING_STT": "fake",
+        "LEARN_SPEAKING_STT_LATENCY": str(args.stt_latency),
+        "LEARN_SPEAKING_STT_FAKE_TEXT": args.stt_text,
+        "LEARN_SPEAKING_ATTEMPTS_DB": os.path.join(workdir, "attempts.sqlite3"),
+    })
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+
+    import core.data_loader as data_loader
+    from benchmarks.bench_corpus_memory import rss_mb
+    from tools.fake_github import FakeGitHubServer, make_sentence_files
+
+    server = FakeGitHubServer(make_sentence_files(args.files, args.sentences_per_file),
+                              latency=args.github_latency).start()
+    data_loader.get_default_source = lambda: data_loader.GitHubSource(server.api_url)
+    data_loader.DEFAULT_SNAPSHOT_PATH = os.path.join(workdir, "snapshot.json")
+    if args.corpus_ttl is not None:
+        data_loader.DEFAULT_TTL = args.corpus_ttl
+    install_app_test_patches()
+    recording = make_recording(seed=args.seed)
+
+    drivers = [SessionDriver(number, args.app, recording, args.iterations, args.think_time, args.timeout,
+                             args.seed, args.review_mode) for number in range(sessions)]
+    threads = [threading.Thread(target=driver.run, name=f"session-{driver.number}", daemon=True)
+               for driver in drivers]
+    peak = baseline = rss_mb()
+    start = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+            # 세션들이 정확히 같은 순간에 몰리지 않도록 시작을 조금씩 흩뜨림
+            time.sleep(args.ramp_up / max(1, sessions))
+        while any(thread.is_alive() for thread in threads):
+            peak = max(peak, rss_mb())
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+
+    samples = [sample for driver in drivers for sample in driver.samples]
+    errors = [f"{sample.step}: {sample.error}" for sample in samples if sample.error]
+    steps = {}
+    for sample in samples:
+        steps.setdefault(sample.step, []).append(sample.seconds)
+    end = rss_mb()
+    return {
+        "sessions": sessions,
+        "interactions": len(samples),
+        "errors": len(errors),
+        "error_examples": sorted(set(errors))[:5],
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(samples) / elapsed if elapsed else 0.0,
+        "latency": summarize([sample.seconds for sample in samples]),
+        "steps": {name: summarize(values) for name, values in steps.items()},
+        "rss_mb": {"baseline": baseline, "peak": max(peak, end), "end": end,
+                   "per_session": (max(peak, end) - baseline) / sessions},
+        "github_requests": server.request_count,
+    }
+
+
+def run_in_subprocess(sessions: int, argv: Sequence[str]) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, "-m", "tools.load_test", *argv, "--worker", str(sessions)], cwd=ROOT)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def print_result(result: dict) -> None:
+    latency, rss = result["latency"], result["rss_mb"]
+    print(f"== {result['sessions']} sessions: {result['interactions']} interactions in "
+          f"{result['elapsed_s']:.1f}s ({result['throughput_per_s']:.1f}/s), {result['errors']} errors, "
+          f"RSS {rss['baseline']:.0f} -> peak {rss['peak']:.0f} MB ({rss['per_session']:.1f} MB/session)")
+    print(f"{'interaction':>14} {'count':>6} {'mean':>8} " + " ".join(f"{f'p{p}':>8}" for p in PERCENTILES))
+    for name, summary in [*result["steps"].items(), ("all", latency)]:
+        if summary["count"]:
+            print(f"{name:>14} {summary['count']:>6} {summary['mean_ms']:>8.0f} "
+                  + " ".join(f"{summary[f'p{p}_ms']:>8.0f}" for p in PERCENTILES))
+    for example in result["error_examples"]:
+        print(f"  error: {example}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 20], help="동시 세션 수 (여러 개면 차례로 측정)")
+    parser.add_argument("--iterations", type=int, default=3, help="세션마다 연습 흐름을 반복할 횟수")
+    parser.add_argument("--review-mode", action="store_true", help="복습 모드를 켜고 연습 (답변 기록 경로 포함)")
+    parser.add_argument("--think-time", type=float, default=0.5, help="상호작용 사이 평균 대기 시간(초)")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="모든 세션을 시작하는 데 걸리는 시간(초)")
+    parser.add_argument("--github-latency", type=float, default=0.05)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--stt-latency", type=float, default=0.5)
+    parser.add_argument("--stt-text", default="I would like to order a cup of coffee please",
+                        help="가짜 음성 인식기가 돌려줄 문장")
+    parser.add_argument("--files", type=int, default=5, help="가짜 GitHub 저장소의 문장 파일 수")
+    parser.add_argument("--sentences-per-file", type=int, default=50)
+    parser.add_argument("--corpus-ttl", type=float, help="문장 모음 갱신 주기(초). 주지 않으면 앱 기본값")
+    parser.add_argument("--timeout", type=float, default=60, help="스크립트 실행 한 번의 제한 시간(초)")
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="결과를 JSON으로 저장")
+    parser.add_argument("--max-p95-ms", type=float, help="전체 p95가 이 값을 넘거나 오류가 있으면 종료 코드 1")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(worker(args.worker, args)))
+        return
+
+    argv = sys.argv[1:]
+    results = []
+    for sessions in args.sessions:
+        result = run_in_subprocess(sessions, argv)
+        print_result(result)
+        results.append(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    failed = [r for r in results if r["errors"]]
+    if args.max_p95_ms is not None:
+        failed += [r for r in results if r["latency"].get("p95_ms", 0) > args.max_p95_ms]
+    if failed:
+        print(f"FAILED: {sorted({r['sessions'] for r in failed})} sessions")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
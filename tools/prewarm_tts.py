@@ -0,0 +1,65 @@
+"""
+문장 모음 전체의 한국어 음성을 미리 합성해 음성 파일 저장소(static/tts)를 채웁니다.
+이미 저장된 문장은 건너뛰므로, 배포 직후나 주기적인 백그라운드 작업으로 여러 번 실행해도 됩니다.
+
+    # 로컬 폴더의 문장 파일로, 네트워크 없이 가짜 합성기로 점검
+    python -m tools.prewarm_tts --corpus-dir ./sentences --fake
+
+    # 비공개 GitHub 레포지토리의 문장 파일로 실제 gTTS 합성
+    GITHUB_TOKEN=... python -m tools.prewarm_tts --workers 4 --rate 5
+"""
+import argparse
+import os
+import sys
+import time
+
+from core.data_loader import GitHubSource, LocalDirectorySource, fetch_sentences
+from core.tts import DEFAULT_CLIP_DIR, DEFAULT_CLIP_STORE_MAX_BYTES, ClipStore, FakeSynthesizer, GTTSSynthesizer, prewarm
+
+DEFAULT_API_URL = "https://api.github.com/repos/yun6160/Learn-Speaking-Json/contents/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus-dir", help="문장 .json 파일이 있는 로컬 폴더 (없으면 GitHub에서 가져옴)")
+    parser.add_argument("--github-api-url", default=DEFAULT_API_URL)
+    parser.add_argument("--token", default=os.environ.get("GITHUB_TOKEN"), help="GitHub 토큰 (기본: $GITHUB_TOKEN)")
+    parser.add_argument("--clip-dir", default=DEFAULT_CLIP_DIR)
+    parser.add_argument("--max-mb", type=int, default=DEFAULT_CLIP_STORE_MAX_BYTES // (1024 * 1024))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5.0, help="초당 합성 요청 수 상한 (0이면 제한 없음)")
+    parser.add_argument("--fake", action="store_true", help="네트워크 없이 가짜 합성기 사용")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.corpus_dir:
+        source = LocalDirectorySource(args.corpus_dir)
+    else:
+        source = GitHubSource(args.github_api_url, token=args.token)
+    try:
+        sentences = fetch_sentences(source, on_warning=lambda message: print(message, file=sys.stderr))
+    finally:
+        source.close()
+
+    texts = [sentence["korean"] for sentence in sentences if sentence.get("korean")]
+    store = ClipStore(args.clip_dir, max_bytes=args.max_mb * 1024 * 1024)
+    synthesizer = FakeSynthesizer(args.fake_latency) if args.fake else GTTSSynthesizer()
+
+    unique = len(set(texts))
+    print(f"{len(texts)} sentences, {unique} distinct texts -> {args.clip_dir}")
+
+    def report(counts):
+        done = sum(counts.values())
+        if done % 50 == 0 or done == unique:
+            print(f"  {done}/{unique} {counts}", flush=True)
+
+    start = time.perf_counter()
+    counts = prewarm(store, synthesizer, texts, max_workers=args.workers, rate=args.rate, on_progress=report)
+    elapsed = time.perf_counter() - start
+    print(f"done in {elapsed:.1f}s: {counts}, store size {store.total_bytes / 1024 / 1024:.1f}MB")
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
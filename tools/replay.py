@@ -0,0 +1,303 @@
+"""
+녹음 파일 모음을 앱과 같은 핵심 함수(음성 인식 → 채점 → 차이 표시)에 통과시켜
+단계별 지연 시간과 점수 분포를 재는 오프라인 재생 도구입니다. Streamlit 없이 동작합니다.
+
+매니페스트는 한 줄에 하나씩인 JSON입니다. audio 경로는 매니페스트 파일 기준 상대 경로도 됩니다.
+transcript는 가짜 인식기(--stt fake)가 돌려줄 문장이며, 없으면 정답 중 첫 번째를 씁니다.
+
+    {"audio": "audio/0001.wav", "sentence_id": 12, "transcript": "This is a test"}
+
+    # 네트워크 없이 점검용 녹음과 매니페스트를 만들고 재생
+    python -m tools.replay make-fixtures /tmp/replay --count 200
+    python -m tools.replay run /tmp/replay/manifest.jsonl --corpus-dir /tmp/replay/sentences --workers 4
+
+    # 결과를 기준선으로 저장하고, 이후 실행에서 기준선보다 나빠지면 종료 코드 1
+    python -m tools.replay run ... --save-baseline baseline.json
+    python -m tools.replay run ... --baseline baseline.json --max-regression 0.2
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.checker import check_answer, render_diff_html
+from core.corpus import SentenceCorpus
+from core.data_loader import LocalDirectorySource, fetch_sentences
+from core.stt import FakeBackend, STTService, make_backend, process_audio_for_stt
+
+STAGES = ("stt", "check", "render", "total")
+PERCENTILES = (50, 95, 99)
+
+
+class ReplayItem(NamedTuple):
+    """작업 프로세스로 넘기는 녹음 하나. 정답은 미리 찾아서 함께 보냅니다."""
+    audio_path: str
+    sentence_id: int
+    answers: Tuple[str, ...]
+    transcript: str
+
+
+class ReplayOutcome(NamedTuple):
+    sentence_id: int
+    status: str
+    score: float
+    timings: Dict[str, float]
+
+
+def load_manifest(path: str, corpus: SentenceCorpus) -> List[ReplayItem]:
+    index_by_id = {sentence.id: sentence.index for sentence in corpus}
+    base = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            sentence_id = int(entry["sentence_id"])
+            if sentence_id not in index_by_id:
+                raise ValueError(f"{path}:{line_number}: unknown sentence_id {sentence_id}")
+            answers = corpus.english_of(index_by_id[sentence_id])
+            audio_path = os.path.join(base, entry["audio"])
+            items.append(ReplayItem(audio_path, sentence_id, answers, entry.get("transcript") or answers[0]))
+    return items
+
+
+# --- 작업 프로세스 ---------------------------------------------------------------
+# 프로세스마다 인식 서비스를 하나 만들어 두고, 녹음을 하나씩 순서대로 처리합니다.
+_service: Optional[STTService] = None
+_fake: Optional[FakeBackend] = None
+
+
+def _init_worker(stt: str, fake_latency: float, preprocess: bool) -> None:
+    global _service, _fake
+    # 인식 결과마다 찍히는 로그가 측정을 방해하지 않도록 작업 프로세스의 출력은 버림
+    sys.stdout = open(os.devnull, "w")
+    if stt == "fake":
+        _fake = FakeBackend(latency=fake_latency)
+        backends = [_fake]
+    else:
+        backends = [make_backend(name.strip()) for name in stt.split("+")]
+    _service = STTService(backends, max_workers=len(backends), hedge=len(backends) > 1, preprocess=preprocess)
+
+
+def _replay_one(item: ReplayItem) -> ReplayOutcome:
+    with open(item.audio_path, "rb") as f:
+        audio_bytes = f.read()
+    if _fake is not None:
+        # 프로세스 하나가 한 번에 녹음 하나만 처리하므로 매번 바꿔 끼워도 안전함
+        _fake.text = item.transcript
+
+    clock = time.perf_counter
+    timings = {}
+    start = clock()
+    stt_result = process_audio_for_stt(audio_bytes, _service)
+    timings["stt"] = clock() - start
+    score = 0.0
+    if stt_result.ok:
+        t = clock()
+        # 앱은 sentence_id로 결과를 캐시하지만, 여기서는 매번 실제 비용을 재기 위해 캐시를 쓰지 않음
+        result = check_answer(stt_result.text, item.answers)
+        timings["check"] = clock() - t
+        t = clock()
+        render_diff_html(result)
+        timings["render"] = clock() - t
+        score = result.score
+    timings["total"] = clock() - start
+    return ReplayOutcome(item.sentence_id, stt_result.status, score, timings)
+
+
+# --- 집계와 기준선 비교 ------------------------------------------------------------
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """nearest-rank 백분위수"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(outcomes: Sequence[ReplayOutcome], elapsed: float) -> dict:
+    stages = {}
+    for stage in STAGES:
+        values = sorted(outcome.timings[stage] for outcome in outcomes if stage in outcome.timings)
+        if values:
+            stages[stage] = {f"p{pct}": percentile(values, pct) * 1000 for pct in PERCENTILES}
+            stages[stage]["mean"] = statistics.mean(values) * 1000
+
+    statuses: Dict[str, int] = {}
+    for outcome in outcomes:
+        statuses[outcome.status] = statuses.get(outcome.status, 0) + 1
+    scores = [outcome.score for outcome in outcomes]
+    # 0.0~0.1, ..., 0.9~1.0 구간별 개수 (1.0은 마지막 구간에 포함)
+    histogram = [0] * 10
+    for score in scores:
+        histogram[min(int(score * 10), 9)] += 1
+
+    return {
+        "count": len(outcomes),
+        "elapsed": elapsed,
+        "throughput": len(outcomes) / elapsed if elapsed > 0 else 0.0,
+        "stages_ms": stages,
+        "statuses": statuses,
+        "mean_score": statistics.mean(scores) if scores else 0.0,
+        "score_histogram": histogram,
+    }
+
+
+def compare_to_baseline(summary: dict, baseline: dict, max_regression: float, max_score_drop: float,
+                        min_delta_ms: float = 1.0) -> List[str]:
+    """
+    기준선보다 나빠진 항목의 설명 목록 (비어 있으면 통과).
+    1ms도 안 걸리는 단계의 흔들림이 실패로 잡히지 않도록, min_delta_ms보다 작은 증가는 무시합니다.
+    """
+    problems = []
+    if summary["throughput"] < baseline["throughput"] * (1 - max_regression):
+        problems.append(f"throughput {summary['throughput']:.1f}/s < baseline {baseline['throughput']:.1f}/s")
+    for stage, base in baseline["stages_ms"].items():
+        current = summary["stages_ms"].get(stage)
+        if current is None:
+            continue
+        for key in ("p50", "p95"):
+            if current[key] > base[key] * (1 + max_regression) and current[key] - base[key] > min_delta_ms:
+                problems.append(f"{stage} {key} {current[key]:.2f}ms > baseline {base[key]:.2f}ms")
+    if summary["mean_score"] < baseline["mean_score"] - max_score_drop:
+        problems.append(f"mean score {summary['mean_score']:.3f} < baseline {baseline['mean_score']:.3f}")
+    return problems
+
+
+def print_summary(summary: dict) -> None:
+    print(f"{summary['count']} recordings in {summary['elapsed']:.2f}s ({summary['throughput']:.1f}/s)")
+    print(f"{'stage':>8} " + " ".join(f"{f'p{pct}(ms)':>9}" for pct in PERCENTILES) + f" {'mean(ms)':>9}")
+    for stage, values in summary["stages_ms"].items():
+        print(f"{stage:>8} " + " ".join(f"{values[f'p{pct}']:>9.2f}" for pct in PERCENTILES)
+              + f" {values['mean']:>9.2f}")
+    print("status: " + ", ".join(f"{status}={count}" for status, count in sorted(summary["statuses"].items())))
+    print(f"mean score {summary['mean_score']:.3f}")
+    peak = max(summary["score_histogram"]) or 1
+    for bucket, count in enumerate(summary["score_histogram"]):
+        print(f"  {bucket / 10:.1f}-{(bucket + 1) / 10:.1f} {count:>6} {'#' * round(40 * count / peak)}")
+
+
+def run(args) -> int:
+    source = LocalDirectorySource(args.corpus_dir)
+    try:
+        corpus = SentenceCorpus.from_records(
+            fetch_sentences(source, on_warning=lambda message: print(message, file=sys.stderr)))
+    finally:
+        source.close()
+    items = load_manifest(args.manifest, corpus)
+    if args.repeat > 1:
+        items = items * args.repeat
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.stt, args.fake_latency, not args.no_preprocess)) as pool:
+        outcomes = list(pool.map(_replay_one, items, chunksize=args.chunksize))
+    summary = summarize(outcomes, time.perf_counter() - start)
+    print_summary(summary)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare_to_baseline(summary, baseline, args.max_regression, args.max_score_drop,
+                                       args.min_delta_ms)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        if problems:
+            return 1
+        print("no regression against baseline")
+    return 0
+
+
+# --- 점검용 녹음 만들기 ------------------------------------------------------------
+def _perturb(rng: random.Random, sentence: str) -> str:
+    """인식 오류처럼 단어 몇 개를 빠뜨리거나 되풀이합니다."""
+    words = sentence.split()
+    for _ in range(rng.randint(0, 2)):
+        position = rng.randrange(len(words))
+        if rng.random() < 0.5 and len(words) > 1:
+            del words[position]
+        else:
+            words.insert(position, words[position])
+    return " ".join(words)
+
+
+def make_fixtures(args) -> int:
+    import numpy as np
+    from core.audio_preprocess import encode_wav
+    from tools.fake_github import make_sentence_files
+
+    sentence_dir = os.path.join(args.output, "sentences")
+    audio_dir = os.path.join(args.output, "audio")
+    os.makedirs(sentence_dir, exist_ok=True)
+    os.makedirs(audio_dir, exist_ok=True)
+    for name, sentences in make_sentence_files(args.files).items():
+        with open(os.path.join(sentence_dir, name), "w", encoding="utf-8") as f:
+            json.dump(sentences, f, ensure_ascii=False)
+
+    source = LocalDirectorySource(sentence_dir)
+    corpus = SentenceCorpus.from_records(fetch_sentences(source))
+    rng = random.Random(args.seed)
+    noise = np.random.default_rng(args.seed)
+    rate = 48000
+    with open(os.path.join(args.output, "manifest.jsonl"), "w", encoding="utf-8") as manifest:
+        for n in range(args.count):
+            sentence = corpus[rng.randrange(len(corpus))]
+            # 앞뒤 무음 사이에 크기가 변하는 톤을 넣은 '말소리' (가짜 인식기는 내용을 보지 않음)
+            t = np.arange(int(rng.uniform(1.0, 3.0) * rate)) / rate
+            voice = 0.3 * (0.5 * (1 + np.sin(2 * np.pi * 4 * t))) ** 2 * np.sin(2 * np.pi * 180 * t)
+            silence = 0.002 * noise.standard_normal(int(0.8 * rate))
+            audio_name = f"audio/{n:05d}.wav"
+            with open(os.path.join(args.output, audio_name), "wb") as f:
+                f.write(encode_wav(np.concatenate([silence, voice, silence]).astype(np.float32), rate))
+            entry = {"audio": audio_name, "sentence_id": sentence.id,
+                     "transcript": _perturb(rng, rng.choice(sentence.english))}
+            manifest.write(json.dumps(entry) + "\n")
+    print(f"{args.count} recordings for {len(corpus)} sentences -> {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="매니페스트의 녹음을 재생하고 결과를 보고")
+    run_parser.add_argument("manifest")
+    run_parser.add_argument("--corpus-dir", required=True, help="문장 .json 파일이 있는 로컬 폴더")
+    run_parser.add_argument("--stt", default="fake", help="fake, google, sphinx 또는 google+sphinx")
+    run_parser.add_argument("--fake-latency", type=float, default=0.0, help="가짜 인식기의 응답 지연(초)")
+    run_parser.add_argument("--no-preprocess", action="store_true", help="인식 전 오디오 전처리 끄기")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    run_parser.add_argument("--chunksize", type=int, default=4)
+    run_parser.add_argument("--repeat", type=int, default=1, help="매니페스트를 여러 번 반복해서 재생")
+    run_parser.add_argument("--save-baseline", help="이번 결과를 기준선 JSON으로 저장")
+    run_parser.add_argument("--baseline", help="비교할 기준선 JSON")
+    run_parser.add_argument("--max-regression", type=float, default=0.2,
+                            help="지연 시간/처리량이 기준선보다 이 비율 넘게 나빠지면 실패")
+    run_parser.add_argument("--max-score-drop", type=float, default=0.02,
+                            help="평균 점수가 기준선보다 이만큼 넘게 떨어지면 실패")
+    run_parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                            help="지연 시간이 이보다 적게 늘어난 것은 회귀로 보지 않음")
+    run_parser.set_defaults(handler=run)
+
+    fixture_parser = commands.add_parser("make-fixtures", help="점검용 문장 파일, 녹음, 매니페스트 만들기")
+    fixture_parser.add_argument("output")
+    fixture_parser.add_argument("--count", type=int, default=200)
+    fixture_parser.add_argument("--files", type=int, default=4, help="만들 문장 파일 수 (파일당 50문장)")
+    fixture_parser.add_argument("--seed", type=int, default=7)
+    fixture_parser.set_defaults(handler=make_fixtures)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()